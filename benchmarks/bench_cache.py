@@ -0,0 +1,62 @@
+"""Fingerprint rate and solving with duplicates, through the result cache and without.
+
+Generates puzzles, adds copies of each turned by a random symmetry of the
+square with cages and cells shuffled, checks every copy gets its original's
+fingerprint, then times solving the lot directly and through a fresh
+kenken_cache.ResultCache, checking both give the same solutions.
+Usage: python benchmarks/bench_cache.py [--puzzles 100] [--copies 4]
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from synthetic import shuffled_copy
+
+from kenken_cache import ResultCache, solve_cached
+from kenken_fingerprint import fingerprint
+from kenken_puzzle_generator import generate_puzzle
+from kenken_solver import solve_puzzle
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--puzzles", type=int, default=100)
+    parser.add_argument("--copies", type=int, default=4,
+                        help="Shuffled copies added per puzzle")
+    args = parser.parse_args()
+
+    rng = random.Random(24)
+    puzzles = []
+    for _ in range(args.puzzles):
+        original = generate_puzzle(rng.choice((6, 7, 8, 9)), rng)[0]
+        puzzles.append(original)
+        puzzles.extend(shuffled_copy(original, rng) for _ in range(args.copies))
+    rng.shuffle(puzzles)
+
+    start = time.perf_counter()
+    fingerprints = [fingerprint(puzzle_data) for puzzle_data in puzzles]
+    fingerprint_time = time.perf_counter() - start
+    distinct = len(set(fingerprints))
+    assert distinct == args.puzzles, f"{distinct} fingerprints for {args.puzzles} puzzles"
+
+    start = time.perf_counter()
+    direct = [solve_puzzle(puzzle_data)[0] for puzzle_data in puzzles]
+    direct_time = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(tmp)
+        start = time.perf_counter()
+        cached = [solve_cached(puzzle_data, cache)[0] for puzzle_data in puzzles]
+        cached_time = time.perf_counter() - start
+    assert cached == direct, "cached solutions differ"
+
+    print(f"{len(puzzles)} puzzles, {distinct} distinct: fingerprinted in {fingerprint_time:.3f}s "
+          f"({len(puzzles) / fingerprint_time:.0f}/s)")
+    print(f"{'solve':>8} {'seconds':>8} {'per s':>8}")
+    print(f"{'direct':>8} {direct_time:>8.3f} {len(puzzles) / direct_time:>8.0f}")
+    print(f"{'cached':>8} {cached_time:>8.3f} {len(puzzles) / cached_time:>8.0f}")
+    print(cache.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Animation beats, play() calls and video length with and without step coalescing.
+
+Counts come from a model of KenKenGenerator.construct() (every play() and
+wait() lasts one second unless construct() says otherwise), so no Manim is
+needed. Also checks that replaying the coalesced beats ends in the same grid.
+Usage: python benchmarks/bench_coalesce.py [--size 9] [--count 20]
+"""
+import argparse
+import random
+import time
+
+import synthetic  # noqa: F401  (puts the repository on sys.path)
+
+from kenken_coalesce import STEP_GROUP, coalesce_steps, flatten
+from kenken_parser import BANNER, format_puzzle, format_solution_line, parse_lines
+from kenken_puzzle_generator import generate_puzzle
+from kenken_state import GridState
+
+
+def step_cost(step, assigned_with_text):
+    """(play calls, seconds) of one uncoalesced step in construct()."""
+    if step.type in ('constraint_propagation', 'cage_line_elimination') and step.cell:
+        return 4, 5.0
+    if step.type == 'assignment':
+        plays = 6 if assigned_with_text else 5
+        return plays, plays + 0.5
+    return 0, 0.0
+
+
+def beat_cost(beat):
+    if beat.type == STEP_GROUP:
+        return 3, 4.0
+    return step_cost(beat, True)
+
+
+def final_grid(steps, size, numbers):
+    state = GridState(size, numbers)
+    for step in steps:
+        state.apply(step)
+    return state.candidates, state.values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=9)
+    parser.add_argument("--count", type=int, default=20)
+    args = parser.parse_args()
+
+    totals = {'steps': 0, 'beats': 0, 'plain': [0, 0.0], 'coalesced': [0, 0.0]}
+    coalesce_time = 0.0
+    rng = random.Random(args.size)
+    for _ in range(args.count):
+        puzzle_data, log, solution, _ = generate_puzzle(args.size, rng)
+        lines = format_puzzle(puzzle_data) + [BANNER] + log + [format_solution_line(solution)]
+        puzzle_data, _, steps = parse_lines(lines)
+
+        start = time.perf_counter()
+        beats = list(coalesce_steps(steps))
+        coalesce_time += time.perf_counter() - start
+        assert list(flatten(beats)) == steps
+
+        info = puzzle_data['info']
+        plain = final_grid(steps, info['size'], info['allowed_numbers'])
+        assert final_grid(flatten(beats), info['size'], info['allowed_numbers']) == plain
+
+        shown = set()
+        for step in steps:
+            plays, seconds = step_cost(step, getattr(step, 'cell', None) in shown)
+            totals['plain'][0] += plays
+            totals['plain'][1] += seconds
+            if step.type in ('constraint_propagation', 'cage_line_elimination'):
+                shown.add(step.cell)
+        for beat in beats:
+            plays, seconds = beat_cost(beat)
+            totals['coalesced'][0] += plays
+            totals['coalesced'][1] += seconds
+        totals['steps'] += len(steps)
+        totals['beats'] += len(beats)
+
+    print(f"{args.count} puzzles of {args.size}x{args.size}: {totals['steps']} steps -> "
+          f"{totals['beats']} beats (coalescing took {coalesce_time * 1000:.1f} ms)")
+    print(f"{'mode':>10} {'play()':>8} {'video min':>10}")
+    for mode in ('plain', 'coalesced'):
+        plays, seconds = totals[mode]
+        print(f"{mode:>10} {plays:>8} {seconds / 60:>10.1f}")
+    ratio = totals['plain'][1] / totals['coalesced'][1]
+    print(f"Video (and frame count) reduced {ratio:.1f}x; final grids identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Solver setup cost with and without the cage combo cache.
+
+Usage: python benchmarks/bench_combos.py [puzzles]   (default: 200 9x9 puzzles)
+"""
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import synthetic_puzzle
+
+from kenken_combos import ComboCache
+from kenken_solver import KenKenSolver
+
+
+def run(puzzles, make_cache):
+    start = time.perf_counter()
+    for puzzle_data in puzzles:
+        KenKenSolver(puzzle_data, combo_cache=make_cache()).solve()
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    puzzles = [synthetic_puzzle(9, seed, max_cage=4)[0] for seed in range(count)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "combos.bin")
+        warm = ComboCache()
+        rows = [("uncached", run(puzzles, ComboCache), None)]
+        rows.append(("in-process LRU", run(puzzles, lambda: warm), warm))
+
+        # Fill the disk cache from a first batch, then time a fresh process-like open
+        builder = ComboCache(path)
+        run(puzzles, lambda: builder)
+        builder.save()
+        builder.close()
+        disk = ComboCache(path)
+        rows.append(("memory-mapped file", run(puzzles, lambda: disk), disk))
+
+        print(f"{'cache':>20} {'total s':>8} {'ms/puzzle':>10} {'hit rate':>9}")
+        for name, elapsed, cache in rows:
+            hit_rate = f"{cache.stats()['hit_rate']:.1%}" if cache else "-"
+            print(f"{name:>20} {elapsed:>8.2f} {elapsed / count * 1000:>10.2f} {hit_rate:>9}")
+        print(f"cache file: {os.path.getsize(path):,} bytes, {disk.stats()['disk_entries']} entries")
+
+
+if __name__ == "__main__":
+    main()
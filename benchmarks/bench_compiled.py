@@ -0,0 +1,69 @@
+"""Load time of compiled (.kkc) descriptors against parsing the text.
+
+For each log length, times parse_descriptor on the text, opening the
+compiled file (header, cages and solution only), opening it and walking every
+step view, and random access to single steps.
+Usage: python benchmarks/bench_compiled.py [n_lines ...]   (default: 1000 100000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from synthetic import write_synthetic_descriptor
+
+from kenken_compiled import CompiledDescriptor, compile_descriptor
+from kenken_parser import parse_descriptor
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def open_only(path):
+    with CompiledDescriptor(path) as compiled:
+        return compiled.puzzle_data, compiled.solution
+
+
+def open_and_walk(path):
+    with CompiledDescriptor(path) as compiled:
+        for step in compiled:
+            step.cell
+
+
+def random_access(path, picks):
+    with CompiledDescriptor(path) as compiled:
+        for i in picks:
+            compiled[i].description
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 100_000]
+    print(f"{'lines':>8} {'text ms':>9} {'compile ms':>11} {'open ms':>9} "
+          f"{'walk ms':>9} {'1k random ms':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_lines in sizes:
+            path = write_synthetic_descriptor(os.path.join(tmp, f"log_{n_lines}.txt"), n_lines)
+            repeat = 5 if n_lines <= 10_000 else 2
+            text = best_of(lambda: parse_descriptor(path), repeat)
+            compile_time = best_of(lambda: compile_descriptor(path), 1)
+            compiled = path + ".kkc"
+            with CompiledDescriptor(compiled) as descriptor:
+                n_steps = len(descriptor)
+            picks = [random.randrange(n_steps) for _ in range(1000)]
+            opened = best_of(lambda: open_only(compiled), repeat)
+            walked = best_of(lambda: open_and_walk(compiled), repeat)
+            randomly = best_of(lambda: random_access(compiled, picks), repeat)
+            print(f"{n_lines:>8} {text * 1000:>9.2f} {compile_time * 1000:>11.2f} "
+                  f"{opened * 1000:>9.3f} {walked * 1000:>9.2f} {randomly * 1000:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Corpus index build rate and random puzzle reads, against one file per puzzle.
+
+Writes solver logs for generated puzzles as separate descriptors, packs them
+into one corpus (kenken_corpus.pack_corpus), then times indexing the corpus
+and reading random puzzles both ways, checking that reads parse the same.
+Usage: python benchmarks/bench_corpus.py [--puzzles 200] [--copies 50] [--reads 2000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import synthetic  # noqa: F401  (puts the repository on sys.path)
+
+from kenken_corpus import CorpusIndex, build_index, pack_corpus, parse_text
+from kenken_parser import parse_descriptor
+from kenken_puzzle_generator import generate_puzzle
+from kenken_solver import write_descriptor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--puzzles", type=int, default=200)
+    parser.add_argument("--copies", type=int, default=50,
+                        help="Times the puzzles are repeated in the corpus")
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = random.Random(22)
+        paths = []
+        for i in range(args.puzzles):
+            puzzle_data, log, solution, _ = generate_puzzle(rng.choice((6, 7, 8, 9)), rng)
+            path = os.path.join(tmp, f"{i:06d}.txt")
+            write_descriptor(puzzle_data, log, solution, path)
+            paths.append(path)
+        sources = paths * args.copies
+        corpus = os.path.join(tmp, "corpus.txt")
+        pack_corpus(sources, corpus)
+        corpus_bytes = os.path.getsize(corpus)
+
+        start = time.perf_counter()
+        index_path = build_index(corpus)
+        build_time = time.perf_counter() - start
+
+        numbers = [rng.randrange(len(sources)) + 1 for _ in range(args.reads)]
+        # Results are dropped as they come, so neither pass pays for the
+        # other's garbage; they are compared in a pass of their own
+        start = time.perf_counter()
+        for number in numbers:
+            parse_descriptor(sources[number - 1])
+        file_time = time.perf_counter() - start
+        with CorpusIndex(corpus, index_path) as index:
+            start = time.perf_counter()
+            for number in numbers:
+                parse_text(index.read(index.entry(number)))
+            corpus_time = time.perf_counter() - start
+            for number in numbers[:200]:
+                assert parse_text(index.read(index.entry(number))) == \
+                    parse_descriptor(sources[number - 1]), f"puzzle {number} differs"
+            start = time.perf_counter()
+            for number in numbers:
+                index.read(index.entry(number))
+            seek_time = time.perf_counter() - start
+
+    print(f"{len(sources)} puzzles, {corpus_bytes / 2**20:.1f} MiB corpus: indexed in "
+          f"{build_time:.3f}s ({corpus_bytes / 2**20 / build_time:.0f} MiB/s)")
+    print(f"{'read':>16} {'seconds':>8} {'per s':>8}")
+    print(f"{'file + parse':>16} {file_time:>8.3f} {args.reads / file_time:>8.0f}")
+    print(f"{'corpus + parse':>16} {corpus_time:>8.3f} {args.reads / corpus_time:>8.0f}")
+    print(f"{'corpus seek only':>16} {seek_time:>8.3f} {args.reads / seek_time:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Milliseconds per solution count, exact cover against branching on cells.
+
+Draws random puzzles the deduction rules stall on (the only ones that need a
+search), counts their solutions up to 2 with KenKenSolver.count_solutions
+(dancing links over the cage placements left) and with the cell-by-cell
+branching it replaced, checks both agree, and times generating unique
+puzzles with search allowed, where the count is the uniqueness oracle.
+Usage: python benchmarks/bench_dlx.py [--size 9] [--count 30]
+"""
+import argparse
+import random
+import time
+
+import synthetic  # noqa: F401  (puts the repository on sys.path)
+
+from kenken_puzzle_generator import generate_puzzle, random_puzzle
+from kenken_solver import Contradiction, KenKenSolver
+
+
+def branch_count(solver, limit):
+    """The solution count before exact cover: propagate, then branch on the
+    cell with the fewest candidates."""
+    try:
+        solver.propagate()
+    except Contradiction:
+        return 0
+    unset = [k for k, value in enumerate(solver.values) if value is None]
+    if not unset:
+        return 1
+    candidates = solver.candidates
+    k = min(unset, key=lambda k: bin(candidates[k]).count('1'))
+    state = solver.snapshot()
+    mask = candidates[k]
+    total = 0
+    while mask and total < limit:
+        bit = mask & -mask
+        mask ^= bit
+        try:
+            solver.assign(k, bit.bit_length() - 1, 'Branch')
+            total += branch_count(solver, limit - total)
+        except Contradiction:
+            pass
+        solver.restore(state)
+    return total
+
+
+def stalled_puzzles(size, count, rng):
+    puzzles = []
+    while len(puzzles) < count:
+        puzzle_data, _ = random_puzzle(size, rng)
+        try:
+            if KenKenSolver(puzzle_data).solve() is None:
+                puzzles.append(puzzle_data)
+        except Contradiction:
+            pass
+    return puzzles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=9)
+    parser.add_argument("--count", type=int, default=30)
+    args = parser.parse_args()
+
+    rng = random.Random(args.size)
+    puzzles = stalled_puzzles(args.size, args.count, rng)
+
+    # Both counts start from the state the rules stalled in, so only the
+    # searches are timed (propagating takes about as long again)
+    solvers = []
+    for puzzle_data in puzzles:
+        solver = KenKenSolver(puzzle_data)
+        solver.propagate()
+        solvers.append(solver)
+    results = {}
+    times = {}
+    for name, count in (("branching", lambda solver: branch_count(solver, 2)),
+                        ("exact cover", lambda solver: solver.count_solutions(2))):
+        start = time.perf_counter()
+        results[name] = [count(solver) for solver in solvers]
+        times[name] = time.perf_counter() - start
+    assert results["branching"] == results["exact cover"], "solution counts differ"
+    unique = results["exact cover"].count(1)
+
+    print(f"{args.count} stalled {args.size}x{args.size} puzzles ({unique} unique)")
+    print(f"{'search':>12} {'seconds':>8} {'ms each':>8}")
+    for name, seconds in times.items():
+        print(f"{name:>12} {seconds:>8.3f} {seconds * 1000 / args.count:>8.2f}")
+
+    start = time.perf_counter()
+    attempts = 0
+    for _ in range(args.count):
+        attempts += generate_puzzle(args.size, rng, logic_only=False)[3]
+    elapsed = time.perf_counter() - start
+    print(f"generated {args.count} unique {args.size}x{args.size} puzzles with search allowed in "
+          f"{elapsed:.2f}s ({args.count / elapsed * 60:.0f}/minute, {attempts} attempts)")
+
+
+if __name__ == "__main__":
+    main()
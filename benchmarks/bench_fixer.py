@@ -0,0 +1,70 @@
+"""Coordinate fixer: in-memory process_file vs streaming fix_file.
+
+Times both on one large synthetic log and records peak Python memory with
+tracemalloc, checks their outputs are byte-identical, then fixes several
+copies across a process pool.
+Usage: python benchmarks/bench_fixer.py [n_lines] [--files 8] [--workers N]
+"""
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from synthetic import write_synthetic_descriptor
+
+from kenken_coordinate_fixer import fix_file, fix_files, process_file
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("n_lines", nargs="?", type=int, default=1_000_000)
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--workers", "-j", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_synthetic_descriptor(os.path.join(tmp, "log.txt"), args.n_lines)
+        size_mb = os.path.getsize(path) / 2**20
+        in_memory = os.path.join(tmp, "in_memory.txt")
+        streamed = os.path.join(tmp, "streamed.txt")
+        with contextlib.redirect_stdout(io.StringIO()):
+            memory_time, memory_peak = measure(lambda: process_file(path, in_memory))
+        stream_time, stream_peak = measure(lambda: fix_file(path, streamed))
+        assert filecmp.cmp(in_memory, streamed, shallow=False), "outputs differ"
+
+        print(f"{args.n_lines} lines ({size_mb:.0f} MiB)")
+        print(f"{'mode':>10} {'seconds':>8} {'MiB/s':>7} {'peak MiB':>9}")
+        for mode, seconds, peak in (("in-memory", memory_time, memory_peak),
+                                    ("streaming", stream_time, stream_peak)):
+            print(f"{mode:>10} {seconds:>8.2f} {size_mb / seconds:>7.1f} {peak / 2**20:>9.1f}")
+
+        copies = []
+        for i in range(args.files):
+            copy = os.path.join(tmp, f"copy_{i}.txt")
+            shutil.copyfile(path, copy)
+            copies.append(copy)
+        start = time.perf_counter()
+        results = list(fix_files(copies, args.workers, in_place=True))
+        elapsed = time.perf_counter() - start
+        assert all(error is None for _, _, error, _ in results)
+        print(f"{args.files} files in place across {args.workers or os.cpu_count()} workers: "
+              f"{elapsed:.2f}s ({size_mb * args.files / elapsed:.1f} MiB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Descriptors graded per second, and peak memory against corpus size.
+
+Writes solver logs for generated puzzles, links them many times over into a
+corpus directory (so large corpora cost no extra disk), then grades the
+corpus in-process at two sizes, timed and then again under tracemalloc:
+the peak should not grow with the number of descriptors. The last line
+times the process pool.
+Usage: python benchmarks/bench_grade.py [--puzzles 100] [--copies 20] [--workers N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import synthetic  # noqa: F401  (puts the repository on sys.path)
+
+from kenken_grade import grade_descriptors, iter_descriptor_paths
+from kenken_puzzle_generator import generate_puzzle
+from kenken_solver import write_descriptor
+
+
+def grade_all(corpus, workers):
+    start = time.perf_counter()
+    count = sum(1 for _ in grade_descriptors(iter_descriptor_paths([corpus]), workers))
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--puzzles", type=int, default=100)
+    parser.add_argument("--copies", type=int, default=20)
+    parser.add_argument("--workers", "-j", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = random.Random(7)
+        sources = []
+        for i in range(args.puzzles):
+            puzzle_data, log, solution, _ = generate_puzzle(rng.choice((6, 7, 8, 9)), rng)
+            path = os.path.join(tmp, f"source_{i:04d}.txt")
+            write_descriptor(puzzle_data, log, solution, path)
+            sources.append(path)
+
+        print(f"{'descriptors':>11} {'seconds':>8} {'per s':>7} {'peak KiB':>9}")
+        for copies in (max(1, args.copies // 4), args.copies):
+            corpus = os.path.join(tmp, f"corpus_{copies}")
+            os.makedirs(corpus)
+            for copy in range(copies):
+                for i, source in enumerate(sources):
+                    os.link(source, os.path.join(corpus, f"{copy:04d}_{i:04d}.txt"))
+            count, elapsed = grade_all(corpus, workers=1)
+            tracemalloc.start()
+            grade_all(corpus, workers=1)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{count:>11} {elapsed:>8.2f} {count / elapsed:>7.0f} {peak / 1024:>9.0f}")
+
+        count, elapsed = grade_all(corpus, args.workers)
+        print(f"process pool ({args.workers or os.cpu_count()} workers): {count} descriptors "
+              f"in {elapsed:.2f}s ({count / elapsed:.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Start-up cost of each module, measured with python -X importtime.
+
+Each module is imported in a fresh interpreter. The table shows the
+cumulative import time reported for the module, the wall time of the whole
+process, and whether Manim ended up loaded.
+Usage: python benchmarks/bench_import.py [module ...] [--repeat 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "kenken_parser",
+    "kenken_coalesce",
+    "kenken_combos",
+    "kenken_solver",
+    "kenken_replay",
+    "kenken_puzzle_generator",
+    "kenken_batch_render",
+    "kenken_generator",
+    "kenken_scene",
+]
+
+PROBE = "import sys, time; t = time.perf_counter(); import {0}; " \
+        "print(time.perf_counter() - t, 'manim' in sys.modules)"
+
+
+def import_time(module):
+    """(cumulative import µs of module, process seconds, manim loaded) or None on failure."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module)],
+        cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return None
+    cumulative = 0
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative = int(parts[1])
+    seconds, manim_loaded = completed.stdout.split()
+    return cumulative, float(seconds), manim_loaded == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module (best is kept)")
+    args = parser.parse_args()
+
+    print(f"{'module':<26} {'import ms':>10} {'manim':>6}")
+    for module in args.modules:
+        runs = [import_time(module) for _ in range(args.repeat)]
+        runs = [run for run in runs if run]
+        if not runs:
+            print(f"{module:<26} {'failed (missing dependency?)':>30}")
+            continue
+        cumulative = min(run[0] for run in runs)
+        manim_loaded = runs[0][2]
+        print(f"{module:<26} {cumulative / 1000:>10.1f} {'yes' if manim_loaded else 'no':>6}")
+
+
+if __name__ == "__main__":
+    main()
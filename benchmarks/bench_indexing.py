@@ -0,0 +1,62 @@
+"""1-based logs: fixing while parsing vs fixing the file and parsing the copy.
+
+Writes solver logs for generated puzzles, converts them to the 1-based form
+kenken_coordinate_fixer undoes, and times parsing them with indexing
+detected against fixing each file and parsing the copy. That both paths
+give the same result is checked by tests/test_indexing.py.
+Usage: python benchmarks/bench_indexing.py [--size 9] [--count 200]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from synthetic import to_one_based
+
+from kenken_coordinate_fixer import fix_file
+from kenken_parser import parse_descriptor
+from kenken_puzzle_generator import generate_puzzle
+from kenken_solver import write_descriptor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=9)
+    parser.add_argument("--count", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = random.Random(args.size)
+        one_based = []
+        for i in range(args.count):
+            puzzle_data, log, solution, _ = generate_puzzle(args.size, rng)
+            path = os.path.join(tmp, f"{i:06d}.txt")
+            write_descriptor(puzzle_data, log, solution, path)
+            shifted = os.path.join(tmp, f"{i:06d}_1based.txt")
+            with open(path, encoding='utf-8') as source, \
+                    open(shifted, 'w', encoding='utf-8') as target:
+                target.writelines(to_one_based(line) for line in source)
+            one_based.append(shifted)
+
+        start = time.perf_counter()
+        two_step = []
+        for path in one_based:
+            fixed = fix_file(path, path[:-4] + "_fixed.txt")
+            two_step.append(parse_descriptor(fixed, indexing=0))
+        two_step_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for path in one_based:
+            parse_descriptor(path)
+        one_pass_time = time.perf_counter() - start
+
+        steps = sum(len(item[2]) for item in two_step)
+        print(f"{args.count} {args.size}x{args.size} logs, {steps} steps")
+        print(f"{'path':>18} {'seconds':>8} {'logs/s':>7}")
+        for name, seconds in (("fix file + parse", two_step_time),
+                              ("parse, detected", one_pass_time)):
+            print(f"{name:>18} {seconds:>8.2f} {args.count / seconds:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
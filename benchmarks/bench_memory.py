@@ -0,0 +1,67 @@
+"""Bytes per step and per grid: slotted steps and GridState vs the old dict layout.
+
+Steps are measured with tracemalloc while parsing a synthetic log with the
+original dict-building parser and with kenken_parser. Grids are measured by
+building many 9x9 grids the way construct() used to (a dict of cell tuples
+to copied allowed_numbers lists) and as kenken_state.GridState.
+Usage: python benchmarks/bench_memory.py [n_lines] [--grids 1000]
+"""
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from bench_parser import LegacyParser
+from synthetic import write_synthetic_descriptor
+
+from kenken_parser import parse_descriptor
+from kenken_state import GridState
+
+
+def allocated(build):
+    """Bytes still allocated by build()'s result, and the result."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def dict_grid(size, allowed_numbers):
+    return {(row, col): allowed_numbers.copy() for row in range(size) for col in range(size)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("n_lines", nargs="?", type=int, default=200_000)
+    parser.add_argument("--grids", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_synthetic_descriptor(os.path.join(tmp, "log.txt"), args.n_lines)
+        legacy_bytes, legacy = allocated(LegacyParser(path).parse_input_file)
+        legacy_steps = len(legacy[2])
+        del legacy
+        slotted_bytes, parsed = allocated(lambda: parse_descriptor(path))
+        slotted_steps = len(parsed[2])
+        del parsed
+
+    numbers = list(range(1, 10))
+    dict_bytes, grids = allocated(lambda: [dict_grid(9, numbers) for _ in range(args.grids)])
+    del grids
+    state_bytes, grids = allocated(lambda: [GridState(9, numbers) for _ in range(args.grids)])
+    del grids
+
+    print(f"{'layout':<24} {'bytes/step':>11}")
+    print(f"{'dict steps':<24} {legacy_bytes / legacy_steps:>11.0f}")
+    print(f"{'slotted steps':<24} {slotted_bytes / slotted_steps:>11.0f}")
+    print(f"{'layout':<24} {'bytes/grid':>11}  (9x9)")
+    print(f"{'dict of lists':<24} {dict_bytes / args.grids:>11.0f}")
+    print(f"{'GridState arrays':<24} {state_bytes / args.grids:>11.0f}")
+    print("(bytes/step include the log line kept as each step's description)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Compare kenken_parser against the original KenKenGenerator.parse_input_file.
+
+Usage: python benchmarks/bench_parser.py [n_lines ...]   (default: 100000 1000000)
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+
+from synthetic import write_synthetic_descriptor
+
+from kenken_parser import parse_descriptor
+
+
+class LegacyParser:
+    """The parse_input_file method as it was before kenken_parser, minus Manim."""
+
+    def __init__(self, input_file):
+        self.input_file = input_file
+
+    def parse_input_file(self):
+        with open(self.input_file, 'r') as f:
+            content = f.read().strip()
+        parts = content.split("Hello! Starting KenKen solver.")
+        if len(parts) != 2:
+            raise ValueError("Invalid file format - missing solver log")
+        puzzle_part = parts[0].strip()
+        solution_part = parts[1].strip()
+
+        puzzle_info = {}
+        cages = []
+        for line in puzzle_part.split('\n'):
+            line = line.strip()
+            if not line or line.startswith('Puzzle'):
+                continue
+            if line.startswith('size:'):
+                puzzle_info['size'] = int(line.split(':')[1].strip())
+            elif line.startswith('allowed_numbers:'):
+                numbers_str = line.split(':')[1].strip()
+                puzzle_info['allowed_numbers'] = [int(x) for x in numbers_str.split()]
+            elif line.startswith('hint,cells,anchor'):
+                continue
+            else:
+                comma_positions = [i for i, c in enumerate(line) if c == ',']
+                if len(comma_positions) < 2:
+                    continue
+                split_index = comma_positions[-2]
+                left = line[:split_index]
+                operation = left.strip().split(',', 1)[0]
+                cells_str = left.strip().split(',', 1)[1]
+                anchor_str = line[split_index + 1:].strip()
+                cells = []
+                for cell_str in cells_str.split(';'):
+                    cell_str = cell_str.strip()
+                    if cell_str.startswith('(') and cell_str.endswith(')'):
+                        coords = cell_str[1:-1].split(',')
+                        if len(coords) == 2:
+                            cells.append((int(coords[0]), int(coords[1])))
+                anchor = None
+                if anchor_str.startswith('(') and anchor_str.endswith(')'):
+                    coords = anchor_str[1:-1].split(',')
+                    if len(coords) == 2:
+                        anchor = (int(coords[0]), int(coords[1]))
+                if cells:
+                    cages.append({'operation': operation, 'cells': cells,
+                                  'anchor': anchor or cells[0]})
+
+        solution = {}
+        solving_steps = []
+        for line in solution_part.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('The cage covering'):
+                solving_steps.append({
+                    'type': 'cage_analysis', 'description': line,
+                    'cells': [(int(r), int(c)) for r, c in re.findall(r'\((\d+),(\d+)\)', line)]})
+            elif line.startswith('Valid combos:'):
+                if solving_steps and solving_steps[-1]['type'] == 'cage_analysis':
+                    solving_steps[-1]['combos'] = line.split('Valid combos: ')[1]
+            elif line.startswith('Perm-prune'):
+                match = re.search(r'\((\d+), (\d+)\)', line)
+                old = re.search(r'\[([0-9, ]+)\]→', line)
+                new = re.search(r'→\[([0-9, ]+)\]', line)
+                solving_steps.append({
+                    'type': 'constraint_propagation', 'description': line,
+                    'cell': (int(match.group(1)), int(match.group(2))) if match else None,
+                    'old_values': [int(x.strip()) for x in old.group(1).split(',')] if old else [],
+                    'new_values': [int(x.strip()) for x in new.group(1).split(',')] if new else []})
+            elif line.startswith('Cage-line elim:'):
+                cell = re.search(r'from \((\d+),(\d+)\)', line)
+                value = re.search(r'remove (\d+)', line)
+                solving_steps.append({
+                    'type': 'cage_line_elimination', 'description': line,
+                    'cell': (int(cell.group(1)), int(cell.group(2))) if cell else None,
+                    'value_removed': int(value.group(1)) if value else None})
+            elif line.startswith('Cage-single-combo:') or line.startswith('Naked single:'):
+                match = re.search(r'Cell \((\d+),(\d+)\) = (\d+)', line)
+                if match:
+                    solving_steps.append({
+                        'type': 'assignment', 'description': line,
+                        'cell': (int(match.group(1)), int(match.group(2))),
+                        'value': int(match.group(3))})
+            elif line.startswith('Peer elim:'):
+                match = re.search(r'remove (\d+) from \((\d+), (\d+)\)', line)
+                if match:
+                    solving_steps.append({
+                        'type': 'cage_line_elimination', 'description': line,
+                        'cell': (int(match.group(2)), int(match.group(3))),
+                        'value_removed': int(match.group(1))})
+            elif line.startswith('Updated combos for'):
+                combos_str = line.split(': ')[1].strip()
+                if solving_steps and solving_steps[-1]['type'] == 'cage_analysis':
+                    solving_steps[-1]['combos'] = combos_str
+            elif line.startswith('Solution:'):
+                solution_str = line.split('Solution:')[1].strip()[1:-1]
+                pattern = r'\(\s*(\d+)\s*,\s*(\d+)\s*\):\s*(\d+)'
+                solution = {(int(r), int(c)): int(v) for r, c, v in re.findall(pattern, solution_str)}
+        return {'info': puzzle_info, 'cages': cages}, solution, solving_steps
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print(f"{'lines':>10} {'legacy lines/s':>16} {'parser lines/s':>16} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_lines in sizes:
+            path = write_synthetic_descriptor(os.path.join(tmp, f"log_{n_lines}.txt"), n_lines)
+            legacy_time, legacy = timed(LegacyParser(path).parse_input_file)
+            new_time, new = timed(lambda: parse_descriptor(path))
+            # The new parser also records 'Updated combos' lines as steps
+            new_steps = [s for s in new[2] if s.type != 'combo_update']
+            assert len(new_steps) == len(legacy[2]), "step counts differ"
+            assert new[1] == legacy[1], "solutions differ"
+            print(f"{n_lines:>10} {n_lines / legacy_time:>16,.0f} "
+                  f"{n_lines / new_time:>16,.0f} {legacy_time / new_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Cage lookups per second through PeerIndex, against scanning the cages.
+
+Parses generated solver logs, then resolves the cage of every cage analysis
+and combo update by re-reading its cells and scanning the cage list (what a
+step had to do before the index) and through PeerIndex.cage_for, and checks
+both agree.
+Usage: python benchmarks/bench_peers.py [--size 9] [--count 50]
+"""
+import argparse
+import random
+import time
+
+import synthetic  # noqa: F401  (puts the repository on sys.path)
+
+from kenken_parser import (BANNER, CAGE_ANALYSIS, CELL_PATTERN, COMBO_UPDATE, format_puzzle,
+                           format_solution_line, parse_lines)
+from kenken_peers import PeerIndex
+from kenken_puzzle_generator import generate_puzzle
+
+
+def scan_cage(puzzle_data, step):
+    text = step.description if step.type == CAGE_ANALYSIS else step.cage_description
+    cells = {(int(r), int(c)) for r, c in CELL_PATTERN.findall(text)}
+    for cage_id, cage in enumerate(puzzle_data['cages']):
+        if set(cage['cells']) == cells:
+            return cage_id
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=9)
+    parser.add_argument("--count", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(args.size)
+    logs = []
+    for _ in range(args.count):
+        puzzle_data, log, solution, _ = generate_puzzle(args.size, rng)
+        lines = format_puzzle(puzzle_data) + [BANNER] + log + [format_solution_line(solution)]
+        puzzle_data, _, steps = parse_lines(lines)
+        logs.append((puzzle_data, [step for step in steps
+                                   if step.type in (CAGE_ANALYSIS, COMBO_UPDATE)]))
+    lookups = sum(len(steps) for _, steps in logs)
+
+    start = time.perf_counter()
+    scanned = [[scan_cage(puzzle_data, step) for step in steps] for puzzle_data, steps in logs]
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexes = [PeerIndex(puzzle_data) for puzzle_data, _ in logs]
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    indexed = [[index.cage_for(step) for step in steps]
+               for index, (_, steps) in zip(indexes, logs)]
+    index_time = time.perf_counter() - start
+    assert indexed == scanned, "index and scan disagree"
+
+    print(f"{args.count} {args.size}x{args.size} logs, {lookups} cage lookups")
+    print(f"{'method':>10} {'seconds':>8} {'lookups/s':>11}")
+    print(f"{'scan':>10} {scan_time:>8.4f} {lookups / scan_time:>11.0f}")
+    print(f"{'index':>10} {index_time:>8.4f} {lookups / index_time:>11.0f}"
+          f"   (+{build_time * 1000 / args.count:.2f} ms per puzzle to build)")
+
+
+if __name__ == "__main__":
+    main()
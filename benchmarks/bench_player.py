@@ -0,0 +1,63 @@
+"""Milliseconds per HTML player export, with every beat's state checked.
+
+Writes solver logs for generated puzzles, exports a player page for each
+(kenken_player.export_player), then reads the data back out of every page
+and checks the grid it shows after each beat index (shown_at, the rule the
+page's script applies) against kenken_snapshot.grid_states at the same
+step count.
+Usage: python benchmarks/bench_player.py [--size 9] [--count 100]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import synthetic  # noqa: F401  (puts the repository on sys.path)
+
+from kenken_parser import parse_descriptor
+from kenken_player import export_player, load_player_data, shown_at
+from kenken_puzzle_generator import generate_puzzle
+from kenken_snapshot import grid_states
+from kenken_solver import write_descriptor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=9)
+    parser.add_argument("--count", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = random.Random(args.size)
+        paths = []
+        for i in range(args.count):
+            puzzle_data, log, solution, _ = generate_puzzle(args.size, rng)
+            path = os.path.join(tmp, f"{i:06d}.txt")
+            write_descriptor(puzzle_data, log, solution, path)
+            paths.append(path)
+
+        start = time.perf_counter()
+        pages = [export_player(path, path[:-4] + ".html") for path in paths]
+        elapsed = time.perf_counter() - start
+        page_bytes = sum(os.path.getsize(page) for page in pages)
+
+        checked = 0
+        for path, page in zip(paths, pages):
+            puzzle_data, _, steps = parse_descriptor(path)
+            info = puzzle_data['info']
+            data = load_player_data(page)
+            counts = [0] + [beat['steps'] for beat in data['beats']]
+            states = dict(grid_states(steps, info['size'], info['allowed_numbers'], counts))
+            for index, count in enumerate(counts):
+                assert shown_at(data, index) == states[count], f"{page}: beat {index} differs"
+                checked += 1
+
+    print(f"{args.count} {args.size}x{args.size} players in {elapsed:.2f}s: "
+          f"{elapsed * 1000 / args.count:.1f} ms and {page_bytes / args.count / 1024:.0f} KiB "
+          f"per page")
+    print(f"{checked} beat states match the snapshot replay")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Descriptors per second checked by the headless replay engine.
+
+Usage: python benchmarks/bench_replay.py [--size 9] [--count 200] [--workers N]
+(parse and replay are timed separately in-process, then the whole check
+across a process pool)
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import synthetic  # noqa: F401  (puts the repository on sys.path)
+
+from kenken_parser import parse_descriptor
+from kenken_puzzle_generator import generate_puzzle
+from kenken_replay import check_descriptors, replay
+from kenken_solver import write_descriptor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=9)
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--workers", "-j", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = random.Random(args.size)
+        paths = []
+        for i in range(args.count):
+            puzzle_data, log, solution, _ = generate_puzzle(args.size, rng)
+            path = os.path.join(tmp, f"{i:06d}.txt")
+            write_descriptor(puzzle_data, log, solution, path)
+            paths.append(path)
+
+        start = time.perf_counter()
+        parsed = [parse_descriptor(path) for path in paths]
+        parse_time = time.perf_counter() - start
+        steps = sum(len(item[2]) for item in parsed)
+
+        start = time.perf_counter()
+        for puzzle_data, solution, log_steps in parsed:
+            _, issues = replay(puzzle_data, solution, log_steps)
+            assert not issues, issues
+        replay_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        failed = sum(1 for _, issues in check_descriptors(paths, args.workers) if issues)
+        pool_time = time.perf_counter() - start
+        assert failed == 0
+
+    print(f"{args.count} descriptors of {args.size}x{args.size}, {steps} steps")
+    print(f"{'stage':>8} {'seconds':>8} {'descr/s':>9} {'steps/s':>10}")
+    for stage, seconds in (("parse", parse_time), ("replay", replay_time),
+                           ("pool", pool_time)):
+        print(f"{stage:>8} {seconds:>8.3f} {args.count / seconds:>9.0f} {steps / seconds:>10.0f}")
+    print(f"Pool workers: {args.workers or os.cpu_count()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Segments a one-line log edit invalidates in the segment render cache.
+
+Plans the segments of generated puzzles' logs (no Manim needed), then makes
+one-line edits and counts how many segment keys change: rewording a line
+(the beat is redrawn, the grid after it is not) and dropping a peer
+elimination (the grid and step numbers after it shift).
+Usage: python benchmarks/bench_segments.py [--size 8] [--count 20] [--segment-size 20]
+"""
+import argparse
+import random
+import time
+
+import synthetic  # noqa: F401  (puts the repository on sys.path)
+
+from kenken_parser import BANNER, format_puzzle, format_solution_line, parse_lines
+from kenken_puzzle_generator import generate_puzzle
+from kenken_segments import plan_segments
+
+SALT = b"bench"
+
+
+def keys(lines, segment_size):
+    puzzle_data, _, steps = parse_lines(lines)
+    return [segment.key for segment in plan_segments(puzzle_data, steps, SALT, segment_size)]
+
+
+def changed(before, after):
+    """Segments of after that are not cached from before."""
+    cached = set(before)
+    return sum(1 for key in after if key not in cached)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=8)
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--segment-size", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(args.size)
+    totals = {"segments": 0, "reworded": 0, "dropped": 0}
+    plan_time = 0.0
+    steps = 0
+    for _ in range(args.count):
+        puzzle_data, log, solution, _ = generate_puzzle(args.size, rng)
+        lines = format_puzzle(puzzle_data) + [BANNER] + log + [format_solution_line(solution)]
+        start = time.perf_counter()
+        base = keys(lines, args.segment_size)
+        plan_time += time.perf_counter() - start
+        steps += len(log)
+        totals["segments"] += len(base)
+
+        first = len(format_puzzle(puzzle_data)) + 1
+        singles = [i for i in range(first, len(lines)) if lines[i].startswith("Naked single:")]
+        reworded = list(lines)
+        i = rng.choice(singles)
+        reworded[i] = reworded[i] + " (only candidate left)"
+        totals["reworded"] += changed(base, keys(reworded, args.segment_size))
+
+        peers = [i for i in range(first, len(lines)) if lines[i].startswith("Peer elim:")]
+        dropped = list(lines)
+        del dropped[rng.choice(peers)]
+        totals["dropped"] += changed(base, keys(dropped, args.segment_size))
+
+    print(f"{args.count} {args.size}x{args.size} logs, {steps} log lines, "
+          f"{totals['segments']} segments of {args.segment_size} beats")
+    print(f"planning: {plan_time / args.count * 1000:.1f} ms per log")
+    for edit in ("reworded", "dropped"):
+        print(f"{edit:>9} line: {totals[edit] / args.count:.1f} segments re-rendered per edit "
+              f"({totals[edit] / totals['segments']:.1%} of the video)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Load test of the job server: latency percentiles and jobs per second.
+
+Starts kenken_server.py on a free port (or uses --url), then has --clients
+concurrent clients, each on one keep-alive connection, submit generated
+puzzles, back off on 429 as told by Retry-After (scaled by --backoff) and
+poll each job until it finishes. Latency is from the first submit to the
+poll that sees the job finished; the server's own submitted-to-finished
+time is reported beside it.
+Usage: python benchmarks/bench_server.py [--jobs 400] [--clients 32] [--workers 4]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+import synthetic  # noqa: F401  (puts the repository on sys.path)
+
+from kenken_parser import format_puzzle
+from kenken_puzzle_generator import generate_puzzle
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "kenken_server.py")
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection, reopened when the server closes it."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        """(status, headers, payload) of one request."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = b'' if body is None else json.dumps(body).encode()
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\n"
+                          f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        payload = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, headers, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def run_client(client, jobs, results, args):
+    while jobs:
+        text = jobs.pop()
+        start = time.perf_counter()
+        rejected = 0
+        while True:
+            status, headers, payload = await client.request(
+                'POST', '/jobs', {'descriptor': text, 'search': args.search})
+            if status != 429:
+                break
+            rejected += 1
+            await asyncio.sleep(float(headers.get('retry-after', 1)) * args.backoff)
+        if status != 202:
+            results.append({'status': f"HTTP {status}", 'rejected': rejected})
+            continue
+        job_id = json.loads(payload)['id']
+        while True:
+            await asyncio.sleep(args.poll)
+            _, _, payload = await client.request('GET', f'/jobs/{job_id}')
+            job = json.loads(payload)
+            if job['status'] in ('done', 'failed'):
+                break
+        results.append({
+            'status': job['status'],
+            'rejected': rejected,
+            'latency': time.perf_counter() - start,
+            'server_latency': job['finished'] - job['submitted'],
+        })
+
+
+async def load(host, port, texts, args):
+    jobs = [texts[i % len(texts)] for i in range(args.jobs)]
+    jobs.reverse()
+    results = []
+    clients = [Client(host, port) for _ in range(args.clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(client, jobs, results, args) for client in clients))
+    wall = time.perf_counter() - start
+    stats = json.loads((await clients[0].request('GET', '/stats'))[2])
+    for client in clients:
+        client.close()
+    return results, wall, stats
+
+
+async def start_server(args):
+    command = [sys.executable, SERVER_SCRIPT, "--port", "0", "--queue-size", str(args.queue_size)]
+    if args.workers:
+        command += ["--workers", str(args.workers)]
+    process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE)
+    line = (await process.stdout.readline()).decode()
+    if not line.startswith("Listening on "):
+        raise RuntimeError(f"server did not start: {line!r}")
+    address = urlsplit(line.split()[2])
+    return process, address.hostname, address.port
+
+
+async def main_async(args, texts):
+    process = None
+    if args.url:
+        address = urlsplit(args.url)
+        host, port = address.hostname, address.port
+    else:
+        process, host, port = await start_server(args)
+    try:
+        return await load(host, port, texts, args)
+    finally:
+        if process:
+            process.terminate()
+            await process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Load an already running server instead of starting one")
+    parser.add_argument("--jobs", type=int, default=400)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--puzzles", type=int, default=100, help="Distinct puzzles submitted")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[6, 7, 8, 9])
+    parser.add_argument("--search", action="store_true")
+    parser.add_argument("--workers", type=int, help="Solve workers of the started server")
+    parser.add_argument("--queue-size", type=int, default=64,
+                        help="Solve queue of the started server")
+    parser.add_argument("--poll", type=float, default=0.005, help="Seconds between polls")
+    parser.add_argument("--backoff", type=float, default=0.05,
+                        help="Fraction of Retry-After waited after a 429")
+    args = parser.parse_args()
+
+    rng = random.Random(25)
+    texts = []
+    for _ in range(args.puzzles):
+        puzzle_data = generate_puzzle(rng.choice(args.sizes), rng)[0]
+        texts.append("\n".join(format_puzzle(puzzle_data)) + "\n")
+
+    results, wall, stats = asyncio.run(main_async(args, texts))
+    finished = [result for result in results if 'latency' in result]
+    failed = [result for result in results if result['status'] != 'done']
+    rejected = sum(result['rejected'] for result in results)
+    print(f"{len(results)} jobs from {args.clients} clients in {wall:.2f}s: "
+          f"{len(finished) / wall:.1f} jobs/s, {len(failed)} failed, {rejected} submits got 429")
+    if finished:
+        print(f"{'latency (ms)':>14} {'p50':>8} {'p99':>8} {'max':>8}")
+        for name, key in (("client", 'latency'), ("server", 'server_latency')):
+            values = [result[key] * 1000 for result in finished]
+            print(f"{name:>14} {percentile(values, 50):>8.1f} {percentile(values, 99):>8.1f} "
+                  f"{max(values):>8.1f}")
+    print(f"server: {stats['solve_workers']} solve workers, totals {stats['totals']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Static snapshots per second, against Manim-free parsing alone.
+
+Writes solver logs for generated puzzles, then times snapshot_descriptors
+in-process drawing the empty puzzle, the grid halfway through and the final
+grid of each. PNG is timed only when pycairo is installed.
+Usage: python benchmarks/bench_snapshot.py [--size 9] [--count 200]
+"""
+import argparse
+import importlib.util
+import os
+import random
+import tempfile
+import time
+
+import synthetic  # noqa: F401  (puts the repository on sys.path)
+
+from kenken_parser import parse_descriptor
+from kenken_puzzle_generator import generate_puzzle
+from kenken_snapshot import snapshot_descriptors
+from kenken_solver import write_descriptor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=9)
+    parser.add_argument("--count", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = random.Random(args.size)
+        paths = []
+        for i in range(args.count):
+            puzzle_data, log, solution, _ = generate_puzzle(args.size, rng)
+            path = os.path.join(tmp, f"{i:06d}.txt")
+            write_descriptor(puzzle_data, log, solution, path)
+            paths.append(path)
+        half = len(log) // 2
+
+        start = time.perf_counter()
+        for path in paths:
+            parse_descriptor(path)
+        parse_time = time.perf_counter() - start
+        print(f"{'mode':>12} {'images':>7} {'seconds':>8} {'images/s':>9}")
+        print(f"{'parse only':>12} {'-':>7} {parse_time:>8.2f} {'-':>9}")
+
+        formats = ["svg"]
+        if importlib.util.find_spec("cairo"):
+            formats.append("png")
+        for fmt in formats:
+            output_dir = os.path.join(tmp, fmt)
+            os.makedirs(output_dir)
+            start = time.perf_counter()
+            written = 0
+            for _, images, error in snapshot_descriptors(paths, output_dir, workers=1,
+                                                         indices=[0, half, None], fmt=fmt):
+                assert error is None, error
+                written += len(images)
+            elapsed = time.perf_counter() - start
+            print(f"{fmt:>12} {written:>7} {elapsed:>8.2f} {written / elapsed:>9.0f}")
+        if len(formats) == 1:
+            print("(pycairo not installed: PNG not timed)")
+
+
+if __name__ == "__main__":
+    main()
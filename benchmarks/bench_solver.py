@@ -0,0 +1,39 @@
+"""Solve times of kenken_solver across puzzle sizes.
+
+Usage: python benchmarks/bench_solver.py [puzzles_per_size]   (default: 50)
+"""
+import statistics
+import sys
+import time
+
+from synthetic import synthetic_puzzle
+
+from kenken_solver import KenKenSolver
+
+
+def time_solves(puzzles, with_log):
+    times = []
+    solved = 0
+    for puzzle_data in puzzles:
+        log = []
+        start = time.perf_counter()
+        solution = KenKenSolver(puzzle_data, emit=log.append if with_log else None).solve()
+        times.append(time.perf_counter() - start)
+        solved += solution is not None
+    return times, solved
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{'size':>4} {'log':>4} {'solved':>7} {'mean ms':>8} {'median ms':>10} {'max ms':>8}")
+    for size in range(4, 10):
+        puzzles = [synthetic_puzzle(size, seed)[0] for seed in range(count)]
+        for with_log in (False, True):
+            times, solved = time_solves(puzzles, with_log)
+            print(f"{size:>4} {'yes' if with_log else 'no':>4} {solved:>3}/{count:<3} "
+                  f"{statistics.mean(times) * 1000:>8.2f} "
+                  f"{statistics.median(times) * 1000:>10.2f} {max(times) * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Peak memory and time-to-first-step of DescriptorStream vs parse_descriptor.
+
+Usage: python benchmarks/bench_streaming.py [n_lines ...]   (default: 100000 1000000)
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from synthetic import write_synthetic_descriptor
+
+from kenken_parser import DescriptorStream, parse_descriptor
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, first
+
+
+def materialized(path):
+    def run():
+        start = time.perf_counter()
+        _, _, steps = parse_descriptor(path)
+        first = time.perf_counter() - start
+        for _ in steps:
+            pass
+        return first
+    return run
+
+
+def streamed(path):
+    def run():
+        start = time.perf_counter()
+        stream = DescriptorStream(path)
+        stream.solution
+        first = None
+        for _ in stream:
+            if first is None:
+                first = time.perf_counter() - start
+        return first
+    return run
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print(f"{'lines':>10} {'mode':>12} {'total s':>9} {'first step ms':>14} {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_lines in sizes:
+            path = write_synthetic_descriptor(os.path.join(tmp, f"log_{n_lines}.txt"), n_lines)
+            for mode, run in (("materialized", materialized(path)), ("streamed", streamed(path))):
+                elapsed, peak, first = measure(run)
+                print(f"{n_lines:>10} {mode:>12} {elapsed:>9.2f} "
+                      f"{first * 1000:>14.2f} {peak / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Render time of an 8x8 solving log with and without the MyText cache.
+
+Needs Manim. Usage: python benchmarks/bench_text_cache.py [descriptor]
+(default: a generated 8x8 puzzle)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import synthetic  # noqa: F401  (puts the repository on sys.path)
+
+from kenken_puzzle_generator import generate_puzzle
+from kenken_solver import write_descriptor
+
+
+def render(descriptor, media_dir, text_cache_size):
+    from manim import tempconfig
+    from kenken_scene import KenKenGenerator
+
+    settings = {
+        "quality": "low_quality",
+        "media_dir": media_dir,
+        "output_file": f"cache_{text_cache_size}",
+        "disable_caching": True,
+        "verbosity": "ERROR",
+        "progress_bar": "none",
+    }
+    with tempconfig(settings):
+        scene = KenKenGenerator(input_file=descriptor, text_cache_size=text_cache_size)
+        start = time.perf_counter()
+        scene.render()
+        return time.perf_counter() - start, scene.text_cache
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 1:
+            descriptor = sys.argv[1]
+        else:
+            puzzle_data, log, solution, _ = generate_puzzle(8, random.Random(8))
+            descriptor = os.path.join(tmp, "8x8.txt")
+            write_descriptor(puzzle_data, log, solution, descriptor)
+
+        print(f"{'text cache':>12} {'render s':>9} {'hit rate':>9}")
+        baseline = None
+        for size in (0, 512):
+            elapsed, cache = render(descriptor, tmp, size)
+            baseline = baseline or elapsed
+            print(f"{size:>12} {elapsed:>9.1f} {cache.hit_rate():>9.1%}  "
+                  f"({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
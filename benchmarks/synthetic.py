@@ -0,0 +1,179 @@
+"""Synthetic descriptor logs for the benchmarks in this directory."""
+import os
+import random
+import re
+import sys
+
+# Make the top-level kenken_* modules importable when run as a script
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Cells of a log line, for to_one_based
+COORD = re.compile(r'\((\d+),(\d+)\)')
+
+HEADER = """Puzzle 1:
+size: {size}
+allowed_numbers: {numbers}
+hint,cells,anchor
+{cages}
+Hello! Starting KenKen solver.
+"""
+
+
+def synthetic_header(size):
+    """Puzzle definition with one 2-cell cage per pair of columns."""
+    cages = []
+    for row in range(size):
+        for col in range(0, size - 1, 2):
+            cages.append(f"{row + col + 3}+,({row},{col});({row},{col + 1}),({row},{col})")
+        if size % 2:
+            cages.append(f"{row + 1},({row},{size - 1}),({row},{size - 1})")
+    numbers = " ".join(str(n) for n in range(1, size + 1))
+    return HEADER.format(size=size, numbers=numbers, cages="\n".join(cages))
+
+
+def synthetic_log_lines(n_lines, size=9, seed=0):
+    """Yield n_lines solver log lines cycling through every step type."""
+    rng = random.Random(seed)
+    numbers = list(range(1, size + 1))
+    for i in range(n_lines):
+        r, c = rng.randrange(size), rng.randrange(size)
+        v = rng.choice(numbers)
+        cage = f"'The cage covering ({r},{c}), ({r},{(c + 1) % size}) must have a sum of {v + 3}.'"
+        kind = i % 8
+        if kind == 0:
+            yield f"The cage covering ({r},{c}), ({r},{(c + 1) % size}) must have a sum of {v + 3}."
+        elif kind == 1:
+            yield f"Valid combos: [(1, {v + 2}), (2, {v + 1})]"
+        elif kind == 2:
+            old = sorted(rng.sample(numbers, 4))
+            yield f"Perm-prune in {cage}: ({r}, {c}) {old}→{old[:2]}"
+        elif kind == 3:
+            yield f"Cage-line elim: remove {v} from ({r},{c}) by row in {cage}"
+        elif kind == 4:
+            yield f"Updated combos for {cage}: [(1, {v + 2})]"
+        elif kind == 5:
+            yield f"Peer elim: remove {v} from ({r}, {c})"
+        elif kind == 6:
+            yield f"Naked single: Cell ({r},{c}) = {v}"
+        else:
+            yield f"Cage-single-combo: Cell ({r},{c}) = {v}"
+
+
+def to_one_based(line):
+    """Inverse of kenken_coordinate_fixer.fix_line: a 0-based log line in the
+    1-based form the fixer (and kenken_parser indexing=1) undoes."""
+    from kenken_coordinate_fixer import CONVERT_PREFIXES, PERM_PRUNE_PREFIX
+
+    def shift_up(text):
+        return COORD.sub(lambda m: f"({int(m.group(1)) + 1},{int(m.group(2)) + 1})", text)
+
+    if line.startswith(CONVERT_PREFIXES):
+        return shift_up(line)
+    if line.startswith(PERM_PRUNE_PREFIX):
+        before_colon, colon, after_colon = line.partition(':')
+        return shift_up(before_colon) + colon + after_colon
+    return line
+
+
+def descriptor_lines(puzzle_data, log, solution):
+    """The lines kenken_solver.write_descriptor writes, without the file."""
+    from kenken_parser import BANNER, format_puzzle, format_solution_line
+
+    lines = format_puzzle(puzzle_data) + [BANNER] + list(log)
+    if solution:
+        lines.append(format_solution_line(solution))
+    return lines
+
+
+def synthetic_solution(size):
+    entries = ", ".join(
+        f"({r}, {c}): {(r + c) % size + 1}" for r in range(size) for c in range(size))
+    return f"Solution: {{{entries}}}\n"
+
+
+def write_synthetic_descriptor(path, n_lines, size=9, seed=0):
+    """Write a synthetic descriptor with n_lines of solver log to path."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(synthetic_header(size))
+        for line in synthetic_log_lines(n_lines, size, seed):
+            f.write(line)
+            f.write("\n")
+        f.write(synthetic_solution(size))
+    return path
+
+
+def synthetic_puzzle(size, seed=0, max_cage=3):
+    """Random puzzle_data from a shuffled cyclic Latin square.
+
+    Returns (puzzle_data, solution). The puzzle is not checked for uniqueness.
+    """
+    rng = random.Random(seed)
+    rows, cols, symbols = list(range(size)), list(range(size)), list(range(1, size + 1))
+    rng.shuffle(rows)
+    rng.shuffle(cols)
+    rng.shuffle(symbols)
+    grid = {(r, c): symbols[(rows[r] + cols[c]) % size] for r in range(size) for c in range(size)}
+
+    unassigned = set(grid)
+    order = sorted(grid)
+    rng.shuffle(order)
+    cages = []
+    for start in order:
+        if start not in unassigned:
+            continue
+        cells = [start]
+        unassigned.discard(start)
+        target_size = rng.choice([1] + [2] * 4 + [3] * 3 + list(range(4, max_cage + 1)))
+        while len(cells) < min(target_size, max_cage):
+            frontier = [
+                (r + dr, c + dc) for r, c in cells for dr, dc in ((0, 1), (1, 0), (0, -1), (-1, 0))
+                if (r + dr, c + dc) in unassigned
+            ]
+            if not frontier:
+                break
+            cell = rng.choice(frontier)
+            unassigned.discard(cell)
+            cells.append(cell)
+        values = [grid[cell] for cell in cells]
+        if len(cells) == 1:
+            hint = str(values[0])
+        elif len(cells) == 2 and max(values) % min(values) == 0 and rng.random() < 0.5:
+            hint = f"{max(values) // min(values)}/"
+        elif len(cells) == 2 and rng.random() < 0.5:
+            hint = f"{max(values) - min(values)}-"
+        elif rng.random() < 0.5:
+            product = 1
+            for value in values:
+                product *= value
+            hint = f"{product}x"
+        else:
+            hint = f"{sum(values)}+"
+        cells.sort()
+        cages.append({'operation': hint, 'cells': cells, 'anchor': cells[0]})
+
+    puzzle_data = {
+        'info': {'size': size, 'allowed_numbers': list(range(1, size + 1))},
+        'cages': cages,
+    }
+    return puzzle_data, grid
+
+
+def shuffled_copy(puzzle_data, rng, symmetry=None):
+    """puzzle_data turned by a symmetry of the square (an index into
+    kenken_fingerprint.SYMMETRIES, random by default), with its cages and
+    their cells shuffled."""
+    from kenken_fingerprint import SYMMETRIES, transform_cell
+
+    size = puzzle_data['info']['size']
+    if symmetry is None:
+        symmetry = rng.randrange(len(SYMMETRIES))
+    cages = [{
+        'operation': cage['operation'],
+        'cells': [transform_cell(cell, size, symmetry)
+                  for cell in rng.sample(cage['cells'], len(cage['cells']))],
+        'anchor': None if cage['anchor'] is None else transform_cell(cage['anchor'], size, symmetry),
+    } for cage in puzzle_data['cages']]
+    rng.shuffle(cages)
+    return {'info': dict(puzzle_data['info']), 'cages': cages}
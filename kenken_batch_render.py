@@ -0,0 +1,367 @@
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from kenken_replay import check_descriptor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+GENERATOR_SCRIPT = os.path.join(ROOT, "kenken_generator.py")
+# Modules whose changes can change a rendered video: the generator, the
+# scene and everything it imports to read, lay out and pace a log
+RENDER_SOURCES = tuple(os.path.join(ROOT, name) for name in (
+    "kenken_generator.py", "kenken_scene.py", "kenken_segments.py", "kenken_pacing.py",
+    "kenken_parser.py", "kenken_coalesce.py", "kenken_layout.py", "kenken_peers.py",
+    "kenken_compiled.py", "kenken_corpus.py", "kenken_state.py", "kenken_solver.py"))
+VIDEO_EXTENSION = ".mp4"
+# Beside each video, the options it was rendered with (see is_up_to_date)
+OPTIONS_EXTENSION = ".render.json"
+# Lines of a failed job's output kept in the report
+ERROR_TAIL_LINES = 20
+
+
+def find_descriptors(inputs):
+    """Expand directories (to their *.txt files) and glob patterns into sorted paths."""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.update(glob.glob(os.path.join(item, "*.txt")))
+        else:
+            paths.update(path for path in glob.glob(item) if os.path.isfile(path))
+    return sorted(os.path.abspath(path) for path in paths)
+
+
+def output_name(descriptor):
+    return os.path.splitext(os.path.basename(descriptor))[0]
+
+
+def output_path(descriptor, output_dir):
+    return os.path.join(output_dir, output_name(descriptor) + VIDEO_EXTENSION)
+
+
+def options_path(output):
+    return os.path.splitext(output)[0] + OPTIONS_EXTENSION
+
+
+def render_options(quality, coalesce=False, target_duration=None, show_cage_analysis=False):
+    """The options that change what a video looks like, as stored beside it."""
+    return {'quality': quality, 'coalesce': bool(coalesce),
+            'target_duration': target_duration or None,
+            'show_cage_analysis': bool(show_cage_analysis)}
+
+
+def read_options(output):
+    try:
+        with open(options_path(output), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_options(output, options):
+    path = options_path(output)
+    tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(options, f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def is_up_to_date(descriptor, output, options=None):
+    """An output is current if it is newer than its descriptor and every
+    RENDER_SOURCES module and, given options (see render_options), was
+    rendered with them."""
+    if not os.path.exists(output):
+        return False
+    if options is not None and read_options(output) != options:
+        return False
+    sources = (descriptor,) + RENDER_SOURCES
+    return os.path.getmtime(output) >= max(os.path.getmtime(path) for path in sources)
+
+
+def render_key(descriptor, quality, coalesce=False, target_duration=None, show_cage_analysis=False):
+    """Result cache key of a descriptor's video (see kenken_cache).
+
+    Unlike solver logs, videos are keyed by the descriptor's exact content:
+    cage colours follow cage order and the frames follow the log, so only
+    true copies of a descriptor share a video.
+    """
+    from kenken_cache import cache_key, sources_digest
+
+    options = render_options(quality, coalesce, target_duration, show_cage_analysis)
+    return cache_key('video', sources_digest((descriptor,)), sorted(options.items()),
+                     sources_digest(RENDER_SOURCES))
+
+
+def check_output_names(descriptors):
+    """Raise ValueError if two descriptors would render to the same video
+    (same file name in different directories)."""
+    seen = {}
+    for descriptor in descriptors:
+        name = output_name(descriptor)
+        if name in seen:
+            raise ValueError(f"{seen[name]} and {descriptor} would both render to {name}"
+                             f"{VIDEO_EXTENSION}; rename one or render them separately")
+        seen[name] = descriptor
+
+
+def render_command(descriptor, output_dir, quality, coalesce=False, compiled=False,
+                   segment_cache=None, target_duration=None, show_cage_analysis=False):
+    command = [
+        sys.executable, GENERATOR_SCRIPT, descriptor,
+        "--output", output_name(descriptor),
+        "--output-dir", output_dir,
+        "--quality", quality,
+    ]
+    if coalesce:
+        command.append("--coalesce")
+    if compiled:
+        command.append("--compiled")
+    if segment_cache:
+        command.extend(["--segment-cache", segment_cache])
+    if target_duration:
+        command.extend(["--target-duration", str(target_duration)])
+    if show_cage_analysis:
+        command.append("--show-cage-analysis")
+    return command
+
+
+def render_job(descriptor, output_dir, quality, resume=True, timeout=None, coalesce=False,
+               check=False, compiled=False, segment_cache=None, target_duration=None,
+               show_cage_analysis=False):
+    """Render one descriptor in its own process and describe the outcome.
+
+    Failures (including the renderer's sys.exit on a bad descriptor) are
+    recorded in the result instead of being raised. With check, the solver
+    log is replayed first (see kenken_replay) and inconsistent logs fail
+    without being rendered. The options a video was rendered with are
+    recorded beside it, so resuming with other options renders it again.
+    """
+    output = output_path(descriptor, output_dir)
+    options = render_options(quality, coalesce, target_duration, show_cage_analysis)
+    result = {
+        'descriptor': descriptor,
+        'output': output,
+        'status': 'skipped',
+        'seconds': 0.0,
+        'returncode': None,
+        'error': None,
+    }
+    if resume and is_up_to_date(descriptor, output, options):
+        return result
+
+    start = time.perf_counter()
+    if check:
+        _, issues = check_descriptor(descriptor, compiled)
+        if issues:
+            result['status'] = 'failed'
+            result['error'] = "log check failed:\n" + "\n".join(issues)
+            result['seconds'] = time.perf_counter() - start
+            return result
+    try:
+        completed = subprocess.run(
+            render_command(descriptor, output_dir, quality, coalesce, compiled, segment_cache,
+                           target_duration, show_cage_analysis),
+            cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, timeout=timeout)
+        result['returncode'] = completed.returncode
+        if completed.returncode == 0 and os.path.exists(output):
+            result['status'] = 'rendered'
+            write_options(output, options)
+        else:
+            result['status'] = 'failed'
+            tail = completed.stdout.strip().splitlines()[-ERROR_TAIL_LINES:]
+            result['error'] = "\n".join(tail) or f"exit code {completed.returncode}"
+    except subprocess.TimeoutExpired:
+        result['status'] = 'failed'
+        result['error'] = f"timed out after {timeout}s"
+    except OSError as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def cached_render_job(descriptor, key, result_cache, output_dir, quality, resume=True,
+                      timeout=None, coalesce=False, check=False, compiled=False,
+                      segment_cache=None, target_duration=None, show_cage_analysis=False):
+    """render_job through a result cache: a cached video is copied out with
+    status 'cached', and a fresh render is stored for the next copy."""
+    from kenken_cache import copy_out
+
+    output = output_path(descriptor, output_dir)
+    options = render_options(quality, coalesce, target_duration, show_cage_analysis)
+    job_options = (timeout, coalesce, check, compiled, segment_cache, target_duration,
+                   show_cage_analysis)
+    if resume and is_up_to_date(descriptor, output, options):
+        return render_job(descriptor, output_dir, quality, resume, *job_options)
+    start = time.perf_counter()
+    cached = result_cache.get(key, 'video')
+    if cached:
+        try:
+            copy_out(cached, output)
+            write_options(output, options)
+            return {'descriptor': descriptor, 'output': output, 'status': 'cached',
+                    'seconds': time.perf_counter() - start, 'returncode': None, 'error': None}
+        except FileNotFoundError:
+            pass  # evicted since the lookup
+    result = render_job(descriptor, output_dir, quality, resume, *job_options)
+    if result['status'] == 'rendered':
+        try:
+            result_cache.put_file(key, 'video', output)
+        except OSError as e:
+            print(f"Warning: could not cache {output}: {e}")
+    return result
+
+
+def render_batch(descriptors, output_dir, workers=2, quality="low", resume=True,
+                 timeout=None, on_result=None, coalesce=False, check=False, compiled=False,
+                 segment_cache=None, target_duration=None, result_cache=None,
+                 show_cage_analysis=False):
+    """Render descriptors with at most `workers` renders running at once.
+
+    Each render is a separate process; the threads here only wait on them.
+    All renders can share one segment_cache directory (see kenken_segments),
+    or each be fitted into target_duration seconds (see kenken_pacing).
+    With a result_cache (a kenken_cache.ResultCache), copies of a descriptor
+    are rendered once: the first of each renders while the rest wait, then
+    take its video from the cache. Videos are named after their descriptors,
+    so descriptors sharing a file name raise ValueError (see
+    check_output_names). Returns the per-job results in completion order.
+    """
+    check_output_names(descriptors)
+    os.makedirs(output_dir, exist_ok=True)
+    output_dir = os.path.abspath(output_dir)
+    if segment_cache:
+        segment_cache = os.path.abspath(segment_cache)
+    options = (timeout, coalesce, check, compiled, segment_cache, target_duration,
+               show_cage_analysis)
+    if result_cache is None:
+        rounds = [[(render_job, descriptor) for descriptor in descriptors]]
+    else:
+        seen = set()
+        rounds = [[], []]
+        for descriptor in descriptors:
+            key = render_key(descriptor, quality, coalesce, target_duration, show_cage_analysis)
+            job = (cached_render_job, descriptor, key, result_cache)
+            rounds[key in seen].append(job)
+            seen.add(key)
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for jobs in rounds:
+            futures = [
+                pool.submit(*job, output_dir, quality, resume, *options)
+                for job in jobs
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_result:
+                    on_result(result)
+    return results
+
+
+def print_progress(result):
+    name = os.path.basename(result['descriptor'])
+    print(f"[{result['status']:>8}] {name} ({result['seconds']:.1f}s)")
+
+
+def print_summary(results, wall_time):
+    counts = {status: 0 for status in ('rendered', 'skipped', 'cached', 'failed')}
+    for result in results:
+        counts[result['status']] += 1
+    busy = sum(result['seconds'] for result in results)
+    print(f"Rendered: {counts['rendered']}, skipped (up to date): {counts['skipped']}, "
+          f"deduplicated (result cache): {counts['cached']}, failed: {counts['failed']}")
+    print(f"Wall time: {wall_time:.1f}s, total render time: {busy:.1f}s")
+    for result in results:
+        if result['status'] == 'failed':
+            print(f"\nFAILED {result['descriptor']}:\n{result['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render many KenKen descriptors into videos")
+    parser.add_argument("inputs", nargs='+', help="Descriptor files, directories or glob patterns")
+    parser.add_argument("--output-dir", "-o", default="output", help="Directory for the videos")
+    parser.add_argument("--workers", "-j", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Maximum number of renders running at once")
+    parser.add_argument("--quality", "-q", choices=["low", "medium", "high"], default="low",
+                        help="Video quality")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-render outputs that are already up to date")
+    parser.add_argument("--timeout", type=float, help="Seconds before a render is abandoned")
+    parser.add_argument("--coalesce", action="store_true",
+                        help="Merge runs of related steps into single animation beats")
+    parser.add_argument("--show-cage-analysis", action="store_true",
+                        help="Animate each cage analysis as a step (see kenken_generator)")
+    parser.add_argument("--check", action="store_true",
+                        help="Replay each solver log first and skip rendering inconsistent ones")
+    parser.add_argument("--compiled", action="store_true",
+                        help="Read steps from compiled .kkc files, (re)building them as needed")
+    parser.add_argument("--segment-cache", metavar="DIR",
+                        help="Render through a shared cache of per-segment videos in DIR")
+    parser.add_argument("--target-duration", type=float, metavar="SECONDS",
+                        help="Fit each video into SECONDS (see kenken_generator --target-duration)")
+    parser.add_argument("--result-cache", metavar="DIR",
+                        help="Render copies of a descriptor once, through a result cache in DIR")
+    parser.add_argument("--cache-size", metavar="SIZE",
+                        help="Evict least recently used results beyond SIZE (e.g. 2G)")
+    parser.add_argument("--report", help="Write per-job results to this JSON file")
+    args = parser.parse_args()
+    if args.target_duration and args.segment_cache:
+        parser.error("--target-duration cannot be combined with --segment-cache")
+    if args.cache_size and not args.result_cache:
+        parser.error("--cache-size needs --result-cache")
+
+    result_cache = None
+    if args.result_cache:
+        from kenken_cache import ResultCache, parse_size
+        try:
+            max_bytes = parse_size(args.cache_size) if args.cache_size else None
+        except ValueError as e:
+            parser.error(str(e))
+        result_cache = ResultCache(args.result_cache, max_bytes)
+
+    descriptors = find_descriptors(args.inputs)
+    if not descriptors:
+        print("Error: no descriptors found.")
+        sys.exit(1)
+
+    try:
+        check_output_names(descriptors)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    results = render_batch(descriptors, args.output_dir, args.workers, args.quality,
+                           resume=not args.force, timeout=args.timeout,
+                           on_result=print_progress, coalesce=args.coalesce,
+                           check=args.check, compiled=args.compiled,
+                           segment_cache=args.segment_cache,
+                           target_duration=args.target_duration,
+                           result_cache=result_cache,
+                           show_cage_analysis=args.show_cage_analysis)
+    wall_time = time.perf_counter() - start
+    print_summary(results, wall_time)
+    if result_cache:
+        print(result_cache.summary())
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'wall_time': wall_time, 'jobs': results}, f, indent=2)
+        print(f"Report written to: {args.report}")
+    if any(result['status'] == 'failed' for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
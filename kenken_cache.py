@@ -0,0 +1,284 @@
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import time
+
+from kenken_fingerprint import (canonical_form, compose, fingerprint_of_form, inverse, map_log,
+                                transform_cell)
+from kenken_parser import (BANNER, SOLUTION_PREFIX, format_puzzle, format_solution_line,
+                           parse_solution_line, read_header, read_puzzle)
+
+# On-disk content-addressed cache of solver logs and rendered videos, keyed
+# by canonical puzzle fingerprints (see kenken_fingerprint) so duplicates of
+# a puzzle - cages reordered, grid rotated or reflected - are solved and
+# rendered once. Objects live at <root>/<key[:2]>/<key><extension>; reading
+# one refreshes its mtime and the least recently used go first when the
+# cache outgrows its size bound.
+
+# Object kind -> file extension
+EXTENSIONS = {'solve': '.txt', 'video': '.mp4'}
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Modules whose changes invalidate cached solver logs
+SOLVER_SOURCES = tuple(os.path.join(ROOT, name) for name in
+                       ("kenken_solver.py", "kenken_combos.py", "kenken_dlx.py"))
+SIZE_SUFFIXES = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+
+
+def parse_size(text):
+    """Bytes in a size like '500M' or '2G' (binary units)."""
+    text = text.strip().upper()
+    if text.endswith('B'):
+        text = text[:-1]
+    number, suffix = (text[:-1], text[-1]) if text[-1:] in SIZE_SUFFIXES else (text, '')
+    try:
+        return int(float(number) * SIZE_SUFFIXES[suffix])
+    except ValueError:
+        raise ValueError(f"Invalid size '{text}'") from None
+
+
+def sources_digest(paths):
+    """Digest of the contents of source files, for cache keys."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.digest()
+
+
+def cache_key(*parts):
+    """Hex key over the parts (bytes or anything with a stable str())."""
+    digest = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def link_or_copy(source, destination):
+    """Hard link source at destination, copying when linking fails (another
+    file system, say); neither file's later replacement affects the other."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def copy_out(path, destination):
+    """Atomically put a cached object at destination."""
+    tmp_path = f"{destination}.tmp{os.getpid()}.{threading.get_ident()}"
+    link_or_copy(path, tmp_path)
+    os.replace(tmp_path, destination)
+
+
+class ResultCache:
+    """Size-bounded content-addressed object store.
+
+    Safe to share between the threads of one process; separate processes may
+    share the directory too, as objects are written atomically and keys never
+    change meaning. max_bytes of None leaves the cache unbounded.
+    """
+
+    def __init__(self, root, max_bytes=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.stored = self.evicted = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._objects())
+        self.evict()
+
+    def _objects(self):
+        """(mtime, path, size) of every object."""
+        with os.scandir(self.root) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as entries:
+                    for entry in entries:
+                        if '.tmp' in entry.name:
+                            continue
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        yield stat.st_mtime, entry.path, stat.st_size
+
+    def path(self, key, kind):
+        return os.path.join(self.root, key[:2], key + EXTENSIONS[kind])
+
+    def get(self, key, kind):
+        """Path of a cached object, or None; a hit marks it recently used."""
+        path = self.path(key, kind)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def _store(self, key, kind, write):
+        path = self.path(key, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        write(tmp_path)
+        size = os.path.getsize(tmp_path)
+        existed = os.path.exists(path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.stored += 1
+            if not existed:
+                self.total_bytes += size
+        self.evict()
+        return path
+
+    def put_file(self, key, kind, source):
+        """Store a copy of a file (a hard link where possible); returns its path."""
+        return self._store(key, kind, lambda tmp_path: link_or_copy(source, tmp_path))
+
+    def put_text(self, key, kind, text):
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return self._store(key, kind, write)
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used objects until the cache fits max_bytes
+        (default: the cache's bound); returns (objects, bytes) removed."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            if limit is None or self.total_bytes <= limit:
+                return 0, 0
+            objects = sorted(self._objects())
+            self.total_bytes = sum(size for _, _, size in objects)
+            removed = freed = 0
+            for _, path, size in objects:
+                if self.total_bytes <= limit:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                self.total_bytes -= size
+                removed += 1
+                freed += size
+            self.evicted += removed
+            return removed, freed
+
+    def summary(self):
+        return (f"Result cache: {self.hits} hits, {self.misses} misses, {self.stored} stored, "
+                f"{self.evicted} evicted, {self.total_bytes / 2**20:.1f} MiB in {self.root}")
+
+
+def solve_key(fingerprint, search=False):
+    return cache_key('solve', fingerprint, int(search), sources_digest(SOLVER_SOURCES))
+
+
+def solve_cached(puzzle_data, cache, search=False, combo_cache=None):
+    """Solve a puzzle through the cache; returns (solution or None, log, hit).
+
+    Logs are stored as first solved, with their puzzle. A duplicate in
+    another orientation gets that log with its cells moved across (see
+    kenken_fingerprint.map_log); an exact copy gets it as is.
+    """
+    from kenken_solver import solve_puzzle
+
+    form, symmetry = canonical_form(puzzle_data)
+    key = solve_key(fingerprint_of_form(puzzle_data, form), search)
+    path = cache.get(key, 'solve')
+    if path is None:
+        solution, log = solve_puzzle(puzzle_data, combo_cache, search)
+        lines = format_puzzle(puzzle_data) + [BANNER] + log
+        if solution:
+            lines.append(format_solution_line(solution))
+        cache.put_text(key, 'solve', "\n".join(lines) + "\n")
+        return solution, log, False
+
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = iter(f.read().splitlines())
+    stored, _ = read_header(lines)
+    log = list(lines)
+    solution = None
+    if log and log[-1].startswith(SOLUTION_PREFIX):
+        solution = parse_solution_line(log.pop())
+    # Stored orientation -> canonical -> this puzzle's orientation
+    size = puzzle_data['info']['size']
+    move = compose(canonical_form(stored)[1], inverse(symmetry))
+    log = map_log(log, size, move)
+    if solution is not None:
+        solution = {transform_cell(cell, size, move): value for cell, value in solution.items()}
+    return solution, log, True
+
+
+def solved_path(input_file, output_dir):
+    name = os.path.basename(input_file)
+    name = name[:-4] + '_solved.txt' if name.endswith('.txt') else name + '_solved'
+    return os.path.join(output_dir, name)
+
+
+def main():
+    from kenken_batch_render import find_descriptors
+    from kenken_solver import write_descriptor
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--cache", required=True, metavar="DIR", help="Result cache directory")
+    common.add_argument("--max-size", type=parse_size, metavar="SIZE",
+                        help="Evict least recently used objects beyond SIZE (e.g. 500M, 2G)")
+    parser = argparse.ArgumentParser(description="Solve puzzles through, or manage, the result cache")
+    commands = parser.add_subparsers(dest='command', required=True)
+    solve_parser = commands.add_parser('solve', parents=[common],
+                                       help="Solve puzzles, once per distinct puzzle")
+    solve_parser.add_argument("inputs", nargs='+', help="Puzzle files, directories or glob patterns")
+    solve_parser.add_argument("--output-dir", "-o", default="descriptors/solved",
+                              help="Directory for the <name>_solved.txt descriptors")
+    solve_parser.add_argument("--search", action="store_true",
+                              help="Finish stalled puzzles by exact-cover search")
+    commands.add_parser('stats', parents=[common], help="Print the cache's size")
+    commands.add_parser('evict', parents=[common], help="Evict down to --max-size")
+    args = parser.parse_args()
+    if args.command == 'evict' and args.max_size is None:
+        parser.error("evict needs --max-size")
+
+    if args.command == 'evict':
+        removed, freed = ResultCache(args.cache).evict(args.max_size)
+        print(f"Evicted {removed} objects ({freed / 2**20:.1f} MiB)")
+        return
+    cache = ResultCache(args.cache, args.max_size)
+    if args.command == 'stats':
+        count = sum(1 for _ in cache._objects())
+        print(f"{count} objects, {cache.total_bytes / 2**20:.1f} MiB in {args.cache}")
+        return
+
+    paths = find_descriptors(args.inputs)
+    if not paths:
+        print("Error: no puzzles found.")
+        sys.exit(1)
+    os.makedirs(args.output_dir, exist_ok=True)
+    start = time.perf_counter()
+    deduplicated = failed = 0
+    for path in paths:
+        try:
+            puzzle_data = read_puzzle(path)
+            solution, log, hit = solve_cached(puzzle_data, cache, args.search)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Error solving {path}: {e}")
+            failed += 1
+            continue
+        deduplicated += hit
+        write_descriptor(puzzle_data, log, solution, solved_path(path, args.output_dir))
+    elapsed = time.perf_counter() - start
+    print(f"Solved {len(paths) - failed} puzzles in {elapsed:.2f}s: "
+          f"{len(paths) - failed - deduplicated} solved, {deduplicated} deduplicated by the cache, "
+          f"{failed} failed")
+    print(cache.summary())
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
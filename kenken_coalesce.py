@@ -0,0 +1,144 @@
+from kenken_parser import ASSIGNMENT
+
+STEP_GROUP = 'group'
+
+# Step rule -> kind of the group a run of such steps becomes
+GROUP_KINDS = {
+    'naked_single': 'assignment',
+    'cage_single_combo': 'assignment',
+    'perm_prune': 'perm_prune',
+    'pruned': 'perm_prune',
+    'cage_line_elim': 'cage_line',
+    'peer_elim': 'peer_elim',
+}
+# Titles of the group beats, by StepGroup.kind
+GROUP_TITLES = {
+    'assignment': "Assignment",
+    'cage_line': "Cage-Line Elimination",
+    'perm_prune': "Constraint Propagation",
+    'peer_elim': "Peer Elimination",
+}
+
+
+class StepGroup:
+    """Run of related steps animated as one beat.
+
+    kind is 'assignment' (assignments by one rule and the peer eliminations
+    they cause), 'cage_line' (cage-line eliminations), 'perm_prune' (placement
+    pruning in one sweep over the cages) or 'peer_elim' (loose peer
+    eliminations of one value). Steps the renderer does not draw (cage
+    analysis, combo updates) stay in the run so the log order is kept.
+    """
+    __slots__ = ('kind', 'steps')
+    type = STEP_GROUP
+
+    def __init__(self, kind, steps):
+        self.kind = kind
+        self.steps = steps
+
+    @property
+    def description(self):
+        return "\n".join(step.description for step in self.steps)
+
+    def cell_steps(self):
+        """Members that change a cell, in order."""
+        return [step for step in self.steps if getattr(step, 'cell', None) is not None]
+
+    def cells(self):
+        cells = []
+        for step in self.cell_steps():
+            if step.cell not in cells:
+                cells.append(step.cell)
+        return cells
+
+    def __repr__(self):
+        return f"StepGroup({self.kind!r}, {len(self.steps)} steps)"
+
+
+def group_key(step):
+    """Key of the run a cell-changing step opens or joins, or None.
+
+    Consecutive steps with equal keys are merged. Peer eliminations also join
+    an open assignment run, as they are the assignments' consequences.
+    """
+    if getattr(step, 'cell', None) is None or step.rule not in GROUP_KINDS:
+        return None
+    if step.type == ASSIGNMENT:
+        return ('assignment', step.rule)
+    if step.rule == 'peer_elim':
+        return ('peer_elim', step.value_removed)
+    return (GROUP_KINDS[step.rule],)
+
+
+def coalesce_steps(steps, max_group=None):
+    """Yield steps with runs of related ones merged into StepGroups.
+
+    Works on a stream, holding back only the current run. Flattening the
+    output gives back the input steps in order, so replaying the groups
+    leaves the grid in the same state. max_group caps the cell-changing
+    steps per group.
+    """
+    run = []
+    run_key = None
+    drawn = 0
+
+    def flush():
+        if drawn > 1:
+            return [StepGroup(run_key[0], list(run))]
+        # A single drawn step gains nothing from a group beat
+        return list(run)
+
+    for step in steps:
+        if getattr(step, 'cell', None) is None:
+            # Not drawn: carry it along inside the open run, if any
+            if run:
+                run.append(step)
+            else:
+                yield step
+            continue
+        key = group_key(step)
+        joins = (run and key is not None and (max_group is None or drawn < max_group) and
+                 (key == run_key or (run_key[0] == 'assignment' and key[0] == 'peer_elim')))
+        if joins:
+            run.append(step)
+            drawn += 1
+            continue
+        if run:
+            yield from flush()
+            run.clear()
+            drawn = 0
+        if key is None:
+            yield step
+        else:
+            run.append(step)
+            run_key = key
+            drawn = 1
+    if run:
+        yield from flush()
+
+
+def group_summary(group):
+    """One explanation line per group: the cells and what happened to them."""
+    members = group.cell_steps()
+    if group.kind == 'assignment':
+        assigned = [m for m in members if m.type == ASSIGNMENT]
+        summary = ", ".join(f"({m.cell[0]},{m.cell[1]}) = {m.value}" for m in assigned[:4])
+        if len(assigned) > 4:
+            summary += ", ..."
+        return f"{summary}; {len(members) - len(assigned)} peer eliminations"
+    cells = ", ".join(f"({row},{col})" for row, col in group.cells()[:6])
+    if len(group.cells()) > 6:
+        cells += ", ..."
+    if group.kind == 'perm_prune':
+        return f"Prune {cells}"
+    values = sorted({m.value_removed for m in members})
+    return f"Remove {', '.join(map(str, values))} from {cells}"
+
+
+def flatten(beats):
+    """Inverse of coalesce_steps."""
+    for beat in beats:
+        if beat.type == STEP_GROUP:
+            yield from beat.steps
+        else:
+            yield beat
@@ -0,0 +1,398 @@
+import argparse
+import hashlib
+import itertools
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter, OrderedDict, namedtuple
+
+
+def combo_fits(operation, target, values):
+    """Check whether a multiset of values satisfies a cage operation."""
+    if operation == 'sum':
+        return sum(values) == target
+    if operation == 'product':
+        return math.prod(values) == target
+    if operation == 'value':
+        return len(values) == 1 and values[0] == target
+    largest = max(values)
+    rest = list(values)
+    rest.remove(largest)
+    if operation == 'difference':
+        return largest - sum(rest) == target
+    if operation == 'quotient':
+        divisor = math.prod(rest)
+        return divisor != 0 and largest == target * divisor
+    raise ValueError(f"Unknown operation '{operation}'")
+
+
+def cage_combos(operation, target, n_cells, allowed_numbers):
+    """Every sorted multiset of allowed_numbers that satisfies the cage."""
+    return [
+        combo
+        for combo in itertools.combinations_with_replacement(sorted(allowed_numbers), n_cells)
+        if combo_fits(operation, target, combo)
+    ]
+
+
+def cage_permutations(cells, combo):
+    """Distinct orderings of combo over cells with no value repeated in a row or column."""
+    n = len(cells)
+    counts = Counter(combo)
+    conflicts = [
+        [j for j in range(i) if cells[j][0] == cells[i][0] or cells[j][1] == cells[i][1]]
+        for i in range(n)
+    ]
+    current = [None] * n
+    result = []
+
+    def place(i):
+        if i == n:
+            result.append(tuple(current))
+            return
+        for value in counts:
+            if counts[value] and all(current[j] != value for j in conflicts[i]):
+                counts[value] -= 1
+                current[i] = value
+                place(i + 1)
+                counts[value] += 1
+
+    place(0)
+    return result
+
+
+# combos: sorted multisets of allowed numbers that satisfy the cage.
+# perms: placements as allowed_numbers indices, in the cage's cell order.
+# perm_combos: for each placement, the index of its combo in combos.
+ComboEntry = namedtuple('ComboEntry', ['combos', 'perms', 'perm_combos'])
+
+
+def normalize_shape(cells):
+    """Translate cells to the origin and sort them.
+
+    Returns (shape, order) where shape[j] == relative cells[order[j]]. Placements
+    only depend on which cells share a row or column, so every translation and
+    listing order of a cage shares one cache entry.
+    """
+    min_row = min(row for row, _ in cells)
+    min_col = min(col for _, col in cells)
+    relative = [(row - min_row, col - min_col) for row, col in cells]
+    order = sorted(range(len(cells)), key=relative.__getitem__)
+    return tuple(relative[i] for i in order), tuple(order)
+
+
+def cache_key(operation, target, shape, allowed_numbers):
+    return f"{operation}|{target}|{shape}|{tuple(allowed_numbers)}".encode()
+
+
+def compute_entry(operation, target, shape, allowed_numbers):
+    """Uncached (combos as value indices, perms in shape order, perm_combos)."""
+    position = {number: i for i, number in enumerate(allowed_numbers)}
+    combos = []
+    perms = []
+    perm_combos = []
+    for combo in cage_combos(operation, target, len(shape), allowed_numbers):
+        combo_id = len(combos)
+        combos.append(tuple(position[value] for value in combo))
+        for perm in cage_permutations(shape, combo):
+            perms.append(tuple(position[value] for value in perm))
+            perm_combos.append(combo_id)
+    return combos, perms, perm_combos
+
+
+# On-disk layout, little-endian:
+#   header  magic 'KKCB', version u16, entry count u32
+#   index   count * (key hash u64, record offset u32, record length u32), sorted by hash
+#   records key length u16, key, cell count u8, combo count u32, perm count u32,
+#           combos (u8 value indices), perm_combos (u32), perms (u8 value indices)
+MAGIC = b'KKCB'
+VERSION = 1
+HEADER = struct.Struct('<4sHI')
+INDEX_ENTRY = struct.Struct('<QII')
+RECORD_HEAD = struct.Struct('<HBII')
+
+
+def key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+def encode_record(key, n_cells, combos, perms, perm_combos):
+    return b''.join([
+        RECORD_HEAD.pack(len(key), n_cells, len(combos), len(perms)),
+        key,
+        bytes(itertools.chain.from_iterable(combos)),
+        array('I', perm_combos).tobytes(),
+        bytes(itertools.chain.from_iterable(perms)),
+    ])
+
+
+def decode_record(buffer, offset):
+    """Decode the record at offset into (key, combos, perms, perm_combos)."""
+    key_length, n_cells, n_combos, n_perms = RECORD_HEAD.unpack_from(buffer, offset)
+    offset += RECORD_HEAD.size
+    key = bytes(buffer[offset:offset + key_length])
+    offset += key_length
+    raw = buffer[offset:offset + n_combos * n_cells]
+    combos = [tuple(raw[i:i + n_cells]) for i in range(0, len(raw), n_cells)]
+    offset += n_combos * n_cells
+    perm_combos = array('I')
+    perm_combos.frombytes(buffer[offset:offset + 4 * n_perms])
+    offset += 4 * n_perms
+    raw = buffer[offset:offset + n_perms * n_cells]
+    perms = [tuple(raw[i:i + n_cells]) for i in range(0, len(raw), n_cells)]
+    return key, combos, perms, list(perm_combos)
+
+
+class ComboCache:
+    """Memoized cage combos and placements.
+
+    Lookups go to a bounded in-process LRU first, then to an optional on-disk
+    table that is memory-mapped when the cache is opened, and finally to
+    compute_entry. New entries are written back by save(); a cache opened
+    without a path keeps only the latest maxsize of them for a later
+    save(path), so a long-lived in-process cache stays bounded.
+    """
+
+    def __init__(self, path=None, maxsize=4096):
+        self.path = path
+        self.maxsize = maxsize
+        self.memory = OrderedDict()
+        self.new_entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._file = None
+        self._map = None
+        self._count = 0
+        if path and os.path.exists(path) and os.path.getsize(path) > HEADER.size:
+            self._open(path)
+
+    def _open(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"'{path}' is not a version {VERSION} combo cache")
+        self._count = count
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._map = self._file = None
+        self._count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _index_entry(self, i):
+        return INDEX_ENTRY.unpack_from(self._map, HEADER.size + i * INDEX_ENTRY.size)
+
+    def _disk_lookup(self, key):
+        """Binary search the mapped index; nothing is read into memory at open."""
+        if self._map is None:
+            return None
+        wanted = key_hash(key)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._index_entry(mid)[0] < wanted:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self._count:
+            hashed, offset, _ = self._index_entry(lo)
+            if hashed != wanted:
+                break
+            stored_key, combos, perms, perm_combos = decode_record(self._map, offset)
+            if stored_key == key:
+                return combos, perms, perm_combos
+            lo += 1
+        return None
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        if len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+            self.evictions += 1
+
+    def lookup_shape(self, operation, target, shape, allowed_numbers):
+        """(combos, perms, perm_combos) as value indices for a normalized shape."""
+        key = cache_key(operation, target, shape, allowed_numbers)
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return entry
+        entry = self._disk_lookup(key)
+        if entry is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            entry = compute_entry(operation, target, shape, allowed_numbers)
+            self.new_entries[key] = (len(shape), entry)
+            if not self.path and len(self.new_entries) > self.maxsize:
+                self.new_entries.popitem(last=False)
+        self._remember(key, entry)
+        return entry
+
+    def lookup(self, operation, target, cells, allowed_numbers):
+        """ComboEntry for a cage, with placements in the cage's own cell order."""
+        shape, order = normalize_shape(cells)
+        combos, perms, perm_combos = self.lookup_shape(operation, target, shape, allowed_numbers)
+        if order != tuple(range(len(order))):
+            inverse = sorted(range(len(order)), key=order.__getitem__)
+            perms = [tuple(perm[j] for j in inverse) for perm in perms]
+        return ComboEntry(
+            [tuple(allowed_numbers[i] for i in combo) for combo in combos],
+            perms,
+            perm_combos)
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'lookups': lookups,
+            'memory_hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'memory_entries': len(self.memory),
+            'disk_entries': self._count,
+        }
+
+    def save(self, path=None):
+        """Write the on-disk entries plus every entry computed since opening."""
+        path = path or self.path
+        if not path:
+            raise ValueError("No cache path given")
+        records = {}
+        if self._map is not None:
+            for i in range(self._count):
+                _, offset, length = self._index_entry(i)
+                key_length = RECORD_HEAD.unpack_from(self._map, offset)[0]
+                start = offset + RECORD_HEAD.size
+                records[bytes(self._map[start:start + key_length])] = \
+                    bytes(self._map[offset:offset + length])
+        for key, (n_cells, (combos, perms, perm_combos)) in self.new_entries.items():
+            records[key] = encode_record(key, n_cells, combos, perms, perm_combos)
+
+        entries = sorted((key_hash(key), record) for key, record in records.items())
+        offset = HEADER.size + len(entries) * INDEX_ENTRY.size
+        index = []
+        for hashed, record in entries:
+            index.append(INDEX_ENTRY.pack(hashed, offset, len(record)))
+            offset += len(record)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(entries)))
+            f.writelines(index)
+            f.writelines(record for _, record in entries)
+        self.close()
+        os.replace(tmp_path, path)
+        self.new_entries.clear()
+        self.path = path
+        self._open(path)
+
+
+_default_cache = ComboCache()
+
+
+def default_cache():
+    """The process-wide cache used when a solver is not given one."""
+    return _default_cache
+
+
+def set_default_cache(cache):
+    global _default_cache
+    _default_cache = cache
+
+
+def fixed_polyominoes(max_cells):
+    """Every fixed polyomino with up to max_cells cells, as normalized shapes."""
+    shapes = {((0, 0),)}
+    found = set(shapes)
+    for _ in range(max_cells - 1):
+        grown = set()
+        for shape in shapes:
+            for row, col in shape:
+                for cell in ((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)):
+                    if cell not in shape:
+                        grown.add(normalize_shape(shape + (cell,))[0])
+        found |= grown
+        shapes = grown
+    return sorted(found, key=lambda shape: (len(shape), shape))
+
+
+def operation_targets(operation, n_cells, allowed_numbers):
+    """All targets reachable by some multiset for an operation."""
+    if operation == 'value':
+        return sorted(allowed_numbers) if n_cells == 1 else []
+    targets = set()
+    for combo in itertools.combinations_with_replacement(sorted(allowed_numbers), n_cells):
+        if operation == 'sum':
+            targets.add(sum(combo))
+        elif operation == 'product':
+            targets.add(math.prod(combo))
+        elif operation == 'difference':
+            targets.add(combo[-1] - sum(combo[:-1]))
+        elif operation == 'quotient':
+            divisor = math.prod(combo[:-1])
+            if divisor and combo[-1] % divisor == 0:
+                targets.add(combo[-1] // divisor)
+    return sorted(target for target in targets if target > 0 or operation == 'sum')
+
+
+def precompute(cache, sizes, max_cells):
+    """Fill cache with every cage of up to max_cells cells for puzzles 1..size."""
+    for size in sizes:
+        numbers = list(range(1, size + 1))
+        for shape in fixed_polyominoes(max_cells):
+            n_cells = len(shape)
+            if n_cells == 1:
+                operations = ['value']
+            elif n_cells == 2:
+                operations = ['sum', 'difference', 'product', 'quotient']
+            else:
+                operations = ['sum', 'product']
+            for operation in operations:
+                for target in operation_targets(operation, n_cells, numbers):
+                    cache.lookup_shape(operation, target, shape, numbers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect an on-disk cage combo cache")
+    parser.add_argument("cache_file", help="Path of the binary cache file")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[4, 5, 6, 7, 8, 9],
+                        help="Puzzle sizes to precompute (allowed numbers 1..size)")
+    parser.add_argument("--max-cells", type=int, default=4,
+                        help="Largest cage to precompute")
+    parser.add_argument("--stats", action="store_true", help="Only print cache statistics")
+    args = parser.parse_args()
+
+    try:
+        cache = ComboCache(args.cache_file, maxsize=1)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if not args.stats:
+        precompute(cache, args.sizes, args.max_cells)
+        cache.save()
+        print(f"Combo cache written to: {args.cache_file}")
+    for name, value in cache.stats().items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
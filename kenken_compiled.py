@@ -0,0 +1,386 @@
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from kenken_parser import (ASSIGNMENT, CAGE_LINE_ELIMINATION, CELL_PATTERN,
+                           CONSTRAINT_PROPAGATION, STEP_TYPE_CODES, UPDATED_COMBOS_PATTERN,
+                           mask_values, parse_lines)
+
+# Compiled descriptor layout, in file order (records are little-endian; u16
+# arrays are in the machine's byte order, as compiled files are a local cache):
+#   header      HEADER
+#   numbers     n_numbers x u16 allowed numbers
+#   solution    size*size x u16 values, 0 where missing
+#   cages       n_cages x CAGE_RECORD, then n_cells x u16 cell indices
+#   steps       n_steps x STEP_RECORD
+#   strings     UTF-8 blob addressed by (offset, length) pairs
+# Cells are stored as row * size + col. The text descriptor stays the
+# source of truth; the header records its mtime, size and hash so stale
+# compiled files are detected and rebuilt.
+MAGIC = b'KKDC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHqq8sIIIIIIIB')
+CAGE_RECORD = struct.Struct('<IIHH')
+# type code, rule code, cell, a, b, description (offset, length), extra (offset, length)
+STEP_RECORD = struct.Struct('<BBHHHIIII')
+NO_CELL = 0xFFFF
+NO_VALUE = 0xFFFF
+NO_STRING = 0xFFFFFFFF
+EXTENSION = ".kkc"
+
+TYPE_NAMES = {code: name for name, code in STEP_TYPE_CODES.items()}
+RULES = ('cage', 'perm_prune', 'pruned', 'cage_line_elim', 'peer_elim',
+         'cage_single_combo', 'naked_single', 'combo_update', 'branch')
+RULE_CODES = {rule: code for code, rule in enumerate(RULES)}
+PROPAGATION_CODE = STEP_TYPE_CODES[CONSTRAINT_PROPAGATION]
+ELIMINATION_CODE = STEP_TYPE_CODES[CAGE_LINE_ELIMINATION]
+ASSIGNMENT_CODE = STEP_TYPE_CODES[ASSIGNMENT]
+
+
+def source_hash(data):
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+
+class _Strings:
+    """Builder of the strings blob."""
+
+    def __init__(self):
+        self.blob = bytearray()
+
+    def add(self, text):
+        if text is None:
+            return NO_STRING, 0
+        data = text.encode('utf-8')
+        offset = len(self.blob)
+        self.blob += data
+        return offset, len(data)
+
+
+def cell_index(cell, size):
+    """row * size + col; raises ValueError for a cell off the grid, which
+    would otherwise alias another cell once packed."""
+    row, col = cell
+    if not (0 <= row < size and 0 <= col < size):
+        raise ValueError(f"cell {cell} is outside the {size}x{size} grid")
+    return row * size + col
+
+
+def encode_step(step, size, strings):
+    cell = getattr(step, 'cell', None)
+    cell = NO_CELL if cell is None else cell_index(cell, size)
+    a = b = 0
+    extra = None
+    step_type = step.type
+    if step_type == CONSTRAINT_PROPAGATION:
+        a, b = step.old_mask, step.new_mask
+    elif step_type == CAGE_LINE_ELIMINATION:
+        a = NO_VALUE if step.value_removed is None else step.value_removed
+    elif step_type == ASSIGNMENT:
+        a = step.value
+    else:
+        extra = step.combos
+    return STEP_RECORD.pack(step.type_code, RULE_CODES[step.rule], cell, a, b,
+                            *strings.add(step.description), *strings.add(extra))
+
+
+def compile_descriptor(source, output=None):
+    """Parse a text descriptor and write its compiled form; returns the output path."""
+    output = output or source + EXTENSION
+    stat = os.stat(source)
+    with open(source, 'rb') as f:
+        data = f.read()
+    puzzle_data, solution, steps = parse_lines(data.decode('utf-8').splitlines())
+    info = puzzle_data['info']
+    if not info.get('size'):
+        raise ValueError("no puzzle header")
+    size = info['size']
+    numbers = info['allowed_numbers']
+    if max(numbers, default=0) > 15:
+        raise ValueError("Compiled descriptors hold numbers up to 15")
+
+    strings = _Strings()
+    cage_records = []
+    cells = array('H')
+    for cage in puzzle_data['cages']:
+        anchor = cage['anchor']
+        cage_records.append(CAGE_RECORD.pack(
+            *strings.add(cage['operation']),
+            len(cage['cells']),
+            NO_CELL if anchor is None else cell_index(anchor, size)))
+        cells.extend(cell_index(cell, size) for cell in cage['cells'])
+    solution_values = array('H', [0]) * (size * size)
+    for cell, value in solution.items():
+        solution_values[cell_index(cell, size)] = value
+    step_records = [encode_step(step, size, strings) for step in steps]
+
+    numbers_offset = HEADER.size
+    solution_offset = numbers_offset + 2 * len(numbers)
+    cages_offset = solution_offset + 2 * len(solution_values)
+    steps_offset = cages_offset + CAGE_RECORD.size * len(cage_records) + 2 * len(cells)
+    strings_offset = steps_offset + STEP_RECORD.size * len(step_records)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp_path = f"{output}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, size, stat.st_mtime_ns, stat.st_size, source_hash(data),
+            len(numbers), len(cage_records), len(step_records),
+            cages_offset, steps_offset, strings_offset, len(strings.blob),
+            1 if solution else 0))
+        f.write(array('H', numbers).tobytes())
+        f.write(solution_values.tobytes())
+        f.writelines(cage_records)
+        f.write(cells.tobytes())
+        f.writelines(step_records)
+        f.write(strings.blob)
+    os.replace(tmp_path, output)
+    return output
+
+
+def read_compiled_header(path):
+    with open(path, 'rb') as f:
+        data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        return None
+    header = HEADER.unpack(data)
+    if header[0] != MAGIC or header[1] != VERSION:
+        return None
+    return header
+
+
+def is_current(source, compiled, check_hash=False):
+    """Whether compiled was built from the current contents of source.
+
+    The mtime and size recorded at compile time are compared first; with
+    check_hash the source is also hashed, which catches edits that keep both.
+    """
+    if not os.path.exists(compiled):
+        return False
+    header = read_compiled_header(compiled)
+    if header is None:
+        return False
+    stat = os.stat(source)
+    if (header[3], header[4]) != (stat.st_mtime_ns, stat.st_size):
+        return False
+    if check_hash:
+        with open(source, 'rb') as f:
+            return source_hash(f.read()) == header[5]
+    return True
+
+
+class StepView:
+    """Read-only step backed by one record of a compiled descriptor.
+
+    Exposes the attributes of the kenken_parser step classes; attributes a
+    step type does not have read as None. Numbers are unpacked with the
+    record, strings are decoded from the mapped file on access.
+    """
+    __slots__ = ('_compiled', 'type', 'type_code', 'rule', 'cell', 'old_mask', 'new_mask',
+                 'value', 'value_removed', '_description', '_extra')
+
+    def __init__(self, compiled, record):
+        type_code, rule, cell, a, b, *strings = record
+        self._compiled = compiled
+        self.type = TYPE_NAMES[type_code]
+        self.type_code = type_code
+        self.rule = RULES[rule]
+        self.cell = None if cell == NO_CELL else compiled.cells[cell]
+        self.old_mask = self.new_mask = self.value = self.value_removed = None
+        if type_code == PROPAGATION_CODE:
+            self.old_mask, self.new_mask = a, b
+        elif type_code == ELIMINATION_CODE:
+            self.value_removed = None if a == NO_VALUE else a
+        elif type_code == ASSIGNMENT_CODE:
+            self.value = a
+        self._description = strings[:2]
+        self._extra = strings[2:]
+
+    @property
+    def description(self):
+        return self._compiled.string(*self._description)
+
+    @property
+    def old_values(self):
+        return mask_values(self.old_mask or 0)
+
+    @property
+    def new_values(self):
+        return mask_values(self.new_mask or 0)
+
+    @property
+    def combos(self):
+        return self._compiled.string(*self._extra)
+
+    @property
+    def cells(self):
+        return [(int(r), int(c)) for r, c in CELL_PATTERN.findall(self.description)]
+
+    @property
+    def cage_description(self):
+        match = UPDATED_COMBOS_PATTERN.match(self.description)
+        return match.group(1).strip() if match else None
+
+    def __repr__(self):
+        return f"StepView({self.type!r}, {self.description!r})"
+
+
+class _LoadedStrings:
+    """The strings blob and cells of a compiled descriptor, copied out of its
+    mapping so the StepViews of load_steps outlive close()."""
+    __slots__ = ('_blob', 'cells')
+
+    def __init__(self, blob, cells):
+        self._blob = blob
+        self.cells = cells
+
+    def string(self, offset, length):
+        if offset == NO_STRING:
+            return None
+        return str(self._blob[offset:offset + length], 'utf-8')
+
+
+class CompiledDescriptor:
+    """Memory-mapped compiled descriptor.
+
+    puzzle_data and solution are decoded on open; steps stay in the mapped
+    file and are handed out as StepViews by indexing or iteration.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._map = self._view = None
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise
+        header = HEADER.unpack_from(self._map, 0)
+        if header[0] != MAGIC or header[1] != VERSION:
+            self.close()
+            raise ValueError(f"'{path}' is not a version {VERSION} compiled descriptor")
+        (_, _, self.size, _, _, _, n_numbers, n_cages, self.n_steps,
+         cages_offset, self._steps_offset, self._strings_offset, _, has_solution) = header
+        self._view = memoryview(self._map)
+        size = self.size
+        # Shared cell tuples, indexed like the records
+        self.cells = [divmod(k, size) for k in range(size * size)]
+
+        numbers_end = HEADER.size + 2 * n_numbers
+        numbers = self._view[HEADER.size:numbers_end].cast('H').tolist()
+        values = self._view[numbers_end:numbers_end + 2 * size * size].cast('H').tolist()
+        self.solution = {
+            divmod(k, size): value for k, value in enumerate(values) if value
+        } if has_solution else {}
+
+        start = cages_offset + CAGE_RECORD.size * n_cages
+        cages = []
+        for i in range(n_cages):
+            op_offset, op_length, n_cells, anchor = CAGE_RECORD.unpack_from(
+                self._map, cages_offset + i * CAGE_RECORD.size)
+            indices = self._view[start:start + 2 * n_cells].cast('H').tolist()
+            start += 2 * n_cells
+            cages.append({
+                'operation': self.string(op_offset, op_length),
+                'cells': [divmod(k, size) for k in indices],
+                'anchor': None if anchor == NO_CELL else divmod(anchor, size),
+            })
+        self.puzzle_data = {
+            'info': {'size': size, 'allowed_numbers': numbers},
+            'cages': cages,
+        }
+
+    def string(self, offset, length):
+        if offset == NO_STRING:
+            return None
+        start = self._strings_offset + offset
+        return str(self._view[start:start + length], 'utf-8')
+
+    def __len__(self):
+        return self.n_steps
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.n_steps
+        if not 0 <= i < self.n_steps:
+            raise IndexError(i)
+        return StepView(self, STEP_RECORD.unpack_from(
+            self._map, self._steps_offset + i * STEP_RECORD.size))
+
+    def __iter__(self):
+        end = self._steps_offset + self.n_steps * STEP_RECORD.size
+        for record in STEP_RECORD.iter_unpack(self._view[self._steps_offset:end]):
+            yield StepView(self, record)
+
+    @property
+    def steps(self):
+        return self
+
+    def load_steps(self):
+        """Every step as a StepView that stays usable after close(); the
+        strings blob (the end of the file) is copied into memory once."""
+        strings = _LoadedStrings(bytes(self._view[self._strings_offset:]), self.cells)
+        end = self._steps_offset + self.n_steps * STEP_RECORD.size
+        return [StepView(strings, record)
+                for record in STEP_RECORD.iter_unpack(self._view[self._steps_offset:end])]
+
+    def close(self):
+        """Unmap the file. Views handed out before must not be used afterwards."""
+        if self._view is not None:
+            self._view.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+        self._map = self._view = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_descriptor(source, compiled=None, check_hash=False):
+    """Open the compiled form of a text descriptor, compiling it first if it
+    is missing or older than the source."""
+    compiled = compiled or source + EXTENSION
+    if not is_current(source, compiled, check_hash):
+        compile_descriptor(source, compiled)
+    return CompiledDescriptor(compiled)
+
+
+def main():
+    from kenken_batch_render import find_descriptors
+
+    parser = argparse.ArgumentParser(description="Compile KenKen descriptors to the binary format")
+    parser.add_argument("inputs", nargs='+', help="Descriptor files, directories or glob patterns")
+    parser.add_argument("--force", action="store_true", help="Recompile up-to-date files")
+    parser.add_argument("--check-hash", action="store_true",
+                        help="Also hash sources whose mtime and size are unchanged")
+    args = parser.parse_args()
+
+    paths = find_descriptors(args.inputs)
+    if not paths:
+        print("Error: no descriptors found.")
+        sys.exit(1)
+    compiled = 0
+    for path in paths:
+        output = path + EXTENSION
+        if not args.force and is_current(path, output, args.check_hash):
+            continue
+        try:
+            compile_descriptor(path, output)
+            compiled += 1
+        except (OSError, ValueError) as e:
+            print(f"Error compiling {path}: {e}")
+            sys.exit(1)
+    print(f"Compiled {compiled} of {len(paths)} descriptors "
+          f"({len(paths) - compiled} up to date)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,77 +1,181 @@
+import argparse
+import os
 import re
+import shutil
 import sys
+import tempfile
+import time
+
+# Coordinates like (1,2) or (10,5); "(1, 2)" with a space is left alone
+COORD_PATTERN = re.compile(r'\((\d+),(\d+)\)')
+# Lines whose coordinates are all converted
+CONVERT_PREFIXES = ('The cage covering', 'Cage-line elim:', 'Updated combos',
+                    'Cage-single-combo', 'Naked single', 'Peer elim', 'Branch')
+PERM_PRUNE_PREFIX = 'Perm-prune '
+CHUNK_SIZE = 1 << 20
+
+
+class _Converted(dict):
+    """'(x,y)' -> '(x-1,y-1)', computed once per distinct coordinate."""
+
+    def __missing__(self, coord):
+        x, y = COORD_PATTERN.fullmatch(coord).groups()
+        value = self[coord] = f"({int(x) - 1},{int(y) - 1})"
+        return value
+
+
+_CONVERTED = _Converted()
+
+
+def _replace_coord(match):
+    return _CONVERTED[match.group()]
+
 
 def convert_coordinates_1_to_0(text):
     """Convert 1-based coordinates to 0-based coordinates in a string."""
-    def replace_coord(match):
-        x, y = int(match.group(1)), int(match.group(2))
-        return f"({x-1},{y-1})"
-    
-    # Pattern to match coordinates like (1,2) or (10,5)
-    coord_pattern = r'\((\d+),(\d+)\)'
-    return re.sub(coord_pattern, replace_coord, text)
+    return COORD_PATTERN.sub(_replace_coord, text)
+
+
+def fix_line(line):
+    """Fix the coordinates of one descriptor line."""
+    if line.startswith(CONVERT_PREFIXES):
+        # Convert all coordinates in the line from 1-based to 0-based
+        return convert_coordinates_1_to_0(line)
+    if line.startswith(PERM_PRUNE_PREFIX):
+        # For Perm-prune lines, only convert coordinates before the colon;
+        # the cell after it is already 0-based
+        before_colon, colon, after_colon = line.partition(':')
+        return convert_coordinates_1_to_0(before_colon) + colon + after_colon
+    # For all other lines, keep them unchanged
+    return line
+
 
 def fix_kenken_coordinates(input_text):
     """Fix coordinate indexing inconsistencies in KenKen puzzle descriptor."""
-    lines = input_text.strip().split('\n')
-    fixed_lines = []
-    
-    for line in lines:
-        original_line = line
-        
-        # Check if line starts with patterns that need coordinate conversion
-        if (line.startswith('The cage covering') or 
-            line.startswith('Cage-line elim:') or 
-            line.startswith('Updated combos') or 
-            line.startswith('Cage-single-combo') or
-            line.startswith('Naked single') or
-            line.startswith('Peer elim')):
-            
-            # Convert all coordinates in the line from 1-based to 0-based
-            fixed_line = convert_coordinates_1_to_0(line)
-            fixed_lines.append(fixed_line)
-            
-        elif line.startswith('Perm-prune '):
-            # For Perm-prune lines, only convert coordinates before the colon
-            if ':' in line:
-                before_colon, after_colon = line.split(':', 1)
-                # Convert coordinates in the part before the colon
-                fixed_before_colon = convert_coordinates_1_to_0(before_colon)
-                # Keep the part after colon unchanged
-                fixed_line = fixed_before_colon + ':' + after_colon
-                fixed_lines.append(fixed_line)
-            else:
-                # If no colon found, convert all coordinates (shouldn't happen based on format)
-                fixed_line = convert_coordinates_1_to_0(line)
-                fixed_lines.append(fixed_line)
+    return '\n'.join(map(fix_line, input_text.strip().split('\n')))
+
+
+def iter_fixed_chunks(source, chunk_size=CHUNK_SIZE):
+    """Yield the fixed text of a file object in pieces, in constant memory.
+
+    The concatenated pieces equal fix_kenken_coordinates(source.read()):
+    leading whitespace is skipped before the first line is fixed, and
+    trailing whitespace is held back and dropped at the end.
+    """
+    carry = ''
+    started = False
+    pending_space = ''
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        if not started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            started = True
+        lines = (carry + chunk).split('\n')
+        carry = lines.pop()
+        if not lines:
+            continue
+        text = '\n'.join(map(fix_line, lines)) + '\n'
+        body = text.rstrip()
+        if body:
+            yield pending_space + body
+            pending_space = text[len(body):]
         else:
-            # For all other lines, keep them unchanged
-            fixed_lines.append(line)
-    
-    return '\n'.join(fixed_lines)
+            pending_space += text
+    body = fix_line(carry).rstrip()
+    if body:
+        yield pending_space + body
+
+
+def fix_file(input_filename, output_filename=None, in_place=False, chunk_size=CHUNK_SIZE):
+    """Stream-fix one file and return the path written.
 
-def process_file(input_filename, output_filename=None):
-    """Process a KenKen descriptor file and fix coordinate indexing."""
+    The output goes to output_filename, to the input itself with in_place
+    (through a temporary file in the same directory and an atomic rename,
+    so readers never see a half-written descriptor), or by default to a
+    _fixed copy next to the input.
+    """
+    if in_place:
+        output_filename = input_filename
+    elif not output_filename:
+        output_filename = fixed_filename(input_filename)
+    directory = os.path.dirname(os.path.abspath(output_filename))
+    fd, tmp_path = tempfile.mkstemp(prefix='.fixing-', dir=directory)
+    try:
+        with open(input_filename, 'r', encoding='utf-8') as source, \
+                os.fdopen(fd, 'w', encoding='utf-8') as target:
+            for piece in iter_fixed_chunks(source, chunk_size):
+                target.write(piece)
+        if os.path.exists(output_filename):
+            shutil.copymode(output_filename, tmp_path)
+        os.replace(tmp_path, output_filename)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return output_filename
+
+
+def _fix_file_job(args):
+    input_filename, in_place, chunk_size = args
+    start = time.perf_counter()
+    try:
+        output = fix_file(input_filename, in_place=in_place, chunk_size=chunk_size)
+        return input_filename, output, None, time.perf_counter() - start
+    except (OSError, UnicodeDecodeError) as e:
+        return input_filename, None, str(e), time.perf_counter() - start
+
+
+def fix_files(input_filenames, workers=None, in_place=False, chunk_size=CHUNK_SIZE):
+    """Fix many files across a process pool, yielding
+    (input, output or None, error or None, seconds) as each finishes."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    jobs = [(name, in_place, chunk_size) for name in input_filenames]
+    if workers == 1 or len(jobs) == 1:
+        yield from map(_fix_file_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(_fix_file_job, job) for job in jobs]):
+            yield future.result()
+
+
+def fixed_filename(input_filename):
+    """Default output name: the input with _fixed before .txt."""
+    if input_filename.endswith('.txt'):
+        return input_filename[:-4] + '_fixed.txt'
+    return input_filename + '_fixed'
+
+def process_file(input_filename, output_filename=None, in_place=False):
+    """Process a KenKen descriptor file and fix coordinate indexing.
+
+    Reads the whole file into memory and returns the fixed content; use
+    fix_file for large logs. With in_place the input is replaced atomically.
+    """
     try:
         with open(input_filename, 'r', encoding='utf-8') as file:
             content = file.read()
         
         fixed_content = fix_kenken_coordinates(content)
         
-        if output_filename:
-            with open(output_filename, 'w', encoding='utf-8') as file:
-                file.write(fixed_content)
-            print(f"Fixed content written to: {output_filename}")
-        else:
+        if in_place:
+            output_filename = input_filename
+        elif not output_filename:
             # If no output filename specified, create one based on input filename
-            if input_filename.endswith('.txt'):
-                output_filename = input_filename[:-4] + '_fixed.txt'
-            else:
-                output_filename = input_filename + '_fixed'
-            
-            with open(output_filename, 'w', encoding='utf-8') as file:
+            output_filename = fixed_filename(input_filename)
+
+        tmp_filename = f"{output_filename}.tmp{os.getpid()}"
+        try:
+            with open(tmp_filename, 'w', encoding='utf-8') as file:
                 file.write(fixed_content)
-            print(f"Fixed content written to: {output_filename}")
+            os.replace(tmp_filename, output_filename)
+        finally:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+        print(f"Fixed content written to: {output_filename}")
         
         return fixed_content
         
@@ -86,9 +190,43 @@ def main():
     """Main function to handle command line arguments or interactive input."""
     if len(sys.argv) > 1:
         # Command line usage
-        input_file = sys.argv[1]
-        output_file = sys.argv[2] if len(sys.argv) > 2 else None
-        process_file(input_file, output_file)
+        parser = argparse.ArgumentParser(description="Convert 1-based coordinates in KenKen descriptors to 0-based")
+        parser.add_argument("inputs", nargs='+', help="Descriptor files to fix")
+        parser.add_argument("--output", "-o", help="Output file (single input only; default: <input>_fixed.txt)")
+        parser.add_argument("--in-place", action="store_true",
+                            help="Replace each input atomically instead of writing a _fixed copy")
+        parser.add_argument("--workers", "-j", type=int, default=None,
+                            help="Worker processes for many files (default: CPU count)")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                            help="Characters read per chunk")
+        args = parser.parse_args()
+
+        inputs = args.inputs
+        # Old usage: kenken_coordinate_fixer.py input output
+        if len(inputs) == 2 and not args.output and not args.in_place and not os.path.exists(inputs[1]):
+            inputs, args.output = inputs[:1], inputs[1]
+        if args.output and len(inputs) > 1:
+            parser.error("--output needs a single input file")
+
+        if args.output:
+            try:
+                fix_file(inputs[0], args.output, chunk_size=args.chunk_size)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error processing file: {e}")
+                sys.exit(1)
+            print(f"Fixed content written to: {args.output}")
+            return
+
+        failed = 0
+        for _, output, error, seconds in fix_files(inputs, args.workers, args.in_place,
+                                                   args.chunk_size):
+            if error:
+                failed += 1
+                print(f"Error processing file: {error}")
+            else:
+                print(f"Fixed content written to: {output} ({seconds:.2f}s)")
+        if failed:
+            sys.exit(1)
     else:
         # Interactive usage
         input_file = input("Enter the input filename: ").strip()
@@ -98,8 +236,9 @@ def main():
 
 # Example usage and test
 if __name__ == "__main__":
-    # Test with sample text
-    sample_text = """Puzzle 1:
+    if len(sys.argv) == 1:
+        # Test with sample text
+        sample_text = """Puzzle 1:
 size: 4
 allowed_numbers: 2 4 8 9
 The cage covering (1,1), (1,2) must have a product of 32.
@@ -107,12 +246,12 @@ Perm-prune in 'The cage covering (1,3), (2,3) must have a sum of 10.': (1, 2) [2
 Cage-line elim: remove 4 from (1,4) by row in 'The cage covering (1,1), (1,2) must have a product of 32.'
 Updated combos for 'The cage covering (2,1), (3,1) must have a product of 16.': [(2, 8)]
 Cage-single-combo: Cell (1,1) = 4"""
-    
-    print("Sample input:")
-    print(sample_text)
-    print("\nFixed output:")
-    print(fix_kenken_coordinates(sample_text))
-    print("\n" + "="*50)
-    
+
+        print("Sample input:")
+        print(sample_text)
+        print("\nFixed output:")
+        print(fix_kenken_coordinates(sample_text))
+        print("\n" + "="*50)
+
     # Run main function for file processing
     main()
@@ -0,0 +1,378 @@
+import argparse
+import bisect
+import io
+import mmap
+import os
+import re
+import struct
+import sys
+from collections import namedtuple
+
+from kenken_parser import BANNER, INDEXING_CHOICES, _gc_paused, parse_lines
+
+# A corpus is many descriptors concatenated into one text file, each
+# starting with a "Puzzle N:" line (or, without one, with its "size:" line,
+# numbered one past the puzzle before). Its index is a sidecar file mapping
+# puzzle numbers to byte ranges, so a puzzle is read with one seek.
+#
+# Index layout (little-endian):
+#   header      HEADER: magic, version, sorted flag, corpus mtime and size, entry count
+#   entries     count x ENTRY_RECORD in corpus order
+# An entry's definition runs from its first line up to the banner line; its
+# log from the banner line to the next entry. Like compiled descriptors, the
+# corpus stays the source of truth and stale indexes are rebuilt.
+MAGIC = b'KKCI'
+VERSION = 1
+HEADER = struct.Struct('<4sHBqqQ')
+# puzzle number, definition offset, definition length, log length
+ENTRY_RECORD = struct.Struct('<IQIQ')
+EXTENSION = ".kki"
+
+# Lines that start entries, at line starts; banners are found with
+# bytes.find, as a pattern trying every line would be several times slower
+MARKER_PATTERN = re.compile(rb'^[ \t]*(?:Puzzle[ \t]+(\d+)[ \t]*:|size:)', re.MULTILINE)
+BANNER_BYTES = BANNER.encode()
+
+
+class Entry(namedtuple('Entry', 'number offset definition_length log_length')):
+    __slots__ = ()
+
+    @property
+    def end(self):
+        return self.offset + self.definition_length + self.log_length
+
+
+def _markers(data):
+    """Yield (line start, header) for each entry marker and banner line in
+    order: header is the "Puzzle N:" number as bytes, b'' for a "size:"
+    line and None for a banner."""
+    banner = data.find(BANNER_BYTES)
+    for match in MARKER_PATTERN.finditer(data):
+        while 0 <= banner < match.start():
+            yield data.rfind(b'\n', 0, banner) + 1, None
+            banner = data.find(BANNER_BYTES, banner + 1)
+        yield match.start(), match.group(1) or b''
+    while banner >= 0:
+        yield data.rfind(b'\n', 0, banner) + 1, None
+        banner = data.find(BANNER_BYTES, banner + 1)
+
+
+def scan_corpus(data):
+    """List the Entries of corpus bytes (any buffer, e.g. an mmap).
+
+    Raises ValueError for a puzzle with two solver logs or a puzzle number
+    used twice.
+    """
+    entries = []
+    seen = set()
+    start = number = log_start = None
+    previous = 0
+
+    def finish(end):
+        definition_end = end if log_start is None else log_start
+        entries.append(Entry(number, start, definition_end - start, end - definition_end))
+
+    for position, header in _markers(data):
+        if header is None:
+            if start is None:
+                raise ValueError(f"Solver log without a puzzle definition (byte {position})")
+            if log_start is not None:
+                raise ValueError(f"Puzzle {number} has multiple solver logs (byte {position})")
+            log_start = position
+        elif header or start is None or log_start is not None:
+            # A "size:" line only starts an entry after the last one's log
+            if start is not None:
+                finish(position)
+            start, log_start = position, None
+            number = int(header) if header else previous + 1
+            if number in seen:
+                raise ValueError(f"Puzzle {number} appears twice (byte {position})")
+            seen.add(number)
+            previous = number
+    if start is not None:
+        finish(len(data))
+    return entries
+
+
+def build_index(corpus, output=None):
+    """Scan a corpus and write its index; returns the index path."""
+    output = output or corpus + EXTENSION
+    stat = os.stat(corpus)
+    with open(corpus, 'rb') as f:
+        if stat.st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                entries = scan_corpus(data)
+        else:
+            entries = []
+    numbers = [entry.number for entry in entries]
+    is_sorted = all(a < b for a, b in zip(numbers, numbers[1:]))
+
+    tmp_path = f"{output}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 1 if is_sorted else 0,
+                            stat.st_mtime_ns, stat.st_size, len(entries)))
+        f.writelines(ENTRY_RECORD.pack(*entry) for entry in entries)
+    os.replace(tmp_path, output)
+    return output
+
+
+def read_index_header(path):
+    with open(path, 'rb') as f:
+        data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        return None
+    header = HEADER.unpack(data)
+    if header[0] != MAGIC or header[1] != VERSION:
+        return None
+    return header
+
+
+def is_current(corpus, index):
+    """Whether index was built from the corpus as it is now (mtime and size)."""
+    if not os.path.exists(index):
+        return False
+    header = read_index_header(index)
+    if header is None:
+        return False
+    stat = os.stat(corpus)
+    return (header[3], header[4]) == (stat.st_mtime_ns, stat.st_size)
+
+
+class _Numbers:
+    """Puzzle numbers of an index as a sequence, for bisect."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        return self.index.record(i)[0]
+
+
+class CorpusIndex:
+    """Memory-mapped corpus index.
+
+    Entries are read from the mapped file by position (indexing, iteration)
+    or by puzzle number (find); read() returns a puzzle's text with one seek
+    into the corpus.
+    """
+
+    def __init__(self, corpus, path=None):
+        self.corpus = corpus
+        self.path = path or corpus + EXTENSION
+        header = read_index_header(self.path)
+        if header is None:
+            raise ValueError(f"'{self.path}' is not a version {VERSION} corpus index")
+        self.sorted = bool(header[2])
+        self.count = header[5]
+        self._numbers = None
+        self._corpus_file = None
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def record(self, i):
+        return ENTRY_RECORD.unpack_from(self._map, HEADER.size + i * ENTRY_RECORD.size)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return Entry(*self.record(i))
+
+    def __iter__(self):
+        end = HEADER.size + self.count * ENTRY_RECORD.size
+        for record in ENTRY_RECORD.iter_unpack(self._map[HEADER.size:end]):
+            yield Entry(*record)
+
+    def find(self, number):
+        """Position of puzzle number in the index; raises KeyError if absent."""
+        if self.sorted:
+            i = bisect.bisect_left(_Numbers(self), number)
+            if i < self.count and self.record(i)[0] == number:
+                return i
+        else:
+            if self._numbers is None:
+                self._numbers = {entry.number: i for i, entry in enumerate(self)}
+            if number in self._numbers:
+                return self._numbers[number]
+        raise KeyError(f"No puzzle {number} in '{self.corpus}'")
+
+    def entry(self, number):
+        return self[self.find(number)]
+
+    def read(self, entry):
+        """Text of an entry (definition and log) read from the corpus."""
+        if self._corpus_file is None:
+            self._corpus_file = open(self.corpus, 'rb')
+        self._corpus_file.seek(entry.offset)
+        return self._corpus_file.read(entry.end - entry.offset).decode('utf-8')
+
+    def iter_texts(self, first=0, stop=None):
+        """Yield (entry, text) for index positions first..stop-1.
+
+        The entries are contiguous in the corpus, so the range is read with
+        one seek and sequential reads however many puzzles it holds.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        if first >= stop:
+            return
+        with open(self.corpus, 'rb') as f:
+            f.seek(self[first].offset)
+            for i in range(first, stop):
+                entry = self[i]
+                if f.tell() != entry.offset:
+                    f.seek(entry.offset)
+                yield entry, f.read(entry.end - entry.offset).decode('utf-8')
+
+    def shards(self, n):
+        """Split the index into at most n (first, stop) position ranges of
+        about equal bytes, for workers that each read one offset range."""
+        if not self.count:
+            return []
+        total = self[-1].end - self[0].offset
+        shards = []
+        first = 0
+        for i, entry in enumerate(self):
+            if len(shards) == n - 1:
+                break
+            if entry.end - self[0].offset >= total * (len(shards) + 1) / n:
+                shards.append((first, i + 1))
+                first = i + 1
+        if first < self.count:
+            shards.append((first, self.count))
+        return shards
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._corpus_file is not None:
+            self._corpus_file.close()
+        self._map = self._corpus_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_index(corpus, index=None):
+    """Open the index of a corpus, building it first if it is missing or
+    older than the corpus."""
+    index = index or corpus + EXTENSION
+    if not is_current(corpus, index):
+        build_index(corpus, index)
+    return CorpusIndex(corpus, index)
+
+
+def parse_text(text, indexing=None):
+    """Parse one entry's text into (puzzle_data, solution, steps)."""
+    with _gc_paused():
+        return parse_lines(io.StringIO(text), indexing)
+
+
+def load_puzzle(corpus, number, indexing=None):
+    """Parse puzzle number of a corpus into (puzzle_data, solution, steps)."""
+    with load_index(corpus) as index:
+        return parse_text(index.read(index.entry(number)), indexing)
+
+
+def strip_puzzle_header(text):
+    """Descriptor text without the "Puzzle N:" line it may start with."""
+    first, _, rest = text.partition('\n')
+    # The same test parse_header_line skips the line with
+    return rest if first.strip().startswith('Puzzle') else text
+
+
+def pack_corpus(paths, output, first_number=1):
+    """Concatenate descriptor files into a corpus with "Puzzle N:" headers
+    numbered from first_number, and index it; returns the puzzle count."""
+    tmp_path = f"{output}.tmp{os.getpid()}"
+    count = 0
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        for count, path in enumerate(paths, 1):
+            with open(path, 'r', encoding='utf-8') as f:
+                text = strip_puzzle_header(f.read())
+            if BANNER not in text:
+                raise ValueError(f"{path}: missing solver log")
+            out.write(f"Puzzle {first_number + count - 1}:\n")
+            out.write(text if text.endswith('\n') else text + '\n')
+    os.replace(tmp_path, output)
+    build_index(output)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, query and pack multi-puzzle corpus files")
+    commands = parser.add_subparsers(dest='command', required=True)
+    index_parser = commands.add_parser('index', help="(Re)build the byte-offset index of corpora")
+    index_parser.add_argument("corpora", nargs='+')
+    list_parser = commands.add_parser('list', help="Print each puzzle's number and byte ranges")
+    list_parser.add_argument("corpus")
+    show_parser = commands.add_parser('show', help="Print one puzzle's descriptor text")
+    show_parser.add_argument("corpus")
+    show_parser.add_argument("number", type=int)
+    show_parser.add_argument("--output", "-o", help="Write it to a descriptor file instead")
+    check_parser = commands.add_parser('check', help="Parse every puzzle, reporting failures")
+    check_parser.add_argument("corpus")
+    check_parser.add_argument("--indexing", choices=list(INDEXING_CHOICES), default="auto",
+                              help="Coordinate base of the solver logs")
+    pack_parser = commands.add_parser('pack', help="Concatenate descriptors into a corpus")
+    pack_parser.add_argument("inputs", nargs='+', help="Descriptor files, directories or glob patterns")
+    pack_parser.add_argument("--output", "-o", required=True, help="Corpus file to write")
+    pack_parser.add_argument("--first-number", type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'index':
+            for corpus in args.corpora:
+                with CorpusIndex(corpus, build_index(corpus)) as index:
+                    print(f"Indexed {len(index)} puzzles of {corpus}")
+        elif args.command == 'list':
+            with load_index(args.corpus) as index:
+                print(f"{'puzzle':>8} {'offset':>12} {'definition':>10} {'log':>10}")
+                for entry in index:
+                    print(f"{entry.number:>8} {entry.offset:>12} "
+                          f"{entry.definition_length:>10} {entry.log_length:>10}")
+        elif args.command == 'show':
+            with load_index(args.corpus) as index:
+                text = index.read(index.entry(args.number))
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                print(f"Wrote puzzle {args.number} to {args.output}")
+            else:
+                sys.stdout.write(text)
+        elif args.command == 'check':
+            failed = 0
+            with load_index(args.corpus) as index:
+                for entry, text in index.iter_texts():
+                    try:
+                        parse_text(text, INDEXING_CHOICES[args.indexing])
+                    except ValueError as e:
+                        failed += 1
+                        print(f"[FAIL] puzzle {entry.number}: {e}")
+                print(f"{len(index) - failed} of {len(index)} puzzles parsed")
+            if failed:
+                sys.exit(1)
+        else:
+            from kenken_batch_render import find_descriptors
+            paths = find_descriptors(args.inputs)
+            if not paths:
+                print("Error: no descriptors found.")
+                sys.exit(1)
+            count = pack_corpus(paths, args.output, args.first_number)
+            print(f"Packed {count} descriptors into {args.output}")
+    except (KeyError, OSError, ValueError) as e:
+        print(f"Error: {e.args[0] if isinstance(e, KeyError) else e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# Exact cover by dancing links (Knuth's Algorithm X). KenKenSolver uses it
+# to finish puzzles its deduction rules stall on and to count solutions:
+# every cage takes exactly one of its placements and every value appears
+# exactly once per row and column (see KenKenSolver.exact_cover).
+
+
+class ExactCover:
+    """Exact cover problem held as a dancing-links matrix.
+
+    options is a list of column lists. Columns below n_primary must be
+    covered exactly once, the others at most once. Nodes live in parallel
+    lists: node 0 is the root, nodes 1..n_columns the column headers, then
+    one node per option entry. Solutions are lists of option indices.
+    """
+
+    def __init__(self, n_columns, options, n_primary=None):
+        if n_primary is None:
+            n_primary = n_columns
+        n_headers = n_columns + 1
+        self.left = left = list(range(-1, n_headers - 1))
+        self.right = right = list(range(1, n_headers + 1))
+        self.up = up = list(range(n_headers))
+        self.down = down = list(range(n_headers))
+        self.column = list(range(n_headers))
+        self.option = [-1] * n_headers
+        self.sizes = [0] * n_headers
+        # Primary headers form the ring searched from the root; secondary
+        # headers point at themselves, so they are never chosen
+        left[0] = n_primary
+        right[n_primary] = 0
+        for j in range(n_primary + 1, n_headers):
+            left[j] = right[j] = j
+
+        for i, columns in enumerate(options):
+            first = len(left)
+            for j in columns:
+                if not 0 <= j < n_columns:
+                    raise ValueError(f"option {i} names column {j} of {n_columns}")
+                header = j + 1
+                node = len(left)
+                left.append(node - 1)
+                right.append(node + 1)
+                up.append(up[header])
+                down.append(header)
+                down[up[header]] = node
+                up[header] = node
+                self.column.append(header)
+                self.option.append(i)
+                self.sizes[header] += 1
+            if len(left) > first:
+                left[first] = len(left) - 1
+                right[-1] = first
+        self.solution = []
+
+    def _cover(self, c):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, sizes = self.column, self.sizes
+        right[left[c]] = right[c]
+        left[right[c]] = left[c]
+        i = down[c]
+        while i != c:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                sizes[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, c):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, sizes = self.column, self.sizes
+        i = up[c]
+        while i != c:
+            j = left[i]
+            while j != i:
+                sizes[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[c]] = c
+        left[right[c]] = c
+
+    def _search(self, limit, found):
+        """Count solutions up to limit, appending them to found unless it is None."""
+        right, down, sizes = self.right, self.down, self.sizes
+        c = right[0]
+        if c == 0:
+            if found is not None:
+                found.append(self.solution[:])
+            return 1
+        # The primary column with the fewest options left
+        best = sizes[c]
+        j = right[c]
+        while j != 0 and best > 1:
+            if sizes[j] < best:
+                c, best = j, sizes[j]
+            j = right[j]
+        if best == 0:
+            return 0
+
+        column = self.column
+        total = 0
+        self._cover(c)
+        r = down[c]
+        while r != c and total < limit:
+            self.solution.append(self.option[r])
+            j = right[r]
+            while j != r:
+                self._cover(column[j])
+                j = right[j]
+            total += self._search(limit - total, found)
+            j = self.left[r]
+            while j != r:
+                self._uncover(column[j])
+                j = self.left[j]
+            self.solution.pop()
+            r = down[r]
+        self._uncover(c)
+        return total
+
+    def solve(self, limit=1):
+        """Up to limit solutions, as lists of option indices."""
+        found = []
+        self._search(limit, found)
+        return found
+
+    def count(self, limit=2):
+        """Number of solutions, counting stops at limit."""
+        return self._search(limit, None)
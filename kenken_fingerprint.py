@@ -0,0 +1,171 @@
+import argparse
+import hashlib
+import re
+import sys
+
+from kenken_parser import (SOLUTION_PREFIX, UPDATED_COMBOS_PATTERN, VALID_COMBOS_PREFIX,
+                           format_solution_line, parse_solution_line, read_puzzle)
+from kenken_solver import parse_operation
+
+# Canonical fingerprints of puzzles: equal for puzzles that differ only in
+# the order of their cages or by one of the 8 symmetries of the square, and
+# stable across runs and machines (no Python hash()).
+
+# Bump when the canonical form changes, so old fingerprints stop matching
+FINGERPRINT_VERSION = 1
+# The 8 symmetries of the square as (transpose, flip rows, flip columns),
+# applied in that order; index 0 is the identity
+SYMMETRIES = tuple((transpose, flip_rows, flip_cols)
+                   for transpose in (False, True)
+                   for flip_rows in (False, True)
+                   for flip_cols in (False, True))
+# Cells in log lines, written "(r,c)" or "(r, c)"
+LOG_CELL_PATTERN = re.compile(r'\((\d+),( ?)(\d+)\)')
+CAGE_LINE_PREFIX = 'Cage-line elim:'
+UPDATED_COMBOS_PREFIX = 'Updated combos for'
+
+
+def transform_cell(cell, size, symmetry):
+    """The cell a symmetry (an index into SYMMETRIES) moves cell to."""
+    transpose, flip_rows, flip_cols = SYMMETRIES[symmetry]
+    row, col = cell
+    if transpose:
+        row, col = col, row
+    if flip_rows:
+        row = size - 1 - row
+    if flip_cols:
+        col = size - 1 - col
+    return row, col
+
+
+def inverse(symmetry):
+    """Index of the symmetry undoing the given one."""
+    transpose, flip_rows, flip_cols = SYMMETRIES[symmetry]
+    if transpose:
+        # Flipping rows after a transpose is flipping columns before it
+        flip_rows, flip_cols = flip_cols, flip_rows
+    return SYMMETRIES.index((transpose, flip_rows, flip_cols))
+
+
+def compose(first, second):
+    """Index of the symmetry applying first, then second."""
+    # Cells of a 3x3 grid off both diagonals and the middle lines tell
+    # all 8 symmetries apart
+    probe = ((0, 1), (1, 0))
+    moved = [transform_cell(transform_cell(cell, 3, first), 3, second) for cell in probe]
+    for symmetry in range(len(SYMMETRIES)):
+        if [transform_cell(cell, 3, symmetry) for cell in probe] == moved:
+            return symmetry
+
+
+def cage_entries(puzzle_data):
+    """(operation, target, cells) per cage, with the hint parsed so '3' and
+    '3=' or 'x' and '*' compare equal."""
+    return [parse_operation(cage['operation'], len(cage['cells'])) + (cage['cells'],)
+            for cage in puzzle_data['cages']]
+
+
+def canonical_form(puzzle_data):
+    """(form, symmetry): the least of the puzzle's 8 transformed cage lists,
+    each cage as (sorted cells, operation, target) and the list sorted, and
+    the index of the symmetry giving it (the first one, on ties).
+
+    Raises ValueError for an unknown cage operation.
+    """
+    size = puzzle_data['info']['size']
+    cages = cage_entries(puzzle_data)
+    best = None
+    for symmetry in range(len(SYMMETRIES)):
+        form = sorted(
+            (tuple(sorted(transform_cell(cell, size, symmetry) for cell in cells)), operation, target)
+            for operation, target, cells in cages)
+        if best is None or form < best[0]:
+            best = (form, symmetry)
+    return best
+
+
+def fingerprint_of_form(puzzle_data, form):
+    info = puzzle_data['info']
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"kenken-fingerprint/{FINGERPRINT_VERSION}\n".encode())
+    digest.update(f"{info['size']}|{' '.join(map(str, sorted(info['allowed_numbers'])))}\n".encode())
+    for cells, operation, target in form:
+        text = " ".join(f"{row},{col}" for row, col in cells)
+        digest.update(f"{operation} {target}: {text}\n".encode())
+    return digest.hexdigest()
+
+
+def fingerprint(puzzle_data):
+    """Hex fingerprint of a puzzle, invariant to cage order and grid symmetry."""
+    form, _ = canonical_form(puzzle_data)
+    return fingerprint_of_form(puzzle_data, form)
+
+
+def cell_table(size, symmetry):
+    """Each way a cell is written in a log ('(r,c)' and '(r, c)') -> the
+    same text for the cell the symmetry moves it to."""
+    table = {}
+    for row in range(size):
+        for col in range(size):
+            new_row, new_col = transform_cell((row, col), size, symmetry)
+            for space in ('', ' '):
+                table[f"({row},{space}{col})"] = f"({new_row},{space}{new_col})"
+    return table
+
+
+def map_log_line(line, size, symmetry, table=None):
+    """A solver log line with its cells moved by a symmetry.
+
+    Combo lists are left alone ('(1, 3)' there is a pair of values), the
+    Solution: line is rewritten in row-major order and cage-line
+    eliminations swap 'row' and 'column' when the symmetry transposes.
+    table is cell_table(size, symmetry), for callers mapping many lines.
+    """
+    if symmetry == 0 or line.startswith(VALID_COMBOS_PREFIX):
+        return line
+    if table is None:
+        table = cell_table(size, symmetry)
+
+    def move(match):
+        return table[match.group()]
+
+    if line.startswith(SOLUTION_PREFIX):
+        solution = parse_solution_line(line)
+        return format_solution_line({transform_cell(cell, size, symmetry): value
+                                     for cell, value in solution.items()})
+    if line.startswith(UPDATED_COMBOS_PREFIX) and UPDATED_COMBOS_PATTERN.match(line):
+        description, separator, combos = line.partition("':")
+        return LOG_CELL_PATTERN.sub(move, description) + separator + combos
+    line = LOG_CELL_PATTERN.sub(move, line)
+    if SYMMETRIES[symmetry][0] and line.startswith(CAGE_LINE_PREFIX):
+        line = re.sub(r' by (row|column) ', lambda m: ' by column ' if m.group(1) == 'row'
+                      else ' by row ', line, count=1)
+    return line
+
+
+def map_log(lines, size, symmetry):
+    """map_log_line over a whole log."""
+    if symmetry == 0:
+        return list(lines)
+    table = cell_table(size, symmetry)
+    return [map_log_line(line, size, symmetry, table) for line in lines]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print canonical puzzle fingerprints")
+    parser.add_argument("inputs", nargs='+', help="Puzzle definitions or descriptors")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.inputs:
+        try:
+            print(f"{fingerprint(read_puzzle(path))}  {path}")
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Error fingerprinting {path}: {e}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+import argparse
+import collections
+import csv
+import itertools
+import os
+import sys
+import time
+
+from kenken_parser import (ASSIGNMENT, CAGE_ANALYSIS, INDEXING_CHOICES, DescriptorStream)
+
+# Difficulty grades of solver logs, scored by which deduction rules the log
+# needs, how often, and how long it works before placing the next value.
+
+# Rules counted per log, as the parser names them (Step.rule)
+RULES = ("naked_single", "cage_single_combo", "peer_elim", "perm_prune", "pruned",
+         "combo_update", "cage_line_elim", "branch")
+# Points per application, by how far down the solver's rule order
+# (KenKenSolver.propagate) the rule sits; peer eliminations follow from
+# assignments and cost nothing
+RULE_WEIGHTS = {
+    "naked_single": 1,
+    "cage_single_combo": 2,
+    "peer_elim": 0,
+    "perm_prune": 2,
+    "pruned": 2,
+    "combo_update": 3,
+    "cage_line_elim": 6,
+    # Guesses of the exact-cover search; any of them grades the log 'search'
+    "branch": 0,
+}
+# Points per step of the longest chain of deductions between two placements
+CHAIN_WEIGHT = 1
+# Highest score of each grade (scores are per cell), checked in order; logs
+# whose rules stall before the grid is full, or that branch, are graded 'search'
+GRADES = (("easy", 4.0), ("medium", 6.5), ("hard", 9.0), ("expert", float("inf")))
+UNSOLVED_GRADE = "search"
+
+COLUMNS = (("path", "size", "cages", "steps") + RULES +
+           ("cage_line_rounds", "longest_chain", "solved", "score", "grade", "error"))
+# Descriptors per task sent to a worker process
+CHUNK_SIZE = 64
+
+
+def grade_for(score, solved):
+    if not solved:
+        return UNSOLVED_GRADE
+    for grade, limit in GRADES:
+        if score <= limit:
+            return grade
+    return GRADES[-1][0]
+
+
+def grade_steps(puzzle_data, steps):
+    """Score one solver log from its step stream; returns a dict of COLUMNS.
+
+    Besides the count of each rule, cage_line_rounds is the number of runs of
+    cage-line eliminations (the solver's last resort before stalling) and
+    longest_chain the most deductions made between two placements (or
+    before the first). The score is the weighted rule counts plus the
+    longest chain, per cell, so grades compare across grid sizes.
+    """
+    size = puzzle_data['info']['size']
+    counts = dict.fromkeys(RULES, 0)
+    placed = set()
+    steps_seen = 0
+    chain = longest_chain = 0
+    rounds = 0
+    in_round = False
+    for step in steps:
+        steps_seen += 1
+        rule = step.rule
+        if rule in counts:
+            counts[rule] += 1
+        if step.type == ASSIGNMENT:
+            placed.add(step.cell)
+            chain = 0
+        elif step.type != CAGE_ANALYSIS and rule != 'peer_elim':
+            chain += 1
+            if chain > longest_chain:
+                longest_chain = chain
+        if rule == 'cage_line_elim':
+            if not in_round:
+                rounds += 1
+            in_round = True
+        elif rule != 'peer_elim':
+            in_round = False
+
+    cells = size * size
+    solved = len(placed) == cells
+    points = sum(RULE_WEIGHTS[rule] * count for rule, count in counts.items())
+    score = round((points + CHAIN_WEIGHT * longest_chain) / cells, 3) if cells else 0.0
+    row = {
+        'size': size,
+        'cages': len(puzzle_data['cages']),
+        'steps': steps_seen,
+        'cage_line_rounds': rounds,
+        'longest_chain': longest_chain,
+        'solved': int(solved),
+        'score': score,
+        'grade': grade_for(score, solved and not counts['branch']),
+        'error': '',
+    }
+    row.update(counts)
+    return row
+
+
+def error_row(error):
+    row = dict.fromkeys(COLUMNS, '')
+    row['grade'] = 'error'
+    row['error'] = str(error)
+    return row
+
+
+def grade_descriptor(path, indexing=None):
+    """Grade one descriptor file, streaming its log; errors go in the row."""
+    try:
+        with DescriptorStream(path, indexing) as stream:
+            if not stream.puzzle_data or not stream.puzzle_data['info'].get('size'):
+                raise ValueError("no puzzle header")
+            row = grade_steps(stream.puzzle_data, stream)
+    except (OSError, ValueError) as e:
+        row = error_row(e)
+    row['path'] = path
+    return row
+
+
+def _grade_chunk(job):
+    paths, indexing = job
+    return [grade_descriptor(path, indexing) for path in paths]
+
+
+def _grade_shard(job):
+    corpus, first, stop, indexing = job
+    from kenken_corpus import CorpusIndex, parse_text
+
+    rows = []
+    # The parent built the index; workers only map it
+    with CorpusIndex(corpus) as index:
+        for entry, text in index.iter_texts(first, stop):
+            try:
+                puzzle_data, _, steps = parse_text(text, indexing)
+                if not puzzle_data['info'].get('size'):
+                    raise ValueError("no puzzle header")
+                row = grade_steps(puzzle_data, steps)
+            except ValueError as e:
+                row = error_row(e)
+            row['path'] = f"{corpus}#{entry.number}"
+            rows.append(row)
+    return rows
+
+
+def _chunks(paths, size):
+    chunk = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def grade_descriptors(paths, workers=None, chunk_size=CHUNK_SIZE, indexing=None):
+    """Yield one row per descriptor, in input order, across processes.
+
+    paths may be any iterable, e.g. a generator over millions of files: it is
+    consumed a chunk at a time and only a few chunks per worker are in
+    flight, so memory stays flat however large the corpus.
+    """
+    jobs = ((chunk, indexing) for chunk in _chunks(paths, chunk_size))
+    yield from _run_jobs(_grade_chunk, jobs, workers)
+
+
+def grade_corpus(corpus, workers=None, chunk_size=CHUNK_SIZE, indexing=None):
+    """Yield one row per puzzle of a multi-puzzle corpus file (see
+    kenken_corpus), in corpus order; rows' path is corpus#number.
+
+    The corpus index is split into byte ranges of about chunk_size puzzles
+    and each worker task reads its range with one seek.
+    """
+    from kenken_corpus import load_index
+
+    with load_index(corpus) as index:
+        shards = index.shards(max(1, -(-len(index) // chunk_size)))
+    jobs = ((corpus, first, stop, indexing) for first, stop in shards)
+    yield from _run_jobs(_grade_shard, jobs, workers)
+
+
+def _run_jobs(function, jobs, workers):
+    """Yield the rows of function(job) per job, in order, across processes."""
+    if workers == 1:
+        for job in jobs:
+            yield from function(job)
+        return
+    # Imported here: multiprocessing is most of this module's import time
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = collections.deque()
+        limit = 2 * (workers or os.cpu_count() or 1)
+        for job in jobs:
+            in_flight.append(pool.submit(function, job))
+            if len(in_flight) >= limit:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def iter_descriptor_paths(inputs):
+    """Lazily expand inputs into descriptor paths.
+
+    Directories yield their *.txt files as the file system lists them
+    (sorting would hold every name at once), '-' reads one path per line
+    from stdin, and anything else goes through kenken_batch_render's
+    file and glob expansion.
+    """
+    from kenken_batch_render import find_descriptors
+
+    for item in inputs:
+        if item == '-':
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    yield line
+        elif os.path.isdir(item):
+            with os.scandir(item) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.txt') and entry.is_file():
+                        yield entry.path
+        else:
+            yield from find_descriptors([item])
+
+
+def write_csv(rows, output_file):
+    """Write rows to a CSV file (atomically); returns the rows written."""
+    tmp_path = f"{output_file}.tmp{os.getpid()}"
+    written = 0
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+    os.replace(tmp_path, output_file)
+    return written
+
+
+def write_parquet(rows, output_file, batch_rows=65536):
+    """Write rows to a Parquet file in row groups of batch_rows; needs pyarrow."""
+    # pyarrow is optional and only needed for Parquet output
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    text = ('path', 'grade', 'error')
+    schema = pa.schema([(name, pa.string() if name in text else
+                         pa.float64() if name == 'score' else pa.int32()) for name in COLUMNS])
+    tmp_path = f"{output_file}.tmp{os.getpid()}"
+    written = 0
+    with pq.ParquetWriter(tmp_path, schema) as writer:
+        for batch in _chunks(rows, batch_rows):
+            for row in batch:
+                if row['grade'] == 'error':
+                    # Error rows have no metrics; '' is only valid in text columns
+                    row.update((name, None) for name in COLUMNS if name not in text)
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+    os.replace(tmp_path, output_file)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade KenKen solver logs by difficulty")
+    parser.add_argument("inputs", nargs='+',
+                        help="Descriptor files, directories, glob patterns or - for a list on stdin")
+    parser.add_argument("--output", "-o", default="grades.csv",
+                        help="Summary file; .parquet writes Parquet (needs pyarrow), else CSV")
+    parser.add_argument("--workers", "-j", type=int, default=None,
+                        help="Worker processes (default: CPU count, 1 to stay in-process)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="Descriptors per worker task")
+    parser.add_argument("--indexing", choices=list(INDEXING_CHOICES), default="auto",
+                        help="Coordinate base of the solver logs")
+    parser.add_argument("--corpus", action="store_true",
+                        help="Inputs are multi-puzzle corpus files (see kenken_corpus), "
+                             "sharded across the workers by byte range")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    indexing = INDEXING_CHOICES[args.indexing]
+    if args.corpus:
+        from kenken_corpus import load_index
+        for corpus in args.inputs:
+            # Index every corpus up front so a bad one fails before any output
+            try:
+                load_index(corpus).close()
+            except (OSError, ValueError) as e:
+                print(f"Error indexing corpus '{corpus}': {e}")
+                sys.exit(1)
+        results = itertools.chain.from_iterable(
+            grade_corpus(corpus, args.workers, args.chunk_size, indexing)
+            for corpus in args.inputs)
+    else:
+        paths = iter_descriptor_paths(args.inputs)
+        first = next(paths, None)
+        if first is None:
+            print("Error: no descriptors found.")
+            sys.exit(1)
+        results = grade_descriptors(itertools.chain([first], paths), args.workers,
+                                    args.chunk_size, indexing)
+    grades = collections.Counter()
+
+    def tally(rows):
+        for row in rows:
+            grades[row['grade']] += 1
+            if row['error']:
+                print(f"[FAIL] {row['path']}: {row['error']}")
+            yield row
+
+    rows = tally(results)
+    write = write_parquet if args.output.endswith('.parquet') else write_csv
+    total = write(rows, args.output)
+    elapsed = time.perf_counter() - start
+    print(f"Graded {total} {'puzzles' if args.corpus else 'descriptors'} in {elapsed:.2f}s ({total / elapsed:.0f}/s) "
+          f"into {args.output}")
+    order = [grade for grade, _ in GRADES] + [UNSOLVED_GRADE, 'error']
+    print(", ".join(f"{grade}: {grades[grade]}" for grade in order if grades[grade]))
+
+
+if __name__ == "__main__":
+    main()
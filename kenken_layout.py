@@ -0,0 +1,48 @@
+import math
+
+# Hex values of the Manim colors KenKenGenerator cycles through the cages
+# (RED, YELLOW, GREEN, ORANGE, PURPLE, PINK, BLUE_A, GREEN_A, TEAL, MAROON,
+# LIGHT_BROWN, DARK_BLUE, GOLD, GRAY), for renderers that do not load Manim
+CAGE_COLORS = ("#FC6255", "#FFFF00", "#83C167", "#FF862F", "#9A72AC", "#D147BD", "#C7E9F1",
+               "#C9E2AE", "#5CD0B3", "#C55F73", "#CD853F", "#236B8E", "#F0AC5F", "#888888")
+
+
+def assign_cage_colors(cages, colors=CAGE_COLORS):
+    """Give each cage a 'color', cycling through colors in cage order."""
+    for i, cage in enumerate(cages):
+        cage['color'] = colors[i % len(colors)]
+
+
+class GridLayout:
+    """Where the grid, cells and cage labels go, in Manim scene units.
+
+    The grid is centred on the origin with y pointing up, as construct()
+    draws it.
+    """
+    __slots__ = ('size', 'cell_size', 'grid_offset')
+
+    def __init__(self, size):
+        self.size = size
+        self.cell_size = (0.4 + 2.4 / size)
+        self.grid_offset = size * self.cell_size / 2
+
+    def cell_center(self, row, col):
+        x = col * self.cell_size - self.grid_offset + self.cell_size/2
+        y = self.grid_offset - row * self.cell_size - self.cell_size/2
+        return [x, y, 0]
+
+    def label_position(self, cage):
+        """Centre of a cage's operation label, in the anchor cell's top-left corner."""
+        anchor_row, anchor_col = cage["anchor"]
+        anchor_center = self.cell_center(anchor_row, anchor_col)
+        return [
+            anchor_center[0] - self.cell_size/2 + 0.05 + len(cage["operation"]) * 0.05,
+            anchor_center[1] + self.cell_size/2 - 0.15,
+            0
+        ]
+
+    def label_font_size(self):
+        return math.ceil(13 * self.cell_size)
+
+    def possibilities_font_size(self):
+        return 10 * self.cell_size
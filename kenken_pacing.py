@@ -0,0 +1,155 @@
+import argparse
+import sys
+
+from kenken_coalesce import STEP_GROUP, coalesce_steps
+from kenken_parser import ASSIGNMENT, CAGE_ANALYSIS, INDEXING_CHOICES, parse_descriptor
+from kenken_segments import is_drawn
+
+# Seconds of each beat at pace 1, as KenKenGenerator plays them (one second
+# per play() plus its waits)
+INTRO_SECONDS = 4.0
+OUTRO_SECONDS = 4.0
+# Each celebration pulse is two plays, scaling a value up and back down
+PULSE_SECONDS = 0.1
+BEAT_SECONDS = {
+    STEP_GROUP: 4.0,
+    ASSIGNMENT: 6.5,
+    CAGE_ANALYSIS: 3.0,
+}
+ELIMINATION_SECONDS = 5.0
+
+# Slowest pace the planner speeds up to before batching runs of steps, and
+# before dropping beats; below MIN_PACE only key beats are left to shrink
+BATCH_PACE = 0.5
+MIN_PACE = 0.25
+# Caps on the steps per batch tried in turn, batching no more than needed
+GROUP_LIMITS = (2, 3, 4, 6, 8, 12, 16, None)
+
+
+def beat_seconds(beat, show_cage_analysis=False):
+    """Seconds the beat lasts at pace 1; 0 for steps that are not drawn."""
+    if not is_drawn(beat, show_cage_analysis):
+        return 0.0
+    return BEAT_SECONDS.get(beat.type, ELIMINATION_SECONDS)
+
+
+def outro_seconds(size):
+    """The celebration pulses every value of the solved grid."""
+    return OUTRO_SECONDS + 2 * PULSE_SECONDS * size * size
+
+
+def is_key(beat):
+    """Assignments, alone or as coalesced assignment runs, are never dropped."""
+    if beat.type == STEP_GROUP:
+        return beat.kind == 'assignment'
+    return beat.type == ASSIGNMENT
+
+
+def beat_value(beat):
+    """How much a droppable beat shows: the cells it changes."""
+    if beat.type == STEP_GROUP:
+        return len(beat.cells())
+    if beat.type == CAGE_ANALYSIS:
+        return 0
+    return 1
+
+
+class TimingPlan:
+    """How a log fits a target duration.
+
+    beats is the list of (beat, shown) pairs to play in order; beats that are
+    not shown are applied to the grid without animation and appear with the
+    next shown beat. pace scales every run_time and wait of the video.
+    """
+    __slots__ = ('beats', 'pace', 'natural_seconds', 'seconds', 'batched', 'dropped',
+                 'show_cage_analysis')
+
+    def __init__(self, beats, pace, natural_seconds, seconds, batched, dropped,
+                 show_cage_analysis=False):
+        self.beats = beats
+        self.pace = pace
+        self.natural_seconds = natural_seconds
+        self.seconds = seconds
+        self.batched = batched
+        self.dropped = dropped
+        self.show_cage_analysis = show_cage_analysis
+
+    def summary(self):
+        shown = sum(1 for beat, visible in self.beats
+                    if visible and is_drawn(beat, self.show_cage_analysis))
+        return (f"Timing plan: {self.natural_seconds:.0f}s at normal pace -> {self.seconds:.0f}s "
+                f"at pace {self.pace:.2f}; {shown} beats shown"
+                f"{', runs batched' if self.batched else ''}"
+                f"{f', {self.dropped} low-value beats dropped' if self.dropped else ''}")
+
+
+def plan_timing(steps, size, target_seconds, coalesce=False, show_cage_analysis=False):
+    """Plan a video of the steps lasting at most target_seconds.
+
+    Works down a ladder until the video fits: the normal pace, a faster pace
+    (down to BATCH_PACE), runs of related steps batched into single beats
+    (see kenken_coalesce) in ever larger batches, full batching at down to
+    MIN_PACE, and then the elimination beats that change the fewest cells
+    dropped. Assignments always stay on screen; if they alone do not fit at
+    MIN_PACE the pace drops below it. Shown cage analyses are droppable beats.
+    """
+    steps = list(steps)
+
+    def seconds(beat):
+        return beat_seconds(beat, show_cage_analysis)
+
+    fixed = INTRO_SECONDS + outro_seconds(size)
+    beats = list(coalesce_steps(steps)) if coalesce else steps
+    natural = total = fixed + sum(map(seconds, beats))
+    batched = coalesce
+    if natural <= target_seconds:
+        return TimingPlan([(beat, True) for beat in beats], 1.0, natural, natural, batched, 0,
+                          show_cage_analysis)
+
+    limits = () if batched else GROUP_LIMITS
+    for max_group in limits:
+        if total * BATCH_PACE <= target_seconds:
+            break
+        beats = list(coalesce_steps(steps, max_group))
+        batched = True
+        total = fixed + sum(map(seconds, beats))
+
+    hidden = set()
+    if total * MIN_PACE > target_seconds:
+        droppable = sorted((beat_value(beat), i) for i, beat in enumerate(beats)
+                           if is_drawn(beat, show_cage_analysis) and not is_key(beat))
+        for _, i in droppable:
+            if total * MIN_PACE <= target_seconds:
+                break
+            hidden.add(i)
+            total -= seconds(beats[i])
+
+    pace = min(1.0, target_seconds / total)
+    plan = [(beat, i not in hidden) for i, beat in enumerate(beats)]
+    return TimingPlan(plan, pace, natural, total * pace, batched, len(hidden), show_cage_analysis)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show how a solving log fits a target video duration")
+    parser.add_argument("input_file", help="Descriptor file with puzzle, solver log and solution")
+    parser.add_argument("--target-duration", type=float, required=True, metavar="SECONDS",
+                        help="Length the video should fit in")
+    parser.add_argument("--coalesce", action="store_true",
+                        help="Batch runs of related steps even when the log fits")
+    parser.add_argument("--show-cage-analysis", action="store_true",
+                        help="Count a beat per cage analysis (see kenken_generator)")
+    parser.add_argument("--indexing", choices=list(INDEXING_CHOICES), default="auto",
+                        help="Coordinate base of the solver log")
+    args = parser.parse_args()
+
+    puzzle_data, solution, steps = parse_descriptor(args.input_file, INDEXING_CHOICES[args.indexing])
+    if not puzzle_data:
+        print(f"Error: no puzzle found in {args.input_file}")
+        sys.exit(1)
+    plan = plan_timing(steps, puzzle_data['info']['size'], args.target_duration, args.coalesce,
+                       args.show_cage_analysis)
+    print(plan.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,586 @@
+import contextlib
+import gc
+import itertools
+import os
+import re
+
+BANNER = "Hello! Starting KenKen solver."
+
+# Step type names, shared with the renderer in kenken_scene.py
+CAGE_ANALYSIS = 'cage_analysis'
+CONSTRAINT_PROPAGATION = 'constraint_propagation'
+CAGE_LINE_ELIMINATION = 'cage_line_elimination'
+ASSIGNMENT = 'assignment'
+COMBO_UPDATE = 'combo_update'
+
+# Integer codes of the step types, for array-backed storage of steps
+STEP_TYPE_CODES = {
+    CAGE_ANALYSIS: 0,
+    CONSTRAINT_PROPAGATION: 1,
+    CAGE_LINE_ELIMINATION: 2,
+    ASSIGNMENT: 3,
+    COMBO_UPDATE: 4,
+}
+
+
+def values_mask(values):
+    """Candidate list -> bitmask with bit v set for each value v."""
+    mask = 0
+    for value in values:
+        mask |= 1 << value
+    return mask
+
+
+def mask_values(mask):
+    """Bitmask -> sorted candidate list."""
+    return [value for value in range(mask.bit_length()) if mask >> value & 1]
+
+
+class Step:
+    """Base class for a parsed solving step."""
+    __slots__ = ('description', 'rule')
+    type = None
+    type_code = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields())
+        return f"{self.__class__.__name__}({fields})"
+
+    def __eq__(self, other):
+        return (self.__class__ is other.__class__ and
+                all(getattr(self, name) == getattr(other, name) for name in self._fields()))
+
+    def _fields(self):
+        names = []
+        for cls in reversed(type(self).__mro__):
+            names.extend(getattr(cls, '__slots__', ()))
+        return names
+
+
+class CageAnalysis(Step):
+    """'The cage covering ...' line, optionally followed by its valid combos."""
+    __slots__ = ('cells', 'combos')
+    type = CAGE_ANALYSIS
+    type_code = STEP_TYPE_CODES[CAGE_ANALYSIS]
+
+    def __init__(self, description, cells, combos=None, rule='cage'):
+        self.description = description
+        self.rule = rule
+        self.cells = cells
+        self.combos = combos
+
+
+class ConstraintPropagation(Step):
+    """'Perm-prune' or 'Pruned' line narrowing the candidates of one cell.
+
+    The candidates before and after are kept as bitmasks (see values_mask);
+    old_values and new_values give them back as fresh sorted lists.
+    """
+    __slots__ = ('cell', 'old_mask', 'new_mask')
+    type = CONSTRAINT_PROPAGATION
+    type_code = STEP_TYPE_CODES[CONSTRAINT_PROPAGATION]
+
+    def __init__(self, description, cell, old_mask, new_mask, rule='perm_prune'):
+        self.description = description
+        self.rule = rule
+        self.cell = cell
+        self.old_mask = old_mask
+        self.new_mask = new_mask
+
+    @property
+    def old_values(self):
+        return mask_values(self.old_mask)
+
+    @property
+    def new_values(self):
+        return mask_values(self.new_mask)
+
+
+class CageLineElimination(Step):
+    """'Cage-line elim:' or 'Peer elim:' line removing one candidate from a cell."""
+    __slots__ = ('cell', 'value_removed')
+    type = CAGE_LINE_ELIMINATION
+    type_code = STEP_TYPE_CODES[CAGE_LINE_ELIMINATION]
+
+    def __init__(self, description, cell, value_removed, rule='cage_line_elim'):
+        self.description = description
+        self.rule = rule
+        self.cell = cell
+        self.value_removed = value_removed
+
+
+class Assignment(Step):
+    """'Cage-single-combo:', 'Naked single:' or 'Branch:' line fixing a cell's
+    value; branches are guesses of the solver's exact-cover search."""
+    __slots__ = ('cell', 'value')
+    type = ASSIGNMENT
+    type_code = STEP_TYPE_CODES[ASSIGNMENT]
+
+    def __init__(self, description, cell, value, rule='naked_single'):
+        self.description = description
+        self.rule = rule
+        self.cell = cell
+        self.value = value
+
+
+class ComboUpdate(Step):
+    """'Updated combos for' line narrowing the combos of a cage."""
+    __slots__ = ('cage_description', 'combos')
+    type = COMBO_UPDATE
+    type_code = STEP_TYPE_CODES[COMBO_UPDATE]
+
+    def __init__(self, description, cage_description, combos, rule='combo_update'):
+        self.description = description
+        self.rule = rule
+        self.cage_description = cage_description
+        self.combos = combos
+
+
+# Precompiled patterns, one per log line type. Every log line type has a unique
+# 6-character prefix, so the parser finds the pattern with one dict lookup
+# and runs only that pattern. Coordinates are captured as a single "r,c" group
+# so they can be resolved through the CELLS memo instead of two int() calls.
+PREFIX_LENGTH = 6
+CELL_PATTERN = re.compile(r'\((\d+),(\d+)\)')
+CAGE_ANALYSIS_PATTERN = re.compile(r'The cage covering')
+PERM_PRUNE_PATTERN = re.compile(
+    r'Perm-prune(?:.*?\((\d+, \d+)\))?(?:.*?\[([0-9, ]*)\]→\[([0-9, ]*)\])?')
+PRUNED_PATTERN = re.compile(r'Pruned.*?\((\d+, \d+)\): \[(.*?)\]→\[(.*?)\]')
+CAGE_LINE_PATTERN = re.compile(r'Cage-line elim:(?:.*?remove (\d+))?(?:.*?from \((\d+,\d+)\))?')
+PEER_ELIM_PATTERN = re.compile(r'Peer elim:.*?remove (\d+) from \((\d+, \d+)\)')
+CAGE_SINGLE_COMBO_PATTERN = re.compile(r'Cage-single-combo:.*?Cell \((\d+,\d+)\) = (\d+)')
+NAKED_SINGLE_PATTERN = re.compile(r'Naked single:.*?Cell \((\d+,\d+)\) = (\d+)')
+BRANCH_PATTERN = re.compile(r'Branch:.*?Cell \((\d+,\d+)\) = (\d+)')
+UPDATED_COMBOS_PATTERN = re.compile(r"Updated combos for (.*?):\s*(.*)$")
+SOLUTION_ENTRY_PATTERN = re.compile(r'\(\s*(\d+)\s*,\s*(\d+)\s*\):\s*(\d+)')
+
+
+class _Memo(dict):
+    """dict that fills in missing keys with convert(key)."""
+
+    def __init__(self, convert):
+        super().__init__()
+        self.convert = convert
+
+    def __missing__(self, key):
+        value = self[key] = self.convert(key)
+        return value
+
+
+def _to_cell(text):
+    row, col = text.split(',')
+    return (int(row), int(col))
+
+
+def _to_mask(text):
+    return values_mask(map(int, text.split(','))) if text.strip() else 0
+
+
+# Logs only ever mention a few dozen distinct cells, values and candidate lists,
+# so each distinct string is converted once and the results are shared.
+CELLS = _Memo(_to_cell)
+NUMBERS = _Memo(int)
+VALUE_MASKS = _Memo(_to_mask)
+
+
+def parse_cage_line(line):
+    """Parse a 'hint,cells,anchor' line into a cage dict, or None if malformed."""
+    # The cell list itself contains commas, so split at the 2nd comma from the right
+    split_index = line.rfind(',', 0, line.rfind(','))
+    if split_index <= 0 or ',' not in line[:split_index]:
+        return None
+    operation, cells_str = line[:split_index].strip().split(',', 1)
+    anchor_str = line[split_index + 1:].strip()
+
+    cells = []
+    for cell_str in cells_str.split(';'):
+        cell_str = cell_str.strip()
+        if cell_str.startswith('(') and cell_str.endswith(')'):
+            coords = cell_str[1:-1].split(',')
+            if len(coords) == 2:
+                cells.append((int(coords[0]), int(coords[1])))
+
+    anchor = None
+    if anchor_str.startswith('(') and anchor_str.endswith(')'):
+        coords = anchor_str[1:-1].split(',')
+        if len(coords) == 2:
+            anchor = (int(coords[0]), int(coords[1]))
+
+    if not cells:
+        return None
+    return {
+        'operation': operation,
+        'cells': cells,
+        'anchor': anchor or cells[0]
+    }
+
+
+def parse_header_line(line, puzzle_info, cages):
+    """Apply one puzzle definition line to puzzle_info/cages."""
+    if not line or line.startswith('Puzzle') or line.startswith('hint,cells,anchor'):
+        return
+    if line.startswith('size:'):
+        puzzle_info['size'] = int(line.split(':')[1].strip())
+    elif line.startswith('allowed_numbers:'):
+        puzzle_info['allowed_numbers'] = [int(x) for x in line.split(':')[1].split()]
+    else:
+        cage = parse_cage_line(line)
+        if cage:
+            cages.append(cage)
+
+
+def format_cage_line(cage):
+    """Inverse of parse_cage_line: 'hint,(r,c);(r,c),(r,c)'."""
+    cells = ";".join(f"({row},{col})" for row, col in cage['cells'])
+    anchor_row, anchor_col = cage['anchor']
+    return f"{cage['operation']},{cells},({anchor_row},{anchor_col})"
+
+
+def format_puzzle(puzzle_data):
+    """Puzzle definition lines in the format read by read_header."""
+    info = puzzle_data['info']
+    lines = [
+        f"size: {info['size']}",
+        "allowed_numbers: " + " ".join(map(str, info['allowed_numbers'])),
+        "hint,cells,anchor",
+    ]
+    lines.extend(format_cage_line(cage) for cage in puzzle_data['cages'])
+    return lines
+
+
+def format_solution_line(solution):
+    """Inverse of parse_solution_line, with cells in row-major order."""
+    return f"Solution: {dict(sorted(solution.items()))}"
+
+
+def parse_solution_line(line):
+    """Parse a 'Solution: {(r, c): v, ...}' line into a {(r, c): v} dict."""
+    return {
+        (int(row), int(col)): int(val)
+        for row, col, val in SOLUTION_ENTRY_PATTERN.findall(line)
+    }
+
+
+def _cage_analysis(line, match):
+    return CageAnalysis(line, [(int(r), int(c)) for r, c in CELL_PATTERN.findall(line)])
+
+
+def _perm_prune(line, match):
+    cell, old_values, new_values = match.groups()
+    return ConstraintPropagation(
+        line,
+        CELLS[cell] if cell else None,
+        VALUE_MASKS[old_values] if old_values is not None else 0,
+        VALUE_MASKS[new_values] if new_values is not None else 0,
+        'perm_prune')
+
+
+def _pruned(line, match):
+    cell, old_values, new_values = match.groups()
+    return ConstraintPropagation(
+        line, CELLS[cell], VALUE_MASKS[old_values], VALUE_MASKS[new_values],
+        'pruned')
+
+
+def _cage_line_elim(line, match):
+    value, cell = match.groups()
+    return CageLineElimination(
+        line,
+        CELLS[cell] if cell else None,
+        NUMBERS[value] if value else None,
+        'cage_line_elim')
+
+
+def _peer_elim(line, match):
+    value, cell = match.groups()
+    return CageLineElimination(line, CELLS[cell], NUMBERS[value], 'peer_elim')
+
+
+def _cage_single_combo(line, match):
+    cell, value = match.groups()
+    return Assignment(line, CELLS[cell], NUMBERS[value], 'cage_single_combo')
+
+
+def _naked_single(line, match):
+    cell, value = match.groups()
+    return Assignment(line, CELLS[cell], NUMBERS[value], 'naked_single')
+
+
+def _branch(line, match):
+    cell, value = match.groups()
+    return Assignment(line, CELLS[cell], NUMBERS[value], 'branch')
+
+
+def _updated_combos(line, match):
+    cage_description, combos = match.groups()
+    return ComboUpdate(line, cage_description.strip(), combos.strip())
+
+
+# Line prefix -> (pattern, builder). Lines whose pattern does not match are
+# dropped, like the lines the old startswith chain had no branch for.
+STEP_PATTERNS = {
+    'The cage covering': (CAGE_ANALYSIS_PATTERN, _cage_analysis),
+    'Perm-prune': (PERM_PRUNE_PATTERN, _perm_prune),
+    'Pruned': (PRUNED_PATTERN, _pruned),
+    'Cage-line elim:': (CAGE_LINE_PATTERN, _cage_line_elim),
+    'Peer elim:': (PEER_ELIM_PATTERN, _peer_elim),
+    'Cage-single-combo:': (CAGE_SINGLE_COMBO_PATTERN, _cage_single_combo),
+    'Naked single:': (NAKED_SINGLE_PATTERN, _naked_single),
+    'Branch:': (BRANCH_PATTERN, _branch),
+    'Updated combos for': (UPDATED_COMBOS_PATTERN, _updated_combos),
+}
+STEP_DISPATCH = {
+    prefix[:PREFIX_LENGTH]: (pattern.match, build)
+    for prefix, (pattern, build) in STEP_PATTERNS.items()
+}
+CAGE_ANALYSIS_PREFIX = 'The cage covering'
+VALID_COMBOS_PREFIX = 'Valid combos:'
+SOLUTION_PREFIX = 'Solution:'
+
+
+def parse_step_line(line):
+    """Parse one stripped solver log line into a Step, or None if it carries no step.
+
+    'Valid combos:' and 'Solution:' lines are handled by parse_lines because they
+    refer to the previous step or to the whole log.
+    """
+    entry = STEP_DISPATCH.get(line[:PREFIX_LENGTH])
+    if entry is None:
+        return None
+    match, build = entry
+    found = match(line)
+    return build(line, found) if found else None
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    """Suspend the cyclic GC while building many small acyclic step records."""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def read_header(lines, require_banner=True):
+    """Parse the puzzle definition from lines up to and including the banner.
+
+    Consumes lines from the iterator only as far as the banner and returns
+    (puzzle_data, rest) where rest is the text after the banner on its line.
+    Raises ValueError if there is no banner, unless require_banner is False
+    (for bare puzzle definitions), in which case rest is None.
+    """
+    puzzle_info = {}
+    cages = []
+    puzzle_data = {
+        'info': puzzle_info,
+        'cages': cages
+    }
+    for line in lines:
+        line = line.strip()
+        if BANNER in line:
+            before, _, after = line.partition(BANNER)
+            parse_header_line(before.strip(), puzzle_info, cages)
+            return puzzle_data, after.strip()
+        parse_header_line(line, puzzle_info, cages)
+    if require_banner:
+        raise ValueError("Invalid file format - missing solver log")
+    return puzzle_data, None
+
+
+def read_puzzle(input_file):
+    """Parse only the puzzle definition of a descriptor or bare puzzle file."""
+    with open(input_file, 'r', encoding='utf-8') as f:
+        return read_header(f, require_banner=False)[0]
+
+
+# --indexing choices of the command line tools -> indexing argument of log_lines
+INDEXING_CHOICES = {'auto': None, '0': 0, '1': 1}
+
+
+def detect_indexing(puzzle_data, line):
+    """Coordinate base (0 or 1) of a 'The cage covering' line.
+
+    The puzzle definition always lists cages 0-based, so the line's cells are
+    looked up among the cages as written and shifted down by one. Returns None
+    if both or neither match.
+    """
+    cells = frozenset((int(r), int(c)) for r, c in CELL_PATTERN.findall(line))
+    cages = {frozenset(cage['cells']) for cage in puzzle_data['cages']}
+    zero_based = cells in cages
+    one_based = frozenset((r - 1, c - 1) for r, c in cells) in cages
+    if zero_based == one_based:
+        return None
+    return 1 if one_based else 0
+
+
+def log_lines(lines, puzzle_data, indexing=None):
+    """Solver log lines with 1-based coordinates converted to 0-based.
+
+    indexing is 0 (lines pass through), 1 (each line goes through
+    kenken_coordinate_fixer.fix_line, so parsing gives the same steps as
+    fixing the file first) or None to detect it from the cage analyses that
+    solver logs start with; the lines read ahead meanwhile are replayed.
+    Logs whose base cannot be detected are read as 0-based.
+    """
+    lines = iter(lines)
+    held = []
+    if indexing is None:
+        for line in lines:
+            held.append(line)
+            stripped = line.strip()
+            if stripped[:PREFIX_LENGTH] not in STEP_DISPATCH:
+                continue
+            if not stripped.startswith(CAGE_ANALYSIS_PREFIX):
+                break
+            indexing = detect_indexing(puzzle_data, stripped)
+            if indexing is not None:
+                break
+    if held:
+        lines = itertools.chain(held, lines)
+    if indexing:
+        from kenken_coordinate_fixer import fix_line
+        return map(fix_line, lines)
+    return lines
+
+
+def iter_log_steps(lines, solution=None):
+    """Yield the Steps of a solver log one at a time.
+
+    A CageAnalysis is held back until the lines completing it ('Valid combos:'
+    and 'Updated combos for') have been read, so every yielded step is final.
+    If solution is a dict, it is updated from any 'Solution:' line.
+    """
+    dispatch = STEP_DISPATCH.get
+    last_analysis = None
+    pending = []
+    for line in lines:
+        line = line.strip()
+        entry = dispatch(line[:PREFIX_LENGTH])
+        if entry is None:
+            if not line:
+                continue
+            if line.startswith(VALID_COMBOS_PREFIX):
+                if last_analysis is not None:
+                    last_analysis.combos = line.partition('Valid combos: ')[2]
+            elif line.startswith(SOLUTION_PREFIX):
+                if solution is not None:
+                    solution.clear()
+                    solution.update(parse_solution_line(line))
+            elif line.startswith(BANNER):
+                raise ValueError("Invalid file format - multiple solver logs")
+            continue
+
+        match, build = entry
+        found = match(line)
+        if found is None:
+            continue
+        step = build(line, found)
+        step_type = step.type
+        if step_type == COMBO_UPDATE and last_analysis is not None:
+            last_analysis.combos = step.combos
+            pending.append(step)
+            continue
+        if pending:
+            yield from pending
+            pending.clear()
+        if step_type == CAGE_ANALYSIS:
+            last_analysis = step
+            pending.append(step)
+        else:
+            last_analysis = None
+            yield step
+    yield from pending
+
+
+def read_solution(input_file, block_size=1 << 16):
+    """Return the {(r, c): v} map from the last 'Solution:' line of a descriptor.
+
+    The file is scanned backwards from the end in blocks, so only the tail of
+    the log is read when the solution is where the solver writes it.
+    """
+    marker = SOLUTION_PREFIX.encode()
+    with open(input_file, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        carry = b''
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + carry).split(b'\n')
+            # lines[0] may continue in the previous block unless this is the start
+            carry = lines[0] if position > 0 else b''
+            for line in reversed(lines if position == 0 else lines[1:]):
+                if line.lstrip().startswith(marker):
+                    return parse_solution_line(line.decode('utf-8'))
+    return {}
+
+
+class DescriptorStream:
+    """Descriptor opened for streaming.
+
+    The puzzle definition is parsed on construction, the solution is read from
+    the end of the file on first access, and iterating yields the solving steps
+    lazily so memory stays flat regardless of log length. The stream can be
+    iterated once; the file is closed when iteration ends. indexing is the
+    coordinate base of the log (see log_lines).
+    """
+
+    def __init__(self, input_file, indexing=None):
+        self.input_file = input_file
+        self.indexing = indexing
+        self._file = open(input_file, 'r', encoding='utf-8')
+        try:
+            self.puzzle_data, self._first_log_line = read_header(self._file)
+        except Exception:
+            self._file.close()
+            raise
+        self._solution = None
+
+    @property
+    def solution(self):
+        if self._solution is None:
+            self._solution = read_solution(self.input_file)
+        return self._solution
+
+    def __iter__(self):
+        try:
+            lines = itertools.chain(
+                (self._first_log_line,),
+                log_lines(self._file, self.puzzle_data, self.indexing))
+            yield from iter_log_steps(lines)
+        finally:
+            self.close()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parse_lines(lines, indexing=None):
+    """Parse descriptor lines in a single pass.
+
+    Returns (puzzle_data, solution, steps) where puzzle_data has the
+    {'info': {...}, 'cages': [...]} layout used by KenKenGenerator.
+    indexing is the coordinate base of the log (see log_lines).
+    Raises ValueError if the solver banner is missing or repeated.
+    """
+    lines = iter(lines)
+    puzzle_data, first_log_line = read_header(lines)
+    solution = {}
+    lines = itertools.chain((first_log_line,), log_lines(lines, puzzle_data, indexing))
+    steps = list(iter_log_steps(lines, solution))
+    return puzzle_data, solution, steps
+
+
+def parse_descriptor(input_file, indexing=None):
+    """Parse a descriptor file into (puzzle_data, solution, steps)."""
+    with open(input_file, 'r', encoding='utf-8') as f, _gc_paused():
+        return parse_lines(f, indexing)
@@ -0,0 +1,75 @@
+from array import array
+
+from kenken_parser import CAGE_ANALYSIS, CELL_PATTERN, COMBO_UPDATE
+from kenken_solver import cage_description, parse_operation
+
+
+class PeerIndex:
+    """Which cage each cell is in and which cells share its row or column.
+
+    Built once from puzzle_data['cages']; cage ids are positions in that
+    list, which is also the order KenKenGenerator draws the cage groups in.
+    Cells are indexed row * size + col as in GridState, and peers are int
+    bitmasks over those indices, so a cell set is one mask and peer tests
+    are a single AND.
+    """
+    __slots__ = ('size', 'cages', 'cage_of', 'by_cells', 'by_description',
+                 'row_masks', 'col_masks')
+
+    def __init__(self, puzzle_data):
+        size = self.size = puzzle_data['info']['size']
+        self.cages = [cage['cells'] for cage in puzzle_data['cages']]
+        self.cage_of = array('i', [-1]) * (size * size)
+        self.by_cells = {}
+        self.by_description = {}
+        for cage_id, cage in enumerate(puzzle_data['cages']):
+            for row, col in cage['cells']:
+                if 0 <= row < size and 0 <= col < size:
+                    self.cage_of[row * size + col] = cage_id
+            self.by_cells.setdefault(frozenset(cage['cells']), cage_id)
+            try:
+                operation, target = parse_operation(cage['operation'], len(cage['cells']))
+            except ValueError:
+                continue
+            self.by_description.setdefault(cage_description(cage, operation, target), cage_id)
+
+        full_row = (1 << size) - 1
+        full_col = sum(1 << (row * size) for row in range(size))
+        self.row_masks = [full_row << (row * size) for row in range(size)]
+        self.col_masks = [full_col << col for col in range(size)]
+
+    def index(self, cell):
+        row, col = cell
+        return row * self.size + col
+
+    def cage_id(self, cell):
+        """Id of the cage covering the cell, or None."""
+        cage_id = self.cage_of[self.index(cell)]
+        return cage_id if cage_id >= 0 else None
+
+    def cage_for(self, step):
+        """Id of the cage a step is about, or None.
+
+        Cage analyses and combo updates are matched on their cage's
+        description as the solver writes it, falling back to the set of cells
+        they name; cell steps on the cage of their cell.
+        """
+        if step.type == CAGE_ANALYSIS:
+            cage_id = self.by_description.get(step.description)
+            if cage_id is None:
+                cage_id = self.by_cells.get(frozenset(step.cells))
+            return cage_id
+        if step.type == COMBO_UPDATE:
+            description = step.cage_description.strip("'")
+            cage_id = self.by_description.get(description)
+            if cage_id is None:
+                cells = [(int(r), int(c)) for r, c in CELL_PATTERN.findall(description)]
+                cage_id = self.by_cells.get(frozenset(cells))
+            return cage_id
+        cell = getattr(step, 'cell', None)
+        return self.cage_id(cell) if cell is not None else None
+
+    def peers_mask(self, k):
+        """Cells sharing a row or column with cell index k, not k itself."""
+        row, col = divmod(k, self.size)
+        return (self.row_masks[row] | self.col_masks[col]) & ~(1 << k)
@@ -0,0 +1,396 @@
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import time
+
+from kenken_coalesce import GROUP_TITLES, STEP_GROUP, coalesce_steps, group_summary
+from kenken_layout import GridLayout, assign_cage_colors
+from kenken_parser import (ASSIGNMENT, CAGE_LINE_ELIMINATION, CONSTRAINT_PROPAGATION,
+                           INDEXING_CHOICES, DescriptorStream)
+from kenken_segments import SceneState, is_drawn
+from kenken_snapshot import (DEFAULT_WIDTH, EM_PER_FONT_SIZE, LINE_HEIGHT, NUMBER_FONT_SIZE,
+                             POSSIBILITIES_COLOR, TEXT_COLOR, PixelTransform, render_svg,
+                             snapshot_items)
+
+# Self-contained HTML replays of a solving log: the grid is drawn once as SVG
+# (see kenken_snapshot) and a small script applies each beat's cell changes,
+# as KenKenGenerator animates them, with step, seek and speed controls.
+
+# Hex values of the Manim colors animate_step uses for explanations and highlights
+GREEN = "#83C167"
+ORANGE = "#FF862F"
+RED = "#FC6255"
+PURPLE = "#9A72AC"
+WHITE = "#FFFFFF"
+MEMBER_COLORS = {ASSIGNMENT: GREEN, CONSTRAINT_PROPAGATION: ORANGE}
+# Seconds per beat at 1x speed
+BEAT_SECONDS = 1.2
+DATA_ELEMENT_ID = "kenken-data"
+DATA_PATTERN = re.compile(
+    r'<script type="application/json" id="' + DATA_ELEMENT_ID + r'">(.*?)</script>', re.S)
+
+
+def beat_caption(step, number):
+    """(explanation, color, highlights) of a drawn step or group, worded as in
+    the video; highlights are (cell, color, opacity)."""
+    if step.type == STEP_GROUP:
+        text = f"Step {number}: {GROUP_TITLES[step.kind]}\n{group_summary(step)}"
+        marks = [(member.cell, MEMBER_COLORS.get(member.type, RED), 0.3)
+                 for member in step.cell_steps()]
+        return text, WHITE, marks
+    row, col = step.cell
+    if step.type == CONSTRAINT_PROPAGATION:
+        text = (f"Step {number}: Constraint Propagation\n"
+                f"Cell ({row},{col}): {step.old_values} → {step.new_values}")
+        return text, ORANGE, [(step.cell, ORANGE, 0.5)]
+    if step.type == CAGE_LINE_ELIMINATION:
+        text = f"Step {number}: Cage-Line Elimination\nRemove {step.value_removed} from ({row},{col})"
+        return text, RED, [(step.cell, RED, 0.3)]
+    if step.rule == 'branch':
+        text = f"Step {number}: Search Branch\nCell ({row},{col}) = {step.value}"
+        return text, PURPLE, [(step.cell, PURPLE, 0.5)]
+    text = f"Step {number}: Assignment\nCell ({row},{col}) = {step.value}"
+    return text, GREEN, [(step.cell, GREEN, 0.5)]
+
+
+def player_data(puzzle_data, steps, coalesce=False, width=DEFAULT_WIDTH):
+    """Everything the player script needs, as JSON-ready data.
+
+    beats holds one entry per drawn beat: its explanation, highlights, the
+    number of log steps read once it has played ('steps', so beat indices
+    map back to snapshot and replay step counts) and its changes, each
+    [cell index, 'value', v] or [cell index, 'candidates', text, spaced] as
+    SceneState shows the cell afterwards. Cells are indexed row * size + col.
+    """
+    info = puzzle_data['info']
+    size = info['size']
+    layout = GridLayout(size)
+    transform = PixelTransform(layout, width)
+    state = SceneState(size, info['allowed_numbers'])
+
+    beats = []
+    read = 0
+    if coalesce:
+        steps = coalesce_steps(steps)
+    for step in steps:
+        read += len(step.steps) if step.type == STEP_GROUP else 1
+        if not is_drawn(step):
+            if beats:
+                beats[-1]['steps'] = read
+            continue
+        text, color, marks = beat_caption(step, state.step_counter)
+        changes = [[row * size + col] + list(entry) for (row, col), entry in state.advance(step)]
+        beats.append({
+            'text': text,
+            'color': color,
+            'marks': [[row * size + col, mark_color, opacity]
+                      for (row, col), mark_color, opacity in marks],
+            'changes': changes,
+            'steps': read,
+        })
+
+    centers = [transform.point(*layout.cell_center(row, col)[:2])
+               for row in range(size) for col in range(size)]
+    return {
+        'title': f"KenKen Puzzle {size}×{size}",
+        'size': size,
+        'width': width,
+        'centers': [[round(x, 2), round(y, 2)] for x, y in centers],
+        'side': round(transform.length(layout.cell_size * 0.9), 2),
+        'number_em': round(transform.length(NUMBER_FONT_SIZE * EM_PER_FONT_SIZE), 2),
+        'candidates_em': round(transform.length(layout.possibilities_font_size() *
+                                                EM_PER_FONT_SIZE), 2),
+        'line_height': {'spaced': LINE_HEIGHT[True], 'plain': LINE_HEIGHT[False]},
+        'colors': {'value': TEXT_COLOR, 'candidates': POSSIBILITIES_COLOR},
+        'beat_seconds': BEAT_SECONDS,
+        'beats': beats,
+        # Cells the log leaves empty; the last beat only says solved if none
+        'unset': state.grid.values.count(0),
+    }
+
+
+def shown_at(data, index):
+    """What the player shows after the first index beats, as SceneState.shown
+    ({(row, col): entry}); the script applies the beats the same way."""
+    size = data['size']
+    shown = {}
+    for beat in data['beats'][:index]:
+        for change in beat['changes']:
+            shown[divmod(change[0], size)] = tuple(change[1:])
+    return shown
+
+
+def load_player_data(path):
+    """The data embedded in an exported player page."""
+    with open(path, 'r', encoding='utf-8') as f:
+        match = DATA_PATTERN.search(f.read())
+    if match is None:
+        raise ValueError(f"{path} has no embedded player data")
+    return json.loads(match.group(1))
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ background: #111; color: #eee; font-family: sans-serif; margin: 0; padding: 16px; }}
+main {{ max-width: {width}px; margin: 0 auto; }}
+h1 {{ font-size: 18px; color: #58C4DD; }}
+#explanation {{ min-height: 3em; white-space: pre-line; font-size: 14px; margin: 8px 0; }}
+#controls {{ display: flex; gap: 6px; align-items: center; flex-wrap: wrap; }}
+#seek {{ flex: 1; }}
+button, select {{ background: #333; color: #eee; border: 1px solid #555; padding: 4px 8px; }}
+</style>
+</head>
+<body>
+<main>
+<h1>{title}</h1>
+{svg}
+<div id="explanation"></div>
+<div id="controls">
+<button id="first" title="First (Home)">&#x23EE;</button>
+<button id="prev" title="Previous (Left)">&#x25C0;</button>
+<button id="play" title="Play/pause (Space)">&#x25B6;</button>
+<button id="next" title="Next (Right)">&#x25B6;&#x25B6;</button>
+<button id="last" title="Last (End)">&#x23ED;</button>
+<input id="seek" type="range" min="0" value="0">
+<span id="position"></span>
+<select id="speed" title="Speed">
+<option value="0.5">0.5x</option><option value="1" selected>1x</option>
+<option value="2">2x</option><option value="4">4x</option><option value="8">8x</option>
+</select>
+</div>
+</main>
+<script type="application/json" id="{data_id}">{data}</script>
+<script>
+{script}
+</script>
+</body>
+</html>
+"""
+
+PLAYER_SCRIPT = r"""(function () {
+  "use strict";
+  var SVG_NS = "http://www.w3.org/2000/svg";
+  var data = JSON.parse(document.getElementById("kenken-data").textContent);
+  var beats = data.beats;
+
+  // Same rule as kenken_player.shown_at: later changes to a cell win
+  function shownAt(index) {
+    var shown = {};
+    for (var i = 0; i < index; i++) {
+      var changes = beats[i].changes;
+      for (var j = 0; j < changes.length; j++) shown[changes[j][0]] = changes[j].slice(1);
+    }
+    return shown;
+  }
+
+  var svg = document.querySelector("main svg");
+  var marks = document.createElementNS(SVG_NS, "g");
+  var texts = document.createElementNS(SVG_NS, "g");
+  svg.appendChild(marks);
+  svg.appendChild(texts);
+  var explanation = document.getElementById("explanation");
+  var seek = document.getElementById("seek");
+  var position = document.getElementById("position");
+  var playButton = document.getElementById("play");
+  var speed = document.getElementById("speed");
+  seek.max = beats.length;
+
+  function text(x, y, em, fill, bold, content) {
+    var node = document.createElementNS(SVG_NS, "text");
+    node.setAttribute("x", x);
+    node.setAttribute("y", y);
+    node.setAttribute("font-family", "sans-serif");
+    node.setAttribute("font-size", em);
+    node.setAttribute("fill", fill);
+    node.setAttribute("text-anchor", "middle");
+    node.setAttribute("dominant-baseline", "central");
+    if (bold) node.setAttribute("font-weight", "bold");
+    node.textContent = content;
+    texts.appendChild(node);
+  }
+
+  function draw(index) {
+    var shown = shownAt(index);
+    texts.textContent = "";
+    marks.textContent = "";
+    for (var cell in shown) {
+      var entry = shown[cell], center = data.centers[cell];
+      if (entry[0] === "value") {
+        text(center[0], center[1], data.number_em, data.colors.value, true, String(entry[1]));
+      } else if (entry[1]) {
+        var lines = entry[1].split("\n");
+        var step = data.candidates_em * (entry[2] ? data.line_height.spaced : data.line_height.plain);
+        var top = center[1] - (lines.length - 1) * step / 2;
+        for (var i = 0; i < lines.length; i++) {
+          text(center[0], top + i * step, data.candidates_em, data.colors.candidates, false, lines[i]);
+        }
+      }
+    }
+    var beat = index > 0 ? beats[index - 1] : null;
+    if (beat) {
+      for (var m = 0; m < beat.marks.length; m++) {
+        var mark = beat.marks[m], c = data.centers[mark[0]], side = data.side;
+        var rect = document.createElementNS(SVG_NS, "rect");
+        rect.setAttribute("x", c[0] - side / 2);
+        rect.setAttribute("y", c[1] - side / 2);
+        rect.setAttribute("width", side);
+        rect.setAttribute("height", side);
+        rect.setAttribute("fill", mark[1]);
+        rect.setAttribute("fill-opacity", mark[2]);
+        rect.setAttribute("stroke", mark[1]);
+        rect.setAttribute("stroke-width", 2);
+        marks.appendChild(rect);
+      }
+      explanation.textContent = beat.text;
+      explanation.style.color = beat.color;
+      if (index === beats.length) {
+        // The outro's line, under the last beat's
+        explanation.textContent += "\n" + (data.unset ?
+          "Logic stalled: " + data.unset + " cells unsolved" : "Puzzle Solved!");
+      }
+    } else {
+      explanation.textContent = "";
+    }
+    seek.value = index;
+    position.textContent = index + " / " + beats.length;
+  }
+
+  var current = 0, timer = null;
+  function go(index) {
+    current = Math.max(0, Math.min(beats.length, index));
+    draw(current);
+    if (current >= beats.length) pause();
+  }
+  function tick() { go(current + 1); }
+  function pause() {
+    if (timer !== null) clearInterval(timer);
+    timer = null;
+    playButton.innerHTML = "&#x25B6;";
+  }
+  function play() {
+    if (current >= beats.length) go(0);
+    pause();
+    timer = setInterval(tick, 1000 * data.beat_seconds / Number(speed.value));
+    playButton.innerHTML = "&#x23F8;";
+  }
+
+  document.getElementById("first").onclick = function () { pause(); go(0); };
+  document.getElementById("prev").onclick = function () { pause(); go(current - 1); };
+  document.getElementById("next").onclick = function () { pause(); go(current + 1); };
+  document.getElementById("last").onclick = function () { pause(); go(beats.length); };
+  playButton.onclick = function () { if (timer === null) play(); else pause(); };
+  speed.onchange = function () { if (timer !== null) play(); };
+  seek.oninput = function () { pause(); go(Number(seek.value)); };
+  document.addEventListener("keydown", function (event) {
+    if (event.target === seek) return;
+    if (event.key === "ArrowRight") { pause(); go(current + 1); }
+    else if (event.key === "ArrowLeft") { pause(); go(current - 1); }
+    else if (event.key === "Home") { pause(); go(0); }
+    else if (event.key === "End") { pause(); go(beats.length); }
+    else if (event.key === " ") { event.preventDefault(); playButton.onclick(); }
+  });
+
+  // For checks in a browser: the state after any beat index, and seeking
+  window.KenKenPlayer = { data: data, shownAt: shownAt, go: go };
+  go(0);
+})();
+"""
+
+
+def render_page(puzzle_data, data):
+    """The player page for player_data's data."""
+    layout = GridLayout(puzzle_data['info']['size'])
+    svg = render_svg(snapshot_items(puzzle_data, {}, layout), PixelTransform(layout, data['width']))
+    # '</' cannot appear inside a script element
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    return PAGE_TEMPLATE.format(title=html.escape(data['title']), width=data['width'],
+                                svg=svg.rstrip(), data_id=DATA_ELEMENT_ID, data=payload,
+                                script=PLAYER_SCRIPT.rstrip())
+
+
+def export_player(input_file, output_file, coalesce=False, width=DEFAULT_WIDTH, indexing=None):
+    """Write the player page of one descriptor (atomically); returns output_file."""
+    with DescriptorStream(input_file, indexing) as stream:
+        puzzle_data = stream.puzzle_data
+        if not puzzle_data['info'].get('size'):
+            raise ValueError("no puzzle header")
+        assign_cage_colors(puzzle_data['cages'])
+        data = player_data(puzzle_data, stream, coalesce, width)
+    page = render_page(puzzle_data, data)
+    tmp_path = f"{output_file}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    os.replace(tmp_path, output_file)
+    return output_file
+
+
+def player_name(input_file):
+    return os.path.splitext(os.path.basename(input_file))[0] + ".html"
+
+
+def _export_job(args):
+    input_file, output_dir, options = args
+    try:
+        output_file = os.path.join(output_dir, player_name(input_file))
+        return input_file, export_player(input_file, output_file, **options), None
+    except (OSError, ValueError) as e:
+        return input_file, None, str(e)
+
+
+def export_players(input_files, output_dir, workers=None, chunksize=16, **options):
+    """Yield (input, output or None, error or None) for many descriptors, in order."""
+    jobs = [(input_file, output_dir, options) for input_file in input_files]
+    if workers == 1 or len(jobs) == 1:
+        yield from map(_export_job, jobs)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_export_job, jobs, chunksize=chunksize)
+
+
+def main():
+    from kenken_batch_render import find_descriptors
+
+    parser = argparse.ArgumentParser(description="Export KenKen solving logs as interactive HTML replays")
+    parser.add_argument("inputs", nargs='+', help="Descriptor files, directories or glob patterns")
+    parser.add_argument("--output-dir", "-o", default="players", help="Directory for the pages")
+    parser.add_argument("--coalesce", action="store_true",
+                        help="Merge runs of related steps into single beats, as in the video")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH, help="Grid width in pixels")
+    parser.add_argument("--workers", "-j", type=int, default=None,
+                        help="Worker processes (default: CPU count, 1 to stay in-process)")
+    parser.add_argument("--indexing", choices=list(INDEXING_CHOICES), default="auto",
+                        help="Coordinate base of the solver logs")
+    args = parser.parse_args()
+
+    input_files = find_descriptors(args.inputs)
+    if not input_files:
+        print("Error: no descriptors found.")
+        sys.exit(1)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    failed = 0
+    for input_file, _, error in export_players(
+            input_files, args.output_dir, args.workers, coalesce=args.coalesce,
+            width=args.width, indexing=INDEXING_CHOICES[args.indexing]):
+        if error:
+            failed += 1
+            print(f"[FAIL] {os.path.basename(input_file)}: {error}")
+    elapsed = time.perf_counter() - start
+    written = len(input_files) - failed
+    print(f"Wrote {written} players to {args.output_dir} in {elapsed:.2f}s "
+          f"({elapsed * 1000 / len(input_files):.1f} ms per descriptor)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
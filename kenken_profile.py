@@ -0,0 +1,108 @@
+import contextlib
+import json
+import os
+import time
+
+# Profile sections of a render: the phases of construct() and, inside the
+# steps phase, one section per step type (see KenKenGenerator.section)
+PHASES = ("setup", "grid", "cages", "steps", "celebration")
+COUNTERS = ("plays", "frames", "text_layout_seconds", "raster_seconds", "encode_seconds")
+
+
+class RenderProfile:
+    """Wall time, play() calls, frames and Mobjects alive per render section.
+
+    The running counters are advanced by the instrumented scene (plays and
+    peak Mobjects from Scene.play, frames and encoding time from the file
+    writer, rasterization time from the renderer) and each section adds up
+    how much they moved while it was open. Sections nest, so a step type
+    section also counts towards the steps phase. text_layout is a function
+    returning the seconds spent on text layout so far, e.g. the text cache's.
+    """
+
+    def __init__(self, text_layout=None):
+        self.plays = 0
+        self.frames = 0
+        self.text_layout = text_layout
+        self.raster_seconds = 0.0
+        self.encode_seconds = 0.0
+        self.sections = {}
+        self._open = []
+        self.start = time.perf_counter()
+
+    @property
+    def text_layout_seconds(self):
+        return self.text_layout() if self.text_layout else 0.0
+
+    def _stats(self, kind, name):
+        stats = self.sections.get((kind, name))
+        if stats is None:
+            stats = self.sections[(kind, name)] = dict.fromkeys(COUNTERS, 0)
+            stats.update(count=0, seconds=0.0, peak_mobjects=0)
+        return stats
+
+    @contextlib.contextmanager
+    def section(self, kind, name):
+        stats = self._stats(kind, name)
+        before = [getattr(self, counter) for counter in COUNTERS]
+        self._open.append(stats)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats['seconds'] += time.perf_counter() - start
+            stats['count'] += 1
+            for counter, value in zip(COUNTERS, before):
+                stats[counter] += getattr(self, counter) - value
+            self._open.pop()
+
+    def record_play(self, mobjects):
+        self.plays += 1
+        for stats in self._open:
+            if mobjects > stats['peak_mobjects']:
+                stats['peak_mobjects'] = mobjects
+
+    def as_dict(self):
+        def finish(stats):
+            stats = dict(stats)
+            # What is left: animation interpolation, updaters and Python overhead
+            stats['other_seconds'] = max(0.0, stats['seconds'] - stats['text_layout_seconds']
+                                         - stats['raster_seconds'] - stats['encode_seconds'])
+            return stats
+
+        return {
+            'total_seconds': time.perf_counter() - self.start,
+            'plays': self.plays,
+            'frames': self.frames,
+            'phases': {name: finish(stats) for (kind, name), stats in self.sections.items()
+                       if kind == 'phase'},
+            'steps': {name: finish(stats) for (kind, name), stats in self.sections.items()
+                      if kind == 'step'},
+        }
+
+    def write(self, path, **extra):
+        """Write the profile as JSON (atomically) and return its dict."""
+        data = dict(extra, **self.as_dict())
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+        return data
+
+
+def summary_table(data):
+    """Lines of a fixed-width table of a profile dict (RenderProfile.as_dict)."""
+    header = (f"{'section':<28} {'count':>6} {'seconds':>8} {'plays':>6} {'frames':>7} "
+              f"{'text':>6} {'raster':>7} {'encode':>7} {'other':>6} {'mobjects':>8}")
+    lines = [f"Render profile: {data['total_seconds']:.1f}s, {data['plays']} play calls, "
+             f"{data['frames']} frames", header, "-" * len(header)]
+    rows = [(f"phase {name}", data['phases'][name]) for name in PHASES if name in data['phases']]
+    rows += [(f"  step {name}", stats)
+             for name, stats in sorted(data['steps'].items(), key=lambda item: -item[1]['seconds'])]
+    for label, stats in rows:
+        lines.append(f"{label:<28} {stats['count']:>6} {stats['seconds']:>8.2f} "
+                     f"{stats['plays']:>6} {stats['frames']:>7} "
+                     f"{stats['text_layout_seconds']:>6.2f} {stats['raster_seconds']:>7.2f} "
+                     f"{stats['encode_seconds']:>7.2f} {stats['other_seconds']:>6.2f} "
+                     f"{stats['peak_mobjects']:>8}")
+    return lines
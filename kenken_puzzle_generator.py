@@ -0,0 +1,216 @@
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from kenken_combos import ComboCache, set_default_cache
+from kenken_solver import KenKenSolver, write_descriptor
+
+NEIGHBOURS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+
+def random_latin_square(size, rng):
+    """Random Latin square as {(row, col): value} with values 1..size."""
+    full = (1 << size) - 1
+    row_used = [0] * size
+    col_used = [0] * size
+    grid = [0] * (size * size)
+
+    def fill(k):
+        if k == size * size:
+            return True
+        row, col = divmod(k, size)
+        free = full & ~row_used[row] & ~col_used[col]
+        choices = [v for v in range(size) if free >> v & 1]
+        rng.shuffle(choices)
+        for v in choices:
+            bit = 1 << v
+            row_used[row] |= bit
+            col_used[col] |= bit
+            grid[k] = v + 1
+            if fill(k + 1):
+                return True
+            row_used[row] &= ~bit
+            col_used[col] &= ~bit
+        return False
+
+    fill(0)
+    return {divmod(k, size): value for k, value in enumerate(grid)}
+
+
+def random_cages(size, rng, max_cage=4):
+    """Partition the grid into connected cages of 1..max_cage cells."""
+    weights = [1] + [2] * 5 + [3] * 3 + [4] * 2 + list(range(5, max_cage + 1))
+    unassigned = {(r, c) for r in range(size) for c in range(size)}
+    order = sorted(unassigned)
+    rng.shuffle(order)
+    cages = []
+    for start in order:
+        if start not in unassigned:
+            continue
+        cells = [start]
+        unassigned.discard(start)
+        wanted = min(rng.choice(weights), max_cage)
+        while len(cells) < wanted:
+            frontier = [
+                (r + dr, c + dc) for r, c in cells for dr, dc in NEIGHBOURS
+                if (r + dr, c + dc) in unassigned
+            ]
+            if not frontier:
+                break
+            cell = rng.choice(frontier)
+            unassigned.discard(cell)
+            cells.append(cell)
+        cages.append(sorted(cells))
+    return cages
+
+
+def cage_hint(values, rng):
+    """Pick an operation for a cage holding values, as a descriptor hint."""
+    if len(values) == 1:
+        return str(values[0])
+    product = 1
+    for value in values:
+        product *= value
+    if len(values) == 2:
+        high, low = max(values), min(values)
+        options = [f"{high - low}-", f"{sum(values)}+", f"{product}x"]
+        if high % low == 0:
+            options.append(f"{high // low}/")
+        return rng.choice(options)
+    return rng.choice([f"{sum(values)}+", f"{product}x"])
+
+
+def random_puzzle(size, rng, max_cage=4):
+    """Random puzzle_data and its intended solution, not yet checked for uniqueness."""
+    grid = random_latin_square(size, rng)
+    cages = []
+    for cells in random_cages(size, rng, max_cage):
+        cages.append({
+            'operation': cage_hint([grid[cell] for cell in cells], rng),
+            'cells': cells,
+            'anchor': cells[0]
+        })
+    puzzle_data = {
+        'info': {'size': size, 'allowed_numbers': list(range(1, size + 1))},
+        'cages': cages
+    }
+    return puzzle_data, grid
+
+
+def generate_puzzle(size, rng, max_cage=4, logic_only=True, max_attempts=1000):
+    """Generate a puzzle with exactly one solution.
+
+    Returns (puzzle_data, log, solution, attempts). With logic_only, only
+    puzzles the deduction rules finish on their own are kept; otherwise
+    uniqueness is checked by exact-cover search, which also finishes the
+    log (see KenKenSolver.search), so the log always reaches the solution.
+    """
+    for attempt in range(1, max_attempts + 1):
+        puzzle_data, grid = random_puzzle(size, rng, max_cage)
+        log = []
+        solver = KenKenSolver(puzzle_data, emit=log.append)
+        try:
+            solution = solver.solve()
+        except ValueError:
+            continue
+        if solution is not None:
+            # Sound deductions reaching a full grid imply a unique solution
+            return puzzle_data, log, solution, attempt
+        if not logic_only and KenKenSolver(puzzle_data).count_solutions(2) == 1:
+            # Finished with Branch: lines, the log still reaches the solution
+            return puzzle_data, log, solver.search(), attempt
+    raise RuntimeError(f"No unique {size}x{size} puzzle after {max_attempts} attempts")
+
+
+def _init_worker(combo_cache_path):
+    if combo_cache_path:
+        set_default_cache(ComboCache(combo_cache_path))
+
+
+def generate_batch(size, indices, seed, output_dir, max_cage, logic_only):
+    """Worker task: write one descriptor per index and return timing stats."""
+    start = time.perf_counter()
+    attempts = 0
+    for index in indices:
+        rng = random.Random(f"{seed}:{size}:{index}")
+        puzzle_data, log, solution, tries = generate_puzzle(size, rng, max_cage, logic_only)
+        attempts += tries
+        path = os.path.join(output_dir, f"{size}x{size}_{index:06d}.txt")
+        write_descriptor(puzzle_data, log, solution, path)
+    return {
+        'pid': os.getpid(),
+        'size': size,
+        'puzzles': len(indices),
+        'attempts': attempts,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def generate(sizes, count, output_dir, workers=None, seed=0, max_cage=4,
+             logic_only=True, chunk_size=25, combo_cache_path=None):
+    """Generate count puzzles per size across a process pool.
+
+    Returns per-worker totals {pid: {'puzzles', 'attempts', 'seconds'}}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    per_worker = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(combo_cache_path,)) as pool:
+        futures = [
+            pool.submit(generate_batch, size, range(start, min(start + chunk_size, count)),
+                        seed, output_dir, max_cage, logic_only)
+            for size in sizes
+            for start in range(0, count, chunk_size)
+        ]
+        for future in as_completed(futures):
+            stats = future.result()
+            totals = per_worker.setdefault(stats['pid'], {'puzzles': 0, 'attempts': 0, 'seconds': 0.0})
+            for key in totals:
+                totals[key] += stats[key]
+    return per_worker
+
+
+def print_report(per_worker, wall_time):
+    print(f"{'worker':>8} {'puzzles':>8} {'attempts':>9} {'busy s':>8} {'puzzles/s':>10}")
+    for pid, totals in sorted(per_worker.items()):
+        rate = totals['puzzles'] / totals['seconds'] if totals['seconds'] else 0.0
+        print(f"{pid:>8} {totals['puzzles']:>8} {totals['attempts']:>9} "
+              f"{totals['seconds']:>8.2f} {rate:>10.1f}")
+    total = sum(totals['puzzles'] for totals in per_worker.values())
+    print(f"Total: {total} puzzles in {wall_time:.2f}s "
+          f"({total / wall_time * 60:.0f} puzzles/minute)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate unique KenKen puzzles with solver logs")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[6, 7, 8, 9],
+                        help="Puzzle sizes to generate")
+    parser.add_argument("--count", type=int, default=100, help="Puzzles per size")
+    parser.add_argument("--output", "-o", default="descriptors/generated",
+                        help="Output directory for descriptors")
+    parser.add_argument("--workers", "-j", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0, help="Base random seed")
+    parser.add_argument("--max-cage", type=int, default=4, help="Largest cage size")
+    parser.add_argument("--allow-search", action="store_true",
+                        help="Also keep unique puzzles the deduction rules cannot finish; "
+                             "their logs are finished by exact-cover search")
+    parser.add_argument("--combo-cache", help="On-disk combo cache shared by the workers")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        per_worker = generate(args.sizes, args.count, args.output, args.workers, args.seed,
+                              args.max_cage, not args.allow_search,
+                              combo_cache_path=args.combo_cache)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"Error generating puzzles: {e}")
+        sys.exit(1)
+    print_report(per_worker, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
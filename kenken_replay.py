@@ -0,0 +1,228 @@
+import argparse
+import functools
+import os
+import sys
+import time
+
+from kenken_combos import combo_fits
+from kenken_compiled import load_descriptor
+from kenken_parser import (ASSIGNMENT, CAGE_ANALYSIS, CAGE_LINE_ELIMINATION,
+                           CONSTRAINT_PROPAGATION, INDEXING_CHOICES, mask_values,
+                           parse_descriptor)
+from kenken_peers import PeerIndex
+from kenken_solver import parse_operation
+from kenken_state import GridState
+
+# Issues reported per descriptor before the replay gives up on it
+MAX_ISSUES = 20
+
+
+def replay(puzzle_data, solution, steps, max_issues=MAX_ISSUES):
+    """Apply every step to a GridState and return the inconsistencies found.
+
+    Checks that prunes start from the tracked candidates and only narrow
+    them, that eliminations remove a live candidate, that assignments pick a
+    candidate and agree with the Solution: map, and that the solution fills
+    the grid, repeats no value in a row or column and satisfies every cage.
+    Cage analyses must name a cage of the puzzle, peer eliminations must
+    follow a placement in the cell's row or column and no assignment may
+    repeat a value placed in its row or column. A log must set every cell:
+    one that stops short would still end on the video's "Puzzle Solved!".
+    Returns (state, issues) with issues as readable strings.
+    """
+    info = puzzle_data['info']
+    size = info['size']
+    state = GridState(size, info['allowed_numbers'])
+    candidates = state.candidates
+    values = state.values
+    peers = PeerIndex(puzzle_data)
+    # Value -> bitmask of the cells it has been placed in so far
+    placed = {}
+    issues = []
+
+    def issue(n, step, message):
+        issues.append(f"step {n} ({step.description[:60]}): {message}")
+
+    for n, step in enumerate(steps, 1):
+        if len(issues) >= max_issues:
+            issues.append("too many issues, replay stopped")
+            break
+        step_type = step.type
+        if step_type == CAGE_ANALYSIS:
+            cage_id = peers.cage_for(step)
+            if cage_id is None:
+                issue(n, step, "names no cage of the puzzle")
+                continue
+            if step.combos and solution:
+                try:
+                    cage_values = tuple(sorted(solution[cell] for cell in peers.cages[cage_id]))
+                except KeyError:
+                    continue
+                if str(cage_values) not in step.combos:
+                    issue(n, step, f"combos do not include the solution's {cage_values}")
+            continue
+        if step_type not in (CONSTRAINT_PROPAGATION, CAGE_LINE_ELIMINATION, ASSIGNMENT):
+            continue
+        if step.cell is None:
+            issue(n, step, "no cell could be parsed")
+            continue
+        try:
+            k = state.index(step.cell)
+        except ValueError as e:
+            issue(n, step, str(e))
+            continue
+
+        if step_type == CONSTRAINT_PROPAGATION:
+            if step.old_mask != candidates[k]:
+                issue(n, step, f"old values {step.old_values} but tracked "
+                               f"{mask_values(candidates[k])}")
+            if step.new_mask & ~candidates[k]:
+                issue(n, step, f"new values {step.new_values} add candidates to "
+                               f"{mask_values(candidates[k])}")
+            candidates[k] = step.new_mask
+        elif step_type == CAGE_LINE_ELIMINATION:
+            if step.value_removed is None:
+                issue(n, step, "no value could be parsed")
+                continue
+            bit = 1 << step.value_removed
+            if values[k]:
+                issue(n, step, f"cell already holds {values[k]}")
+            elif not candidates[k] & bit:
+                issue(n, step, f"{step.value_removed} is not a candidate of "
+                               f"{mask_values(candidates[k])}")
+            if step.rule == 'peer_elim' and not placed.get(step.value_removed, 0) & peers.peers_mask(k):
+                issue(n, step, f"no cell in its row or column holds {step.value_removed}")
+            candidates[k] &= ~bit
+        else:
+            value = step.value
+            if values[k] and values[k] != value:
+                issue(n, step, f"cell already holds {values[k]}")
+            elif not candidates[k] >> value & 1:
+                issue(n, step, f"{value} is not a candidate of {mask_values(candidates[k])}")
+            if solution and solution.get(step.cell) != value:
+                issue(n, step, f"the solution has {solution.get(step.cell)} here")
+            if placed.get(value, 0) & peers.peers_mask(k):
+                issue(n, step, f"{value} is already placed in its row or column")
+            placed[value] = placed.get(value, 0) | 1 << k
+            values[k] = value
+            candidates[k] = 1 << value
+
+        if not candidates[k]:
+            issue(n, step, "no candidates left")
+
+    unset = values.count(0)
+    if unset and len(issues) < max_issues:
+        issues.append(f"the log leaves {unset} of {size * size} cells unset")
+    issues.extend(check_solution(puzzle_data, solution))
+    return state, issues
+
+
+def check_solution(puzzle_data, solution):
+    """Issues with the Solution: map itself: gaps, repeats and broken cages."""
+    if not solution:
+        return ["no Solution: line"]
+    info = puzzle_data['info']
+    size = info['size']
+    allowed = set(info['allowed_numbers'])
+    issues = []
+    for row in range(size):
+        for col in range(size):
+            value = solution.get((row, col))
+            if value is None:
+                issues.append(f"solution: ({row},{col}) is missing")
+            elif value not in allowed:
+                issues.append(f"solution: ({row},{col}) = {value} is not an allowed number")
+    for line in range(size):
+        row_values = [solution[(line, col)] for col in range(size) if (line, col) in solution]
+        col_values = [solution[(row, line)] for row in range(size) if (row, line) in solution]
+        if len(set(row_values)) != len(row_values):
+            issues.append(f"solution: row {line} repeats a value")
+        if len(set(col_values)) != len(col_values):
+            issues.append(f"solution: column {line} repeats a value")
+    for cage in puzzle_data['cages']:
+        try:
+            operation, target = parse_operation(cage['operation'], len(cage['cells']))
+            cage_values = [solution[cell] for cell in cage['cells']]
+        except (KeyError, ValueError):
+            continue
+        if not combo_fits(operation, target, cage_values):
+            issues.append(f"solution: cage {cage['operation']} at {cage['anchor']} "
+                          f"does not hold for {cage_values}")
+    return issues
+
+
+def check_descriptor(path, compiled=False, indexing=None):
+    """Replay one descriptor file; returns (path, issues).
+
+    With compiled, the steps come from the binary form (see kenken_compiled),
+    which is built or refreshed next to the descriptor as needed. indexing is
+    the coordinate base of text logs (see kenken_parser.log_lines).
+    """
+    try:
+        if compiled:
+            with load_descriptor(path) as descriptor:
+                if not descriptor.puzzle_data['info'].get('size'):
+                    return path, ["no puzzle header"]
+                _, issues = replay(descriptor.puzzle_data, descriptor.solution, descriptor)
+                return path, issues
+        puzzle_data, solution, steps = parse_descriptor(path, indexing)
+    except (OSError, ValueError) as e:
+        return path, [f"could not parse: {e}"]
+    if not puzzle_data:
+        return path, ["no puzzle header"]
+    _, issues = replay(puzzle_data, solution, steps)
+    return path, issues
+
+
+def check_descriptors(paths, workers=None, chunksize=16, compiled=False, indexing=None):
+    """Yield (path, issues) for many descriptors, in order, across processes."""
+    check = functools.partial(check_descriptor, compiled=compiled, indexing=indexing)
+    if workers == 1:
+        yield from map(check, paths)
+        return
+    # Imported here: multiprocessing is most of this module's import time
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(check, paths, chunksize=chunksize)
+
+
+def main():
+    from kenken_batch_render import find_descriptors
+
+    parser = argparse.ArgumentParser(description="Check KenKen solver logs without rendering them")
+    parser.add_argument("inputs", nargs='+', help="Descriptor files, directories or glob patterns")
+    parser.add_argument("--workers", "-j", type=int, default=None,
+                        help="Worker processes (default: CPU count, 1 to stay in-process)")
+    parser.add_argument("--quiet", action="store_true", help="Only print failing descriptors")
+    parser.add_argument("--compiled", action="store_true",
+                        help="Read steps from compiled .kkc files, (re)building them as needed")
+    parser.add_argument("--indexing", choices=list(INDEXING_CHOICES), default="auto",
+                        help="Coordinate base of the solver logs (compiled files always detect it)")
+    args = parser.parse_args()
+
+    paths = find_descriptors(args.inputs)
+    if not paths:
+        print("Error: no descriptors found.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    failed = 0
+    for path, issues in check_descriptors(paths, args.workers, compiled=args.compiled,
+                                            indexing=INDEXING_CHOICES[args.indexing]):
+        name = os.path.basename(path)
+        if issues:
+            failed += 1
+            print(f"[FAIL] {name}")
+            for message in issues:
+                print(f"    {message}")
+        elif not args.quiet:
+            print(f"[  ok] {name}")
+    elapsed = time.perf_counter() - start
+    print(f"Checked {len(paths)} descriptors in {elapsed:.2f}s "
+          f"({len(paths) / elapsed:.0f}/s), {failed} failed")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,744 @@
+from manim import *
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+import kenken_segments
+from kenken_coalesce import GROUP_TITLES, STEP_GROUP, coalesce_steps, group_summary
+from kenken_compiled import load_descriptor
+from kenken_corpus import load_puzzle
+from kenken_layout import GridLayout, assign_cage_colors
+from kenken_pacing import plan_timing
+from kenken_peers import PeerIndex
+from kenken_parser import DescriptorStream, parse_descriptor
+from kenken_profile import RenderProfile, summary_table
+from kenken_segments import (INTRO, OUTRO, SEGMENT_SIZE, VIDEO_EXTENSION, SceneState,
+                             concat_videos, plan_segments, render_salt, video_seconds)
+
+# Renderer sources whose contents key the segment cache: a styling change
+# in either invalidates the cached segments
+SEGMENT_SOURCES = (os.path.abspath(__file__), os.path.abspath(kenken_segments.__file__))
+# Render config entries that only name the output, left out of segment keys
+OUTPUT_CONFIG_KEYS = ("output_file", "video_dir", "media_dir")
+# What KenKenGenerator.section returns when the render is not profiled
+NO_SECTION = contextlib.nullcontext()
+
+class MyText(Text):
+    def __init__(self, text, **kwargs):
+        kwargs.setdefault('font', 'sans-serif')
+        super().__init__(text, **kwargs)
+
+
+class TextCache:
+    """Bounded LRU of laid-out MyText objects.
+
+    Pango layout is the expensive part of creating a MyText, and a solving log
+    only uses a small set of distinct strings, so each (text, style) is laid
+    out once and callers get copies. maxsize=0 disables the cache.
+    layout_seconds is the time spent laying out the misses.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.layout_seconds = 0.0
+
+    def layout(self, text, **kwargs):
+        start = time.perf_counter()
+        mobject = MyText(text, **kwargs)
+        self.layout_seconds += time.perf_counter() - start
+        return mobject
+
+    def get(self, text, **kwargs):
+        if self.maxsize <= 0:
+            self.misses += 1
+            return self.layout(text, **kwargs)
+        # str() so colors and weights key by value, e.g. ManimColor('#FFFFFF')
+        key = (text, tuple(sorted((name, str(value)) for name, value in kwargs.items())))
+        cached = self.entries.get(key)
+        if cached is None:
+            self.misses += 1
+            cached = self.entries[key] = self.layout(text, **kwargs)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return cached.copy()
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self):
+        return (f"Text cache: {self.hits} hits, {self.misses} misses "
+                f"({self.hit_rate():.1%} hit rate), {len(self.entries)} entries")
+
+
+class KenKenGenerator(Scene):
+    # Distinct text objects kept by the text cache; 0 disables it
+    text_cache_size = 512
+    # Animate runs of related steps as single beats (see kenken_coalesce)
+    coalesce = False
+
+    # Titles of the coalesced beats, by StepGroup.kind
+    GROUP_TITLES = GROUP_TITLES
+
+    # Read the steps from the compiled .kkc form of the descriptor (see kenken_compiled)
+    compiled = False
+    # Coordinate base of the solver log: 0, 1 or None to detect it (see kenken_parser.log_lines)
+    indexing = None
+    # Path of a JSON render profile to write (see kenken_profile); None renders uninstrumented
+    profile = None
+    # Animate cage analyses (the cage is indicated with its combos) as
+    # numbered beats; off by default as they add a beat per cage without
+    # changing the grid
+    show_cage_analysis = False
+    # Seconds the video should fit in (see kenken_pacing); None plays every step at normal pace
+    target_duration = None
+    # Seconds per play() (and factor on waits) set by the timing plan; None
+    # keeps the animations' own run_times
+    pace = None
+    # Number of the puzzle to render when input_file is a multi-puzzle corpus
+    # (see kenken_corpus); None reads it as a single descriptor
+    puzzle = None
+
+    def __init__(self, input_file=None, text_cache_size=None, coalesce=None, compiled=None,
+                 indexing=None, profile=None, target_duration=None, puzzle=None,
+                 show_cage_analysis=None, **kwargs):
+        super().__init__(**kwargs)
+        self.input_file = input_file or "descriptors/8x8_puzzle_CLEAN.txt"
+        if text_cache_size is None:
+            text_cache_size = self.text_cache_size
+        self.text_cache = TextCache(text_cache_size)
+        if coalesce is not None:
+            self.coalesce = coalesce
+        if compiled is not None:
+            self.compiled = compiled
+        if indexing is not None:
+            self.indexing = indexing
+        if profile is not None:
+            self.profile = profile
+        if target_duration is not None:
+            self.target_duration = target_duration
+        if puzzle is not None:
+            self.puzzle = puzzle
+        if show_cage_analysis is not None:
+            self.show_cage_analysis = show_cage_analysis
+        self.profiler = None
+        self.puzzle_data = None
+        self.solution_data = None
+        self.solving_steps = []
+        
+    def parse_input_file(self):
+        try:
+            if self.puzzle is not None:
+                # One seek into the corpus through its index
+                self.puzzle_data, self.solution_data, self.solving_steps = load_puzzle(
+                    self.input_file, self.puzzle, self.indexing)
+                return
+            if self.compiled:
+                # Steps are unpacked from the memory-mapped file, which is
+                # closed before rendering starts
+                with load_descriptor(self.input_file) as descriptor:
+                    self.puzzle_data = descriptor.puzzle_data
+                    self.solution_data = descriptor.solution
+                    self.solving_steps = descriptor.load_steps()
+                return
+            # Steps are streamed from the file while construct() renders them
+            stream = DescriptorStream(self.input_file, self.indexing)
+            self.puzzle_data = stream.puzzle_data
+            self.solution_data = stream.solution
+            self.solving_steps = stream
+        except Exception as e:
+            print(f"Error parsing input file: {e}")
+            sys.exit(1)
+    
+    def assign_cage_colors(self):
+        colors = [RED, YELLOW, GREEN, ORANGE, PURPLE, PINK, BLUE_A, GREEN_A, 
+                 TEAL, MAROON, LIGHT_BROWN, DARK_BLUE, GOLD, GRAY]
+        # Same cycle as kenken_layout.CAGE_COLORS, as Manim colors
+        assign_cage_colors(self.puzzle_data['cages'], colors)
+
+
+    def construct(self):
+        if self.profile:
+            self.instrument()
+
+        # Parse input file
+        self.parse_input_file()
+        
+        if not self.puzzle_data:
+            print("No puzzle data found in the input file.")
+        if not self.solution_data:
+            print("No solution data found in the input file.")
+        if not self.puzzle_data or not self.solution_data:
+            # Show error message
+            error_text = self.text_cache.get("Failed to parse input file!", font_size=36, color=RED)
+            self.play(Write(error_text))
+            self.wait(3)
+            return
+
+        with self.section('phase', 'setup'):
+            self.setup_puzzle()
+        # Process solving steps
+        steps = self.solving_steps
+        if self.target_duration:
+            # The whole log is planned up front to fit the target length
+            plan = plan_timing(steps, self.grid_size, self.target_duration, self.coalesce,
+                               self.show_cage_analysis)
+            print(plan.summary())
+            self.pace = plan.pace
+            beats = plan.beats
+        else:
+            if self.coalesce:
+                steps = coalesce_steps(steps)
+            beats = ((step, True) for step in steps)
+
+        self.play_intro()
+        with self.section('phase', 'steps'):
+            for step, shown in beats:
+                # Coalesced beats are profiled by the kind of steps they group
+                name = f"{step.kind} group" if step.type == STEP_GROUP else step.type
+                with self.section('step', name):
+                    if shown:
+                        self.animate_step(step)
+                    else:
+                        self.apply_step(step)
+
+        with self.section('phase', 'celebration'):
+            self.play_outro()
+        print(self.text_cache.report())
+        if self.profiler:
+            self.write_profile()
+
+    def play(self, *animations, **kwargs):
+        if self.pace is not None:
+            # Timed as kenken_pacing plans it, e.g. Write is not stretched for long text
+            kwargs['run_time'] = kwargs.get('run_time', 1) * self.pace
+        super().play(*animations, **kwargs)
+
+    def wait(self, duration=DEFAULT_WAIT_TIME, **kwargs):
+        if self.pace is not None:
+            duration *= self.pace
+        super().wait(duration, **kwargs)
+
+    def instrument(self):
+        """Start a RenderProfile and hook the counters it needs into this scene.
+
+        Only called with profiling on, so an uninstrumented render runs the
+        stock play(), renderer and file writer.
+        """
+        profiler = self.profiler = RenderProfile(lambda: self.text_cache.layout_seconds)
+
+        play = self.play
+        def counted_play(*args, **kwargs):
+            result = play(*args, **kwargs)
+            profiler.record_play(len(self.mobjects))
+            return result
+        self.play = counted_play
+
+        renderer = self.renderer
+        if hasattr(renderer, 'update_frame'):
+            update_frame = renderer.update_frame
+            def timed_update_frame(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return update_frame(*args, **kwargs)
+                finally:
+                    profiler.raster_seconds += time.perf_counter() - start
+            renderer.update_frame = timed_update_frame
+
+        file_writer = getattr(renderer, 'file_writer', None)
+        if file_writer is not None:
+            write_frame = file_writer.write_frame
+            def timed_write_frame(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return write_frame(*args, **kwargs)
+                finally:
+                    profiler.encode_seconds += time.perf_counter() - start
+                    profiler.frames += 1
+            file_writer.write_frame = timed_write_frame
+
+    def section(self, kind, name):
+        """Profile section context: a phase of construct() or a step type."""
+        if self.profiler is None:
+            return NO_SECTION
+        return self.profiler.section(kind, name)
+
+    def write_profile(self):
+        data = self.profiler.write(self.profile, input_file=self.input_file,
+                                   coalesce=self.coalesce)
+        for line in summary_table(data):
+            print(line)
+        print(f"Render profile written to {self.profile}")
+
+    def setup_puzzle(self, state=None):
+        """Cage colors, grid layout, the static mobjects and the scene state.
+
+        state is the SceneState to continue from (see kenken_segments); by
+        default the puzzle starts empty.
+        """
+        # Assign colors to cages
+        self.assign_cage_colors()
+
+        # Get puzzle parameters
+        grid_size = self.puzzle_data['info']['size']
+        allowed_numbers = self.puzzle_data['info']['allowed_numbers']
+
+        # Grid parameters, shared with the static snapshots (see kenken_layout)
+        self.grid_size = grid_size
+        self.layout = GridLayout(grid_size)
+        self.cell_size = self.layout.cell_size
+        self.grid_offset = self.layout.grid_offset
+
+        # Track cell possibilities and values
+        self.state = state or SceneState(grid_size, allowed_numbers, self.show_cage_analysis)
+        self.cell_values = {(row, col): None for row in range(grid_size) for col in range(grid_size)}
+        self.possibility_texts = {}
+
+        # Cell -> cage and cage analysis -> cage lookups; cage ids index cage_groups
+        self.peers = PeerIndex(self.puzzle_data)
+        self.grid = self.create_grid()
+        self.cage_groups = self.create_cages()
+        numbers_str = ", ".join(map(str, allowed_numbers))
+        self.available = self.text_cache.get(f"Available numbers: {numbers_str}", font_size=18, color=YELLOW)
+        self.available.to_edge(UP)
+
+    def get_cell_center(self, row, col):
+        return self.layout.cell_center(row, col)
+
+    def create_grid(self):
+        cell_size = self.cell_size
+        grid_offset = self.grid_offset
+        grid = VGroup()
+        for i in range(self.grid_size + 1):
+            # Vertical lines
+            line = Line(
+                start=[i * cell_size - grid_offset, grid_offset, 0],
+                end=[i * cell_size - grid_offset, -grid_offset, 0],
+                color=BLACK,
+                stroke_width=3
+            )
+            grid.add(line)
+            
+            # Horizontal lines
+            line = Line(
+                start=[-grid_offset, grid_offset - i * cell_size, 0],
+                end=[grid_offset, grid_offset - i * cell_size, 0],
+                color=BLACK,
+                stroke_width=3
+            )
+            grid.add(line)
+        return grid
+
+    def create_cages(self):
+        """Cage backgrounds and labels."""
+        cell_size = self.cell_size
+        cage_groups = VGroup()
+        
+        for cage in self.puzzle_data['cages']:
+            cage_group = VGroup()
+            
+            # Create background rectangles for each cell in the cage
+            for row, col in cage["cells"]:
+                center = self.get_cell_center(row, col)
+                rect = Rectangle(
+                    width=cell_size * 0.9,
+                    height=cell_size * 0.9,
+                    fill_color=cage["color"],
+                    fill_opacity=0.2,
+                    stroke_color=cage["color"],
+                    stroke_width=2
+                ).move_to(center)
+                cage_group.add(rect)
+            
+            # Add operation label to the anchor cell, in its top-left corner
+            operation_label = self.text_cache.get(
+                cage["operation"],
+                font_size = self.layout.label_font_size(),
+                color=WHITE
+            ).move_to(self.layout.label_position(cage))
+            
+            cage_group.add(operation_label)
+            cage_groups.add(cage_group)
+        return cage_groups
+
+    def play_intro(self):
+        """Title, grid and cages, then the available numbers replace the title."""
+        grid_size = self.grid_size
+        with self.section('phase', 'grid'):
+            title = self.text_cache.get(f"KenKen Puzzle {grid_size}×{grid_size} - Logical Solution Process", 
+                            font_size=36, color=BLUE)
+            title.to_edge(UP)
+            self.play(Write(title))
+            self.play(Create(self.grid))
+        with self.section('phase', 'cages'):
+            self.play(Create(self.cage_groups))
+            # Smooth transition to subtitle
+            self.play(FadeOut(title), Write(self.available))
+
+    def restore_scene(self):
+        """Show the grid as it stands after the intro and the steps already in
+        self.state, without animating them."""
+        self.add(self.grid, self.cage_groups, self.available)
+        for cell, entry in sorted(self.state.shown.items()):
+            if entry[0] == 'value':
+                num_text = self.number_text(cell, entry[1])
+                self.cell_values[cell] = num_text
+                self.add(num_text)
+            else:
+                poss_text = self.possibility_text(cell, entry[1], entry[2])
+                self.possibility_texts[cell] = poss_text
+                self.add(poss_text)
+
+    def explanation(self, text, color):
+        return self.text_cache.get(text, font_size=14, color=color).to_edge(DOWN, buff=0.5)
+
+    def highlight(self, cell, color, opacity):
+        return Rectangle(
+            width=self.cell_size * 0.9,
+            height=self.cell_size * 0.9,
+            fill_color=color,
+            fill_opacity=opacity,
+            stroke_color=color,
+            stroke_width=3
+        ).move_to(self.get_cell_center(cell[0], cell[1]))
+
+    def number_text(self, cell, value):
+        num_text = self.text_cache.get(str(value), font_size=28, color=WHITE, weight=BOLD)
+        return num_text.move_to(self.get_cell_center(cell[0], cell[1]))
+
+    def possibility_text(self, cell, text, spaced):
+        style = {'line_spacing': 0.8} if spaced else {}
+        return self.text_cache.get(
+            text,
+            font_size=self.layout.possibilities_font_size(),
+            color=GRAY,
+            **style
+        ).move_to(self.get_cell_center(cell[0], cell[1]))
+
+    def update_possibilities(self, cell, text, spaced):
+        """Animation bringing the cell's possibility text up to date."""
+        poss_text = self.possibility_text(cell, text, spaced)
+        if cell in self.possibility_texts:
+            return Transform(self.possibility_texts[cell], poss_text)
+        self.possibility_texts[cell] = poss_text
+        return Write(poss_text)
+
+    def apply_step(self, step):
+        """Advance the grid by a step without animating it (a beat the timing
+        plan dropped); its cells change in place and show with the next beat."""
+        for cell, entry in self.state.advance(step) or ():
+            if cell in self.possibility_texts:
+                self.remove(self.possibility_texts.pop(cell))
+            if entry[0] == 'value':
+                text = self.cell_values[cell] = self.number_text(cell, entry[1])
+            else:
+                text = self.possibility_texts[cell] = self.possibility_text(cell, entry[1], entry[2])
+            self.add(text)
+
+    def animate_step(self, step):
+        """Animate one solving step or coalesced group as a beat.
+
+        The scene state is advanced through self.state (see
+        kenken_segments.SceneState); steps it does not draw are skipped.
+        """
+        state = self.state
+        step_counter = state.step_counter
+
+        if step.type == STEP_GROUP:
+            # One beat for the whole run: all highlights at once, then all
+            # cell updates at once
+            explanation_text = f"Step {step_counter}: {self.GROUP_TITLES[step.kind]}\n"
+            explanation_text += group_summary(step)
+            exp_obj = self.explanation(explanation_text, WHITE)
+
+            highlights = []
+            for member in step.cell_steps():
+                if member.type == 'assignment':
+                    color = GREEN
+                elif member.type == 'constraint_propagation':
+                    color = ORANGE
+                else:
+                    color = RED
+                highlights.append(self.highlight(member.cell, color, 0.3))
+
+            self.play(Write(exp_obj), LaggedStart(*[Create(h) for h in highlights], lag_ratio=0.1))
+
+            # Show each touched cell in its state after the whole group
+            updates = []
+            for cell, entry in state.advance(step):
+                if entry[0] == 'value':
+                    if cell in self.possibility_texts:
+                        updates.append(FadeOut(self.possibility_texts.pop(cell)))
+                    num_text = self.number_text(cell, entry[1])
+                    updates.append(Write(num_text))
+                    self.cell_values[cell] = num_text
+                else:
+                    updates.append(self.update_possibilities(cell, entry[1], entry[2]))
+            if updates:
+                self.play(AnimationGroup(*updates))
+
+            self.wait(1)
+            self.play(FadeOut(*highlights), FadeOut(exp_obj))
+
+        elif step.type == 'cage_analysis':
+            # A beat of its own, numbered, only with show_cage_analysis
+            if state.advance(step) is None:
+                return
+            # Show cage analysis
+            explanation_text = f"Step {step_counter}: Analyzing cage\n"
+            if step.combos:
+                explanation_text += f"Valid combinations:\n{step.combos[:50]}..."
+            else:
+                explanation_text += step.description[:60] + "..."
+            
+            exp_obj = self.explanation(explanation_text, WHITE)
+            
+            self.play(Write(exp_obj))
+            
+            # Highlight the analysed cage
+            cage_id = self.peers.cage_for(step)
+            if cage_id is not None:
+                self.play(Indicate(self.cage_groups[cage_id], color=WHITE))
+            
+            #self.wait(1.5)
+            self.play(FadeOut(exp_obj))
+        
+        elif step.type == 'constraint_propagation':
+            # Show constraint propagation
+            cell = step.cell
+            if cell:
+                explanation_text = f"Step {step_counter}: Constraint Propagation\n"
+                explanation_text += f"Cell ({cell[0]},{cell[1]}): "
+                explanation_text += f"{step.old_values} → {step.new_values}"
+                
+                exp_obj = self.explanation(explanation_text, ORANGE)
+                
+                self.play(Write(exp_obj))
+                
+                # Highlight the cell
+                highlight = self.highlight(cell, ORANGE, 0.5)
+                
+                self.play(Create(highlight))
+                
+                # Update cell possibilities and show them in the cell
+                for changed, entry in state.advance(step):
+                    self.play(self.update_possibilities(changed, entry[1], entry[2]))
+                
+                self.wait(1)
+                self.play(FadeOut(highlight), FadeOut(exp_obj))
+        
+        elif step.type == 'cage_line_elimination':
+            # Show cage-line elimination
+            cell = step.cell
+            value = step.value_removed
+            if cell and value:
+                explanation_text = f"Step {step_counter}: Cage-Line Elimination\n"
+                explanation_text += f"Remove {value} from ({cell[0]},{cell[1]})"
+                
+                exp_obj = self.explanation(explanation_text, RED)
+                
+                self.play(Write(exp_obj))
+                
+                # Highlight the cell
+                highlight = self.highlight(cell, RED, 0.3)
+                
+                self.play(Create(highlight))
+                
+                # Update possibilities
+                for changed, entry in state.advance(step):
+                    print(f"Possibilities for cell {changed}: {entry[1]}")
+                    self.play(self.update_possibilities(changed, entry[1], entry[2]))
+                
+                self.wait(1)
+                self.play(FadeOut(highlight), FadeOut(exp_obj))
+        
+        elif step.type == 'assignment':
+            # Show final assignment; guesses of the solver's search stand out
+            cell = step.cell
+            value = step.value
+            if step.rule == 'branch':
+                title, color = "Search Branch", PURPLE
+            else:
+                title, color = "Assignment", GREEN
+            
+            explanation_text = f"Step {step_counter}: {title}\n"
+            explanation_text += f"Cell ({cell[0]},{cell[1]}) = {value}"
+            
+            exp_obj = self.explanation(explanation_text, color)
+            
+            self.play(Write(exp_obj))
+            
+            # Highlight the cell
+            highlight = self.highlight(cell, color, 0.5)
+            
+            self.play(Create(highlight))
+            
+            state.advance(step)
+
+            # Remove possibility text if present
+            if cell in self.possibility_texts:
+                self.play(FadeOut(self.possibility_texts.pop(cell)))
+            
+            # Place the number
+            num_text = self.number_text(cell, value)
+            self.play(Write(num_text))
+            self.cell_values[cell] = num_text
+            
+            self.play(FadeOut(highlight))
+            self.wait(0.5)
+            self.play(FadeOut(exp_obj))
+
+    def play_outro(self):
+        unset = self.state.grid.values.count(0)
+        if unset:
+            # The log stopped short of the solution: say so instead of celebrating
+            stalled_text = self.text_cache.get(f"Logic stalled: {unset} cells unsolved",
+                                               font_size=32, color=RED)
+            stalled_text.to_edge(DOWN, buff=0.5)
+            self.play(Write(stalled_text))
+            self.wait(3)
+            return
+
+        # Final celebration
+        final_text = self.text_cache.get("Puzzle Solved!", font_size=32, color=GOLD)
+        final_text.to_edge(DOWN, buff=0.5)
+        
+        self.play(Write(final_text))
+
+        # Celebratory effects
+        for cell, num_text in self.cell_values.items():
+            if num_text:
+                self.play(
+                    num_text.animate.scale(1.3).set_color(GOLD),
+                    run_time=0.1
+                )
+                self.play(
+                    num_text.animate.scale(1/1.3).set_color(WHITE),
+                    run_time=0.1
+                )
+        
+        self.wait(3)
+
+
+class KenKenSegment(KenKenGenerator):
+    """One segment of a KenKenGenerator video (see kenken_segments): the
+    intro, a run of steps started from the state the steps before left, or
+    the outro."""
+
+    def __init__(self, puzzle_data, segment, **kwargs):
+        super().__init__(**kwargs)
+        self.puzzle_data = puzzle_data
+        self.segment = segment
+
+    def construct(self):
+        segment = self.segment
+        self.setup_puzzle(segment.state.copy())
+        if segment.kind == INTRO:
+            self.play_intro()
+            return
+        self.restore_scene()
+        for step in segment.steps:
+            self.animate_step(step)
+        if segment.kind == OUTRO:
+            self.play_outro()
+
+
+def render_descriptor(input_file, render_config, coalesce=False, compiled=False, indexing=None,
+                      profile=None, target_duration=None, puzzle=None, show_cage_analysis=False):
+    """Render one descriptor with the given Manim config overrides; with a
+    profile path the render is instrumented (see KenKenGenerator.instrument),
+    with a target_duration it is planned to fit it (see kenken_pacing), and
+    with a puzzle number input_file is read as a corpus (see kenken_corpus)."""
+    # The scene reads the config when it is created, so build it inside tempconfig
+    with tempconfig(render_config):
+        scene = KenKenGenerator(input_file=input_file, coalesce=coalesce, compiled=compiled,
+                                indexing=indexing, profile=profile,
+                                target_duration=target_duration, puzzle=puzzle,
+                                show_cage_analysis=show_cage_analysis)
+        scene.render()
+
+
+def render_segmented(input_file, render_config, cache_dir, segment_size=None,
+                     coalesce=False, compiled=False, indexing=None, show_cage_analysis=False):
+    """Render one descriptor through the segment cache; returns the video path.
+
+    The animation is cut into segments (see kenken_segments.plan_segments).
+    Segments already in cache_dir are reused, the others are rendered as
+    separate scenes and stored there, and all of them are concatenated into
+    the output Manim would have written. segment_size defaults to
+    kenken_segments.SEGMENT_SIZE beats.
+    """
+    start = time.perf_counter()
+    descriptor = None
+    try:
+        if compiled:
+            descriptor = load_descriptor(input_file)
+            puzzle_data, solution, steps = descriptor.puzzle_data, descriptor.solution, list(descriptor)
+        else:
+            puzzle_data, solution, steps = parse_descriptor(input_file, indexing)
+    except Exception as e:
+        print(f"Error parsing input file: {e}")
+        sys.exit(1)
+    try:
+        if not puzzle_data['info'] or not solution:
+            # Nothing to cut up: the full scene renders the error message
+            render_descriptor(input_file, render_config, coalesce, compiled, indexing,
+                              show_cage_analysis=show_cage_analysis)
+            return None
+        if coalesce:
+            steps = list(coalesce_steps(steps))
+
+        scene_config = {key: value for key, value in render_config.items()
+                        if key not in OUTPUT_CONFIG_KEYS}
+        salt = render_salt(puzzle_data, scene_config, SEGMENT_SOURCES)
+        segments = plan_segments(puzzle_data, steps, salt, segment_size or SEGMENT_SIZE,
+                                 show_cage_analysis)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        paths = []
+        rendered = []
+        work_dir = tempfile.mkdtemp(prefix=".render-", dir=cache_dir)
+        try:
+            for segment in segments:
+                path = os.path.join(cache_dir, segment.filename())
+                paths.append(path)
+                if os.path.exists(path):
+                    continue
+                segment_config = dict(scene_config, output_file=segment.key,
+                                      media_dir=work_dir, video_dir=work_dir)
+                with tempconfig(segment_config):
+                    scene = KenKenSegment(puzzle_data, segment)
+                    scene.render()
+                    produced = scene.renderer.file_writer.movie_file_path
+                os.replace(produced, path)
+                rendered.append(path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    finally:
+        if descriptor is not None:
+            descriptor.close()
+
+    with tempconfig(render_config):
+        output = os.path.join(config.get_dir("video_dir", module_name=""),
+                              config.output_file + VIDEO_EXTENSION)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    concat_videos(paths, output)
+
+    hits = len(segments) - len(rendered)
+    total_seconds = sum(video_seconds(path) for path in paths)
+    rendered_seconds = sum(video_seconds(path) for path in rendered)
+    print(f"Segment cache: {hits} hits, {len(rendered)} misses of {len(segments)} segments "
+          f"({hits / len(segments):.1%} hit rate); rendered {rendered_seconds:.1f}s "
+          f"of {total_seconds:.1f}s of video in {time.perf_counter() - start:.1f}s")
+    print(f"Video written to: {output}")
+    return output
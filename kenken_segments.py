@@ -0,0 +1,245 @@
+import hashlib
+import os
+
+from kenken_coalesce import STEP_GROUP
+from kenken_parser import ASSIGNMENT, CAGE_ANALYSIS, CAGE_LINE_ELIMINATION, CONSTRAINT_PROPAGATION
+from kenken_state import GridState
+
+# The solving animation is cut into segments of this many beats (drawn steps
+# or coalesced groups); each segment is rendered and cached as its own video
+SEGMENT_SIZE = 20
+# Bump when the segment layout or key changes, to invalidate every cached segment
+CACHE_VERSION = 1
+VIDEO_EXTENSION = ".mp4"
+
+INTRO = 'intro'
+STEPS = 'steps'
+OUTRO = 'outro'
+
+
+def format_possibilities(values, max_per_line=3):
+    """Format possibilities with line breaks to fit in cell."""
+    if not values:
+        return ""
+    possibilities = list(map(str, values))
+    lines = []
+    # Group by max_per_line
+    for i in range(0, len(possibilities), max_per_line):
+        lines.append(",".join(possibilities[i:i + max_per_line]))
+    return "\n".join(lines)
+
+
+def is_drawn(step, show_cage_analysis=False):
+    """Whether KenKenGenerator animates the step (or group) as a beat; cage
+    analyses are only with show_cage_analysis."""
+    step_type = step.type
+    if step_type == STEP_GROUP or step_type == ASSIGNMENT:
+        return True
+    if step_type == CAGE_ANALYSIS:
+        return show_cage_analysis
+    if step_type == CONSTRAINT_PROPAGATION:
+        return bool(step.cell)
+    if step_type == CAGE_LINE_ELIMINATION:
+        return bool(step.cell and step.value_removed)
+    return False
+
+
+class SceneState:
+    """What the solving animation shows between two beats.
+
+    grid is the GridState, shown maps each cell with text in it to
+    ('value', v) or ('candidates', text, spaced), spaced being the tighter
+    line spacing of prune and group updates, and step_counter is the number
+    of the next beat. KenKenGenerator advances it beat by beat, so a segment
+    can start from a copy of it without animating the steps before. With
+    show_cage_analysis, cage analyses are beats too (that change no cell).
+    """
+    __slots__ = ('grid', 'shown', 'step_counter', 'show_cage_analysis')
+
+    def __init__(self, size, allowed_numbers, show_cage_analysis=False):
+        self.grid = GridState(size, allowed_numbers)
+        self.shown = {}
+        self.step_counter = 1
+        self.show_cage_analysis = show_cage_analysis
+
+    def copy(self):
+        state = SceneState.__new__(SceneState)
+        state.grid = self.grid.copy()
+        state.shown = dict(self.shown)
+        state.step_counter = self.step_counter
+        state.show_cage_analysis = self.show_cage_analysis
+        return state
+
+    def has_value(self, cell):
+        return self.shown.get(cell, ('',))[0] == 'value'
+
+    def _candidates(self, cell, values, spaced, changes):
+        if not self.has_value(cell):
+            entry = self.shown[cell] = ('candidates', format_possibilities(values), spaced)
+            changes.append((cell, entry))
+
+    def _value(self, cell, value, changes):
+        entry = self.shown[cell] = ('value', value)
+        changes.append((cell, entry))
+
+    def advance(self, step):
+        """Apply one step or group; returns its (cell, shown entry) changes in
+        the order they are animated, or None if the step is not drawn."""
+        if not is_drawn(step, self.show_cage_analysis):
+            return None
+        grid = self.grid
+        changes = []
+        if step.type == STEP_GROUP:
+            members = step.cell_steps()
+            changed = []
+            for member in members:
+                grid.apply(member)
+                if member.cell not in changed:
+                    changed.append(member.cell)
+            for member in members:
+                if member.type == ASSIGNMENT:
+                    self._value(member.cell, member.value, changes)
+            for cell in changed:
+                self._candidates(cell, grid.candidate_list(cell), True, changes)
+        elif step.type == CONSTRAINT_PROPAGATION:
+            grid.apply(step)
+            self._candidates(step.cell, step.new_values, True, changes)
+        elif step.type == CAGE_LINE_ELIMINATION:
+            grid.apply(step)
+            self._candidates(step.cell, grid.candidate_list(step.cell), False, changes)
+        elif step.type == CAGE_ANALYSIS:
+            pass
+        else:
+            grid.apply(step)
+            self._value(step.cell, step.value, changes)
+        self.step_counter += 1
+        return changes
+
+    def fingerprint(self):
+        return (self.grid.candidates.tobytes() + self.grid.values.tobytes() +
+                repr((sorted(self.shown.items()), self.step_counter,
+                      self.show_cage_analysis)).encode())
+
+
+class Segment:
+    """One cached piece of the video: the intro, a run of steps or the outro,
+    with the scene state it starts from and its cache key."""
+    __slots__ = ('kind', 'index', 'steps', 'state', 'key')
+
+    def __init__(self, kind, index, steps, state, key):
+        self.kind = kind
+        self.index = index
+        self.steps = steps
+        self.state = state
+        self.key = key
+
+    def filename(self):
+        return self.key + VIDEO_EXTENSION
+
+    def __repr__(self):
+        return f"Segment({self.kind!r}, {self.index}, {len(self.steps)} steps, {self.key[:12]})"
+
+
+def step_key(step):
+    """Text that determines how a step or group is drawn."""
+    if step.type == STEP_GROUP:
+        return f"{STEP_GROUP}:{step.kind}\n{step.description}"
+    return f"{step.type}:{step.description}"
+
+
+def segment_key(salt, kind, state, steps=()):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(salt)
+    digest.update(kind.encode())
+    digest.update(state.fingerprint())
+    for step in steps:
+        digest.update(step_key(step).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def render_salt(puzzle_data, render_config, sources):
+    """Key material shared by all segments of one render: the cache version,
+    the puzzle, the render config and the contents of the renderer's source
+    files, so a styling change invalidates every segment."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(CACHE_VERSION).encode())
+    cages = [(cage['operation'], cage['cells'], cage['anchor']) for cage in puzzle_data['cages']]
+    digest.update(repr((sorted(puzzle_data['info'].items()), cages)).encode())
+    digest.update(repr(sorted((str(k), str(v)) for k, v in render_config.items())).encode())
+    for path in sources:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.digest()
+
+
+def plan_segments(puzzle_data, steps, salt, segment_size=SEGMENT_SIZE, show_cage_analysis=False):
+    """Cut a render into Segments: the intro, runs of segment_size beats, the outro.
+
+    Steps that are not drawn join the segment of the beat before them (or
+    the first one). Boundaries depend only on the beat count, so editing one
+    step changes the key of its own segment and, if the grid it leaves
+    behind changes, of the ones after it.
+    """
+    info = puzzle_data['info']
+    state = SceneState(info['size'], info['allowed_numbers'], show_cage_analysis)
+    segments = [Segment(INTRO, 0, [], state.copy(), segment_key(salt, INTRO, state))]
+    entering = state.copy()
+    run = []
+    beats = 0
+    for step in steps:
+        if beats == segment_size and is_drawn(step, show_cage_analysis):
+            segments.append(Segment(STEPS, len(segments), run, entering,
+                                    segment_key(salt, STEPS, entering, run)))
+            entering = state.copy()
+            run = []
+            beats = 0
+        run.append(step)
+        if state.advance(step) is not None:
+            beats += 1
+    if beats:
+        segments.append(Segment(STEPS, len(segments), run, entering,
+                                segment_key(salt, STEPS, entering, run)))
+    segments.append(Segment(OUTRO, len(segments), [], state.copy(),
+                            segment_key(salt, OUTRO, state)))
+    return segments
+
+
+def concat_videos(paths, output):
+    """Join videos with identical encoding into output without re-encoding.
+
+    Uses FFmpeg's concat demuxer through PyAV, as Manim does for the partial
+    movies of one scene. The output is written under a temporary name and
+    renamed into place.
+    """
+    import av
+
+    list_path = output + ".concat.txt"
+    tmp_path = output + ".part" + VIDEO_EXTENSION
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    try:
+        with av.open(list_path, format="concat", options={"safe": "0"}) as source, \
+                av.open(tmp_path, mode="w") as target:
+            source_stream = source.streams.video[0]
+            target_stream = target.add_stream(template=source_stream)
+            for packet in source.demux(source_stream):
+                if packet.dts is None:
+                    continue
+                packet.stream = target_stream
+                target.mux(packet)
+        os.replace(tmp_path, output)
+    finally:
+        for path in (list_path, tmp_path):
+            if os.path.exists(path):
+                os.remove(path)
+    return output
+
+
+def video_seconds(path):
+    import av
+
+    with av.open(path) as container:
+        return container.duration / av.time_base if container.duration else 0.0
@@ -0,0 +1,527 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import secrets
+import shutil
+import signal
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from kenken_parser import BANNER, format_puzzle, format_solution_line, read_header
+from kenken_solver import parse_operation
+
+# HTTP/JSON job service: POST a puzzle or descriptor, poll its job, fetch the
+# solver log, an HTML walkthrough or a rendered video. Solves (and checks of
+# uploaded logs) run in a process pool and renders in a smaller pool of their
+# own; each is fed by a bounded queue, and a request that finds its queue
+# full is turned away with 429 so a flood of uploads cannot pile up work.
+#
+#   POST /jobs              {"descriptor": text, "search": false, "render": false,
+#                            "quality": "low"} -> 202 {"id": ..., "status": ...}
+#   GET  /jobs/<id>         job status and, once solved, its summary
+#   GET  /jobs/<id>/descriptor, /jobs/<id>/player, /jobs/<id>/video
+#   GET  /stats             queue depths and job counts
+
+# Largest grid accepted; bigger ones can keep a solver busy for minutes
+MAX_SIZE = 9
+# Largest cage accepted; combo enumeration grows factorially with cage size
+MAX_CAGE_CELLS = 6
+MAX_BODY_BYTES = 1 << 20
+# Finished jobs kept for polling; the oldest are forgotten (files and all)
+MAX_FINISHED_JOBS = 10000
+# Seconds a client is told to wait after a 429
+RETRY_AFTER = 1
+# Seconds an idle keep-alive connection stays open
+IDLE_TIMEOUT = 60
+QUALITIES = ("low", "medium", "high")
+
+# Per-process result cache of the solve workers (see _init_worker)
+_result_cache = None
+
+
+def validate_puzzle(puzzle_data):
+    """Raise ValueError unless puzzle_data is a well-formed puzzle of a size
+    the service takes: every cell in exactly one cage, every hint readable."""
+    info = puzzle_data['info']
+    size = info.get('size')
+    if not size:
+        raise ValueError("no size: line")
+    if not 1 <= size <= MAX_SIZE:
+        raise ValueError(f"size {size} is outside 1..{MAX_SIZE}")
+    numbers = info.get('allowed_numbers') or []
+    if len(set(numbers)) != size:
+        raise ValueError(f"allowed_numbers must list {size} distinct numbers")
+    if not puzzle_data['cages']:
+        raise ValueError("no cages")
+    seen = set()
+    for cage in puzzle_data['cages']:
+        cells = cage['cells']
+        if len(cells) > MAX_CAGE_CELLS:
+            raise ValueError(f"cage {cage['operation']} has {len(cells)} cells "
+                             f"(at most {MAX_CAGE_CELLS})")
+        parse_operation(cage['operation'], len(cells))
+        for cell in cells:
+            row, col = cell
+            if not (0 <= row < size and 0 <= col < size):
+                raise ValueError(f"cell {cell} is off the {size}x{size} grid")
+            if cell in seen:
+                raise ValueError(f"cell {cell} is in two cages")
+            seen.add(cell)
+        if cage['anchor'] is not None and cage['anchor'] not in cells:
+            raise ValueError(f"anchor {cage['anchor']} is outside its cage")
+    if len(seen) != size * size:
+        raise ValueError(f"{size * size - len(seen)} cells are in no cage")
+
+
+def read_upload(text):
+    """(puzzle_data, has_log) of an uploaded puzzle definition or descriptor;
+    raises ValueError if it is not one the service takes."""
+    puzzle_data, rest = read_header(iter(text.splitlines()), require_banner=False)
+    validate_puzzle(puzzle_data)
+    return puzzle_data, rest is not None
+
+
+def _init_worker(cache_root, cache_bytes):
+    global _result_cache
+    if cache_root:
+        from kenken_cache import ResultCache
+        _result_cache = ResultCache(cache_root, cache_bytes)
+
+
+def solve_text(text, search=False):
+    """Solve worker: (descriptor text, summary, issues) for an upload.
+
+    A bare puzzle is solved first; then the log is replayed (see
+    kenken_replay) and graded (see kenken_grade), so uploaded logs are
+    checked the same way as the solver's own.
+    """
+    from kenken_corpus import parse_text
+    from kenken_grade import grade_steps
+    from kenken_replay import replay
+
+    puzzle_data, rest = read_header(iter(text.splitlines()), require_banner=False)
+    if rest is None:
+        if _result_cache is not None:
+            from kenken_cache import solve_cached
+            solution, log, _ = solve_cached(puzzle_data, _result_cache, search)
+        else:
+            from kenken_solver import solve_puzzle
+            solution, log = solve_puzzle(puzzle_data, search=search)
+        lines = format_puzzle(puzzle_data) + [BANNER] + log
+        if solution:
+            lines.append(format_solution_line(solution))
+        text = "\n".join(lines) + "\n"
+    puzzle_data, solution, steps = parse_text(text)
+    _, issues = replay(puzzle_data, solution, steps)
+    return text, grade_steps(puzzle_data, steps), issues
+
+
+def player_page(text):
+    """Worker: the HTML walkthrough page (see kenken_player) of a descriptor."""
+    from kenken_corpus import parse_text
+    from kenken_layout import assign_cage_colors
+    from kenken_player import player_data, render_page
+
+    puzzle_data, _, steps = parse_text(text)
+    assign_cage_colors(puzzle_data['cages'])
+    return render_page(puzzle_data, player_data(puzzle_data, steps))
+
+
+def job_view(job):
+    """The JSON-able part of a job."""
+    view = {key: value for key, value in job.items() if key != 'descriptor'}
+    links = {}
+    if job['summary'] is not None:
+        links['descriptor'] = f"/jobs/{job['id']}/descriptor"
+        if not job['issues']:
+            # An uploaded log that fails its check cannot be played through
+            links['player'] = f"/jobs/{job['id']}/player"
+    if job['video']:
+        links['video'] = f"/jobs/{job['id']}/video"
+    view['links'] = links
+    view['video'] = bool(job['video'])
+    return view
+
+
+class JobServer:
+    """Job queues, worker pools and the HTTP front end.
+
+    Jobs go queued -> solving -> (rendering ->) done, or failed at any step.
+    queue_size bounds the jobs waiting for a solve worker and render_queue_size
+    those waiting for a render worker; a render job that finds the render
+    queue full after solving waits for room, holding its solve worker, so a
+    backlog of renders slows the solves feeding it.
+    """
+
+    def __init__(self, work_dir, solve_workers=None, render_workers=1, queue_size=64,
+                 render_queue_size=8, result_cache=None, cache_bytes=None, render_timeout=None,
+                 verbose=False):
+        self.work_dir = work_dir
+        self.solve_workers = solve_workers or os.cpu_count() or 1
+        self.render_workers = render_workers
+        self.result_cache = result_cache
+        self.cache_bytes = cache_bytes
+        self.render_timeout = render_timeout
+        self.verbose = verbose
+        self.jobs = {}
+        self.finished = deque()
+        self.counts = dict.fromkeys(('submitted', 'rejected', 'invalid', 'done', 'failed'), 0)
+        self.solve_queue = asyncio.Queue(queue_size)
+        self.render_queue = asyncio.Queue(render_queue_size)
+        self.process_pool = None
+        self.render_pool = None
+        self.render_cache = None
+        self.tasks = []
+
+    async def start(self, host, port):
+        os.makedirs(self.work_dir, exist_ok=True)
+        # Workers are started on demand; forked from this process they would
+        # inherit the open client sockets and keep closed connections alive
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self.process_pool = ProcessPoolExecutor(self.solve_workers, context, _init_worker,
+                                                (self.result_cache, self.cache_bytes))
+        self.render_pool = ThreadPoolExecutor(self.render_workers)
+        if self.result_cache:
+            from kenken_cache import ResultCache
+            self.render_cache = ResultCache(self.result_cache, self.cache_bytes)
+        self.tasks = [asyncio.create_task(self.solve_worker()) for _ in range(self.solve_workers)]
+        self.tasks += [asyncio.create_task(self.render_worker()) for _ in range(self.render_workers)]
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        """Stop the workers; solves under way are finished first."""
+        for task in self.tasks:
+            task.cancel()
+        if self.process_pool:
+            self.process_pool.shutdown()
+        if self.render_pool:
+            self.render_pool.shutdown(wait=False)
+
+    def log(self, message):
+        if self.verbose:
+            print(message, flush=True)
+
+    # Jobs
+
+    def submit(self, request):
+        """(status, body) for a POST /jobs request body."""
+        text = request.get('descriptor')
+        if not isinstance(text, str):
+            self.counts['invalid'] += 1
+            return HTTPStatus.BAD_REQUEST, {'error': "'descriptor' must be the puzzle's text"}
+        quality = request.get('quality', 'low')
+        if quality not in QUALITIES:
+            self.counts['invalid'] += 1
+            return HTTPStatus.BAD_REQUEST, {'error': f"'quality' must be one of {QUALITIES}"}
+        try:
+            _, has_log = read_upload(text)
+        except (ValueError, KeyError) as e:
+            self.counts['invalid'] += 1
+            return HTTPStatus.BAD_REQUEST, {'error': f"invalid puzzle: {e}"}
+        render = bool(request.get('render'))
+        if self.solve_queue.full() or (render and self.render_queue.full()):
+            self.counts['rejected'] += 1
+            return HTTPStatus.TOO_MANY_REQUESTS, {'error': "job queue is full",
+                                                 'retry_after': RETRY_AFTER}
+
+        job_id = secrets.token_hex(8)
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'kind': 'check' if has_log else 'solve',
+            'search': bool(request.get('search')),
+            'render': render,
+            'quality': quality,
+            'submitted': time.time(),
+            'started': None,
+            'finished': None,
+            'summary': None,
+            'issues': None,
+            'error': None,
+            'video': None,
+            'descriptor': text,
+        }
+        self.jobs[job_id] = job
+        self.solve_queue.put_nowait(job)
+        self.counts['submitted'] += 1
+        return HTTPStatus.ACCEPTED, job_view(job)
+
+    def finish(self, job, status, error=None):
+        job['status'] = status
+        job['error'] = error
+        job['finished'] = time.time()
+        self.counts[status] += 1
+        self.log(f"[{status:>6}] {job['id']} ({job['finished'] - job['submitted']:.2f}s)")
+        self.finished.append(job['id'])
+        while len(self.finished) > MAX_FINISHED_JOBS:
+            job_id = self.finished.popleft()
+            del self.jobs[job_id]
+            for extension in (".txt", ".mp4"):
+                try:
+                    os.remove(os.path.join(self.work_dir, job_id + extension))
+                except FileNotFoundError:
+                    pass
+
+    async def solve_worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.solve_queue.get()
+            try:
+                job['status'] = 'solving'
+                job['started'] = time.time()
+                try:
+                    text, summary, issues = await loop.run_in_executor(
+                        self.process_pool, solve_text, job['descriptor'], job['search'])
+                except (ValueError, KeyError) as e:
+                    self.finish(job, 'failed', f"could not parse: {e}")
+                    continue
+                except Exception as e:
+                    self.finish(job, 'failed', f"solver error: {e!r}")
+                    continue
+                job['descriptor'] = text
+                job['summary'] = summary
+                job['issues'] = issues
+                if not job['render']:
+                    self.finish(job, 'done')
+                elif issues:
+                    self.finish(job, 'failed', "log check failed:\n" + "\n".join(issues))
+                else:
+                    job['status'] = 'rendering'
+                    await self.render_queue.put(job)
+            finally:
+                self.solve_queue.task_done()
+
+    async def render_worker(self):
+        from kenken_batch_render import cached_render_job, render_job, render_key
+
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.render_queue.get()
+            try:
+                descriptor = os.path.join(self.work_dir, job['id'] + ".txt")
+                with open(descriptor, 'w', encoding='utf-8') as f:
+                    f.write(job['descriptor'])
+                options = (job['quality'], False, self.render_timeout)
+                if self.render_cache is not None:
+                    key = render_key(descriptor, job['quality'])
+                    call = (cached_render_job, descriptor, key, self.render_cache, self.work_dir)
+                else:
+                    call = (render_job, descriptor, self.work_dir)
+                result = await loop.run_in_executor(self.render_pool, *call, *options)
+                if result['status'] == 'failed':
+                    self.finish(job, 'failed', result['error'])
+                else:
+                    job['video'] = result['output']
+                    self.finish(job, 'done')
+            except OSError as e:
+                self.finish(job, 'failed', str(e))
+            finally:
+                self.render_queue.task_done()
+
+    def stats(self):
+        statuses = {}
+        for job in self.jobs.values():
+            statuses[job['status']] = statuses.get(job['status'], 0) + 1
+        return {
+            'solve_workers': self.solve_workers,
+            'render_workers': self.render_workers,
+            'solve_queue': self.solve_queue.qsize(),
+            'solve_queue_size': self.solve_queue.maxsize,
+            'render_queue': self.render_queue.qsize(),
+            'render_queue_size': self.render_queue.maxsize,
+            'jobs': statuses,
+            'totals': dict(self.counts),
+        }
+
+    # HTTP
+
+    async def route(self, method, path, body):
+        """(status, content type, payload bytes) for one request."""
+        parts = [part for part in urlsplit(path).path.split('/') if part]
+        if parts == ['jobs']:
+            if method != 'POST':
+                return json_response(HTTPStatus.METHOD_NOT_ALLOWED, {'error': "POST a job"})
+            try:
+                request = json.loads(body)
+            except ValueError as e:
+                return json_response(HTTPStatus.BAD_REQUEST, {'error': f"invalid JSON: {e}"})
+            if not isinstance(request, dict):
+                return json_response(HTTPStatus.BAD_REQUEST, {'error': "expected a JSON object"})
+            return json_response(*self.submit(request))
+        if method != 'GET':
+            return json_response(HTTPStatus.METHOD_NOT_ALLOWED, {'error': "GET only"})
+        if parts == ['stats']:
+            return json_response(HTTPStatus.OK, self.stats())
+        if len(parts) in (2, 3) and parts[0] == 'jobs' and parts[1] in self.jobs:
+            job = self.jobs[parts[1]]
+            if len(parts) == 2:
+                return json_response(HTTPStatus.OK, job_view(job))
+            links = job_view(job)['links']
+            if parts[2] not in links:
+                return json_response(HTTPStatus.NOT_FOUND,
+                                     {'error': f"no {parts[2]} for a {job['status']} job"})
+            loop = asyncio.get_running_loop()
+            if parts[2] == 'descriptor':
+                return HTTPStatus.OK, "text/plain; charset=utf-8", job['descriptor'].encode()
+            if parts[2] == 'player':
+                page = await loop.run_in_executor(self.process_pool, player_page,
+                                                  job['descriptor'])
+                return HTTPStatus.OK, "text/html; charset=utf-8", page.encode()
+            data = await loop.run_in_executor(None, read_bytes, job['video'])
+            return HTTPStatus.OK, "video/mp4", data
+        return json_response(HTTPStatus.NOT_FOUND, {'error': f"no such resource: {path}"})
+
+    async def respond(self, reader):
+        """(status, content type, payload bytes, keep alive) for the next
+        request on a connection, None at its end."""
+        try:
+            request = await asyncio.wait_for(read_request(reader), IDLE_TIMEOUT)
+        except ValueError as e:
+            return (*json_response(HTTPStatus.BAD_REQUEST, {'error': f"malformed request: {e}"}),
+                    False)
+        if request is None:
+            return None
+        method, path, headers, body = request
+        if body is None:
+            return (*json_response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                   {'error': f"bodies are limited to {MAX_BODY_BYTES} bytes"}),
+                    False)
+        try:
+            response = await self.route(method, path, body)
+        except Exception as e:
+            self.log(f"Error answering {method} {path}: {e!r}")
+            response = json_response(HTTPStatus.INTERNAL_SERVER_ERROR,
+                                     {'error': f"internal error: {e!r}"})
+        return (*response, headers.get('connection', '').lower() != 'close')
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                response = await self.respond(reader)
+                if response is None:
+                    break
+                status, content_type, payload, keep_alive = response
+                head = [f"HTTP/1.1 {status.value} {status.phrase}",
+                        f"Content-Type: {content_type}",
+                        f"Content-Length: {len(payload)}"]
+                if status == HTTPStatus.TOO_MANY_REQUESTS:
+                    head.append(f"Retry-After: {RETRY_AFTER}")
+                if not keep_alive:
+                    head.append("Connection: close")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            pass  # shutting down with the connection idle; the loop is closing it
+        finally:
+            writer.close()
+
+
+def json_response(status, body):
+    return status, "application/json", json.dumps(body).encode()
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+async def read_request(reader):
+    """(method, path, headers, body) of the next HTTP/1.1 request, None at the
+    end of the connection; body is None if it is over MAX_BODY_BYTES.
+    Raises ValueError for a malformed request."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    parts = line.decode('latin-1').split()
+    if len(parts) != 3:
+        raise ValueError(f"bad request line {line.strip()!r}")
+    method, path, _ = parts
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', ''):
+        raise ValueError("chunked request bodies are not supported")
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise ValueError(f"bad Content-Length {headers['content-length']!r}") from None
+    if length > MAX_BODY_BYTES:
+        return method, path, headers, None
+    body = await reader.readexactly(length) if length else b''
+    return method, path, headers, body
+
+
+async def serve(args):
+    from kenken_cache import parse_size
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="kenken_jobs_")
+    server = JobServer(work_dir, args.workers, args.render_workers, args.queue_size,
+                       args.render_queue_size, args.result_cache,
+                       parse_size(args.cache_size) if args.cache_size else None,
+                       args.render_timeout, args.verbose)
+    listener = await server.start(args.host, args.port)
+    host, port = listener.sockets[0].getsockname()[:2]
+    print(f"Listening on http://{host}:{port} ({server.solve_workers} solve workers, "
+          f"{server.render_workers} render workers, jobs in {work_dir})", flush=True)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C still ends asyncio.run with KeyboardInterrupt
+    try:
+        async with listener:
+            await stop.wait()
+    finally:
+        server.close()
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve KenKen solve and render jobs over HTTP/JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="Port (0 picks a free one)")
+    parser.add_argument("--workers", "-j", type=int,
+                        help="Solve worker processes (default: one per CPU)")
+    parser.add_argument("--render-workers", type=int, default=1,
+                        help="Renders running at once")
+    parser.add_argument("--queue-size", type=int, default=64,
+                        help="Jobs waiting for a solve worker before new ones get 429")
+    parser.add_argument("--render-queue-size", type=int, default=8,
+                        help="Jobs waiting for a render worker before render requests get 429")
+    parser.add_argument("--render-timeout", type=float, help="Seconds before a render is abandoned")
+    parser.add_argument("--work-dir", help="Directory for job descriptors and videos "
+                                           "(default: a temporary one, removed on exit)")
+    parser.add_argument("--result-cache", metavar="DIR",
+                        help="Solve and render duplicates once, through a result cache in DIR")
+    parser.add_argument("--cache-size", metavar="SIZE",
+                        help="Evict least recently used results beyond SIZE (e.g. 2G)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print each finished job")
+    args = parser.parse_args()
+    if args.cache_size and not args.result_cache:
+        parser.error("--cache-size needs --result-cache")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import argparse
+import html
+import os
+import sys
+import time
+
+from kenken_layout import GridLayout, assign_cage_colors
+from kenken_parser import INDEXING_CHOICES, DescriptorStream
+from kenken_segments import SceneState
+
+# Static images of the grid at one point of the solve, drawn with the
+# layout of KenKenGenerator (see kenken_layout) straight to SVG, or to PNG
+# through pycairo, without Manim or any animation.
+
+FORMATS = ("svg", "png")
+DEFAULT_WIDTH = 480
+# Empty space around the grid, in scene units
+MARGIN = 0.2
+# Size of one em per unit of Manim font_size, in scene units (Manim's Text at
+# font_size 48 is about 0.75 units per em)
+EM_PER_FONT_SIZE = 1 / 64
+# Scene units per unit of Manim stroke_width
+STROKE_UNITS = 0.01
+BACKGROUND = "#000000"
+GRID_COLOR = "#000000"
+TEXT_COLOR = "#FFFFFF"
+POSSIBILITIES_COLOR = "#888888"
+NUMBER_FONT_SIZE = 28
+# Line height in ems of candidate lists, with and without Manim's line_spacing=0.8
+LINE_HEIGHT = {True: 1.0, False: 1.2}
+
+
+def snapshot_items(puzzle_data, shown, layout):
+    """Shapes of one frame, in scene units, in drawing order.
+
+    shown maps cells to ('value', v) or ('candidates', text, spaced), as in
+    kenken_segments.SceneState. Items are ('line', x1, y1, x2, y2, color,
+    stroke_width), ('rect', cx, cy, side, fill, fill_opacity, stroke,
+    stroke_width) and ('text', cx, cy, lines, font_size, color, bold,
+    line_height).
+    """
+    items = []
+    cell_size = layout.cell_size
+    offset = layout.grid_offset
+    for i in range(layout.size + 1):
+        items.append(('line', i * cell_size - offset, offset, i * cell_size - offset, -offset,
+                      GRID_COLOR, 3))
+        items.append(('line', -offset, offset - i * cell_size, offset, offset - i * cell_size,
+                      GRID_COLOR, 3))
+    for cage in puzzle_data['cages']:
+        for row, col in cage['cells']:
+            x, y, _ = layout.cell_center(row, col)
+            items.append(('rect', x, y, cell_size * 0.9, cage['color'], 0.2, cage['color'], 2))
+        x, y, _ = layout.label_position(cage)
+        items.append(('text', x, y, [cage['operation']], layout.label_font_size(), TEXT_COLOR,
+                      False, LINE_HEIGHT[False]))
+    for (row, col), entry in sorted(shown.items()):
+        x, y, _ = layout.cell_center(row, col)
+        if entry[0] == 'value':
+            items.append(('text', x, y, [str(entry[1])], NUMBER_FONT_SIZE, TEXT_COLOR, True,
+                          LINE_HEIGHT[False]))
+        elif entry[1]:
+            items.append(('text', x, y, entry[1].split('\n'), layout.possibilities_font_size(),
+                          POSSIBILITIES_COLOR, False, LINE_HEIGHT[entry[2]]))
+    return items
+
+
+class PixelTransform:
+    """Scene units (y up, grid centred on the origin) -> image pixels."""
+
+    def __init__(self, layout, width):
+        extent = layout.grid_offset + MARGIN
+        self.scale = width / (2 * extent)
+        self.extent = extent
+        self.width = self.height = width
+
+    def point(self, x, y):
+        return (x + self.extent) * self.scale, (self.extent - y) * self.scale
+
+    def length(self, units):
+        return units * self.scale
+
+
+def text_lines(item, transform):
+    """(x, y, em, line) for each line of a text item, vertically centred."""
+    _, x, y, lines, font_size, _, _, line_height = item
+    em = transform.length(font_size * EM_PER_FONT_SIZE)
+    px, py = transform.point(x, y)
+    top = py - (len(lines) - 1) * em * line_height / 2
+    return [(px, top + i * em * line_height, em, line) for i, line in enumerate(lines)]
+
+
+def render_svg(items, transform):
+    width, height = transform.width, transform.height
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+           f'viewBox="0 0 {width} {height}">',
+           f'<rect width="100%" height="100%" fill="{BACKGROUND}"/>']
+    for item in items:
+        kind = item[0]
+        if kind == 'line':
+            _, x1, y1, x2, y2, color, stroke_width = item
+            x1, y1 = transform.point(x1, y1)
+            x2, y2 = transform.point(x2, y2)
+            out.append(f'<line x1="{x1:.2f}" y1="{y1:.2f}" x2="{x2:.2f}" y2="{y2:.2f}" '
+                       f'stroke="{color}" '
+                       f'stroke-width="{transform.length(stroke_width * STROKE_UNITS):.2f}"/>')
+        elif kind == 'rect':
+            _, x, y, side, fill, opacity, stroke, stroke_width = item
+            x, y = transform.point(x, y)
+            side = transform.length(side)
+            out.append(f'<rect x="{x - side / 2:.2f}" y="{y - side / 2:.2f}" '
+                       f'width="{side:.2f}" height="{side:.2f}" fill="{fill}" '
+                       f'fill-opacity="{opacity}" stroke="{stroke}" '
+                       f'stroke-width="{transform.length(stroke_width * STROKE_UNITS):.2f}"/>')
+        else:
+            color, bold = item[5], item[6]
+            weight = ' font-weight="bold"' if bold else ''
+            for x, y, em, line in text_lines(item, transform):
+                out.append(f'<text x="{x:.2f}" y="{y:.2f}" font-family="sans-serif" '
+                           f'font-size="{em:.2f}" fill="{color}"{weight} text-anchor="middle" '
+                           f'dominant-baseline="central">{html.escape(line)}</text>')
+    out.append('</svg>\n')
+    return "\n".join(out)
+
+
+def _rgb(color):
+    return tuple(int(color[i:i + 2], 16) / 255 for i in (1, 3, 5))
+
+
+def render_png(items, transform, path):
+    # pycairo is Manim's drawing backend; imported here so SVG output works without it
+    import cairo
+
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, transform.width, transform.height)
+    ctx = cairo.Context(surface)
+    ctx.set_source_rgb(*_rgb(BACKGROUND))
+    ctx.paint()
+    for item in items:
+        kind = item[0]
+        if kind == 'line':
+            _, x1, y1, x2, y2, color, stroke_width = item
+            ctx.move_to(*transform.point(x1, y1))
+            ctx.line_to(*transform.point(x2, y2))
+            ctx.set_source_rgb(*_rgb(color))
+            ctx.set_line_width(transform.length(stroke_width * STROKE_UNITS))
+            ctx.stroke()
+        elif kind == 'rect':
+            _, x, y, side, fill, opacity, stroke, stroke_width = item
+            x, y = transform.point(x, y)
+            side = transform.length(side)
+            ctx.rectangle(x - side / 2, y - side / 2, side, side)
+            ctx.set_source_rgba(*_rgb(fill), opacity)
+            ctx.fill_preserve()
+            ctx.set_source_rgb(*_rgb(stroke))
+            ctx.set_line_width(transform.length(stroke_width * STROKE_UNITS))
+            ctx.stroke()
+        else:
+            color, bold = item[5], item[6]
+            weight = cairo.FONT_WEIGHT_BOLD if bold else cairo.FONT_WEIGHT_NORMAL
+            ctx.select_font_face("sans-serif", cairo.FONT_SLANT_NORMAL, weight)
+            ctx.set_source_rgb(*_rgb(color))
+            for x, y, em, line in text_lines(item, transform):
+                ctx.set_font_size(em)
+                extents = ctx.text_extents(line)
+                ctx.move_to(x - extents.x_bearing - extents.width / 2,
+                            y - extents.y_bearing - extents.height / 2)
+                ctx.show_text(line)
+    surface.write_to_png(path)
+
+
+def write_snapshot(puzzle_data, shown, path, width=DEFAULT_WIDTH):
+    """Draw one frame to path, as PNG if it ends in .png and SVG otherwise."""
+    layout = GridLayout(puzzle_data['info']['size'])
+    items = snapshot_items(puzzle_data, shown, layout)
+    transform = PixelTransform(layout, width)
+    if path.endswith(".png"):
+        render_png(items, transform, path)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(render_svg(items, transform))
+    return path
+
+
+def grid_states(steps, size, allowed_numbers, indices):
+    """Yield (index, shown) after the first index steps, for each index in
+    ascending order; None stands for after the last step.
+
+    Steps are consumed only as far as the largest index, so a stream can
+    stop reading early.
+    """
+    state = SceneState(size, allowed_numbers)
+    steps = iter(steps)
+    position = 0
+    for index in sorted(indices, key=lambda i: float('inf') if i is None else i):
+        while index is None or position < index:
+            step = next(steps, None)
+            if step is None:
+                break
+            state.advance(step)
+            position += 1
+        yield index, dict(state.shown)
+
+
+def snapshot_name(input_file, label, fmt):
+    stem = os.path.splitext(os.path.basename(input_file))[0]
+    return f"{stem}_{label}.{fmt}"
+
+
+def snapshot_descriptor(input_file, output_dir, indices=(None,), solution=False, fmt="svg",
+                        width=DEFAULT_WIDTH, indexing=None):
+    """Write snapshots of one descriptor and return their paths.
+
+    indices are step counts (0 is the empty puzzle, None the end of the
+    log); with solution, the 'Solution:' map is drawn as well.
+    """
+    paths = []
+    with DescriptorStream(input_file, indexing) as stream:
+        puzzle_data = stream.puzzle_data
+        info = puzzle_data['info']
+        if not info.get('size'):
+            raise ValueError("no puzzle header")
+        assign_cage_colors(puzzle_data['cages'])
+        for index, shown in grid_states(stream, info['size'], info['allowed_numbers'], indices):
+            label = "final" if index is None else f"step{index}"
+            path = os.path.join(output_dir, snapshot_name(input_file, label, fmt))
+            paths.append(write_snapshot(puzzle_data, shown, path, width))
+        if solution:
+            size = info['size']
+            for row, col in stream.solution:
+                if not (0 <= row < size and 0 <= col < size):
+                    raise ValueError(f"cell {(row, col)} is outside the {size}x{size} grid")
+            shown ={cell: ('value', value) for cell, value in stream.solution.items()}
+            path = os.path.join(output_dir, snapshot_name(input_file, "solution", fmt))
+            paths.append(write_snapshot(puzzle_data, shown, path, width))
+    return paths
+
+
+def _snapshot_job(args):
+    input_file, options = args
+    try:
+        return input_file, snapshot_descriptor(input_file, **options), None
+    except (OSError, ValueError) as e:
+        return input_file, [], str(e)
+
+
+def snapshot_descriptors(input_files, output_dir, workers=None, chunksize=16, **options):
+    """Yield (input, paths, error or None) for many descriptors, in order."""
+    jobs = [(input_file, dict(options, output_dir=output_dir)) for input_file in input_files]
+    if workers == 1 or len(jobs) == 1:
+        yield from map(_snapshot_job, jobs)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_snapshot_job, jobs, chunksize=chunksize)
+
+
+def main():
+    from kenken_batch_render import find_descriptors
+
+    parser = argparse.ArgumentParser(description="Draw still images of KenKen grids without animating them")
+    parser.add_argument("inputs", nargs='+', help="Descriptor files, directories or glob patterns")
+    parser.add_argument("--output-dir", "-o", default="snapshots", help="Directory for the images")
+    parser.add_argument("--step", type=int, nargs='+', default=[], metavar="K",
+                        help="Draw the grid after the first K steps (0: the empty puzzle)")
+    parser.add_argument("--final", action="store_true",
+                        help="Draw the grid after the last step (default if nothing else is asked)")
+    parser.add_argument("--solution", action="store_true", help="Draw the 'Solution:' map")
+    parser.add_argument("--format", "-f", choices=FORMATS, default="svg", help="Image format")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH, help="Image width in pixels")
+    parser.add_argument("--workers", "-j", type=int, default=None,
+                        help="Worker processes (default: CPU count, 1 to stay in-process)")
+    parser.add_argument("--indexing", choices=list(INDEXING_CHOICES), default="auto",
+                        help="Coordinate base of the solver logs")
+    args = parser.parse_args()
+
+    input_files = find_descriptors(args.inputs)
+    if not input_files:
+        print("Error: no descriptors found.")
+        sys.exit(1)
+    indices = list(args.step)
+    if args.final or not (indices or args.solution):
+        indices.append(None)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    written = 0
+    failed = 0
+    for input_file, paths, error in snapshot_descriptors(
+            input_files, args.output_dir, args.workers, indices=indices, solution=args.solution,
+            fmt=args.format, width=args.width, indexing=INDEXING_CHOICES[args.indexing]):
+        if error:
+            failed += 1
+            print(f"[FAIL] {os.path.basename(input_file)}: {error}")
+        written += len(paths)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {written} snapshots of {len(input_files)} descriptors to {args.output_dir} "
+          f"in {elapsed:.2f}s ({written / elapsed:.0f}/s)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+import argparse
+import sys
+
+from kenken_combos import ComboCache, default_cache
+from kenken_dlx import ExactCover
+from kenken_parser import BANNER, format_puzzle, format_solution_line, read_puzzle
+
+# Last character of a cage hint -> operation name
+OPERATORS = {
+    '+': 'sum',
+    '-': 'difference',
+    'x': 'product',
+    'X': 'product',
+    '*': 'product',
+    '×': 'product',
+    '/': 'quotient',
+    '÷': 'quotient',
+    '=': 'value',
+}
+
+# Operation name -> wording used in "The cage covering ..." log lines
+OPERATION_PHRASES = {
+    'sum': 'must have a sum of',
+    'difference': 'must have a difference of',
+    'product': 'must have a product of',
+    'quotient': 'must have a quotient of',
+    'value': 'must equal',
+}
+
+
+class Contradiction(ValueError):
+    """Raised when the deductions leave a cell or cage without candidates."""
+
+
+def parse_operation(hint, n_cells):
+    """Split a cage hint like '12+' or '3' into (operation, target)."""
+    hint = hint.strip()
+    if hint[-1:] in OPERATORS:
+        return OPERATORS[hint[-1]], int(hint[:-1])
+    if hint.isdigit() and n_cells == 1:
+        return 'value', int(hint)
+    raise ValueError(f"Unknown cage operation '{hint}'")
+
+
+def cage_description(cage, operation, target):
+    cells = ", ".join(f"({row},{col})" for row, col in cage['cells'])
+    return f"The cage covering {cells} {OPERATION_PHRASES[operation]} {target}."
+
+
+class SolverCage:
+    """Cage constraint with its still-possible placements as value indices."""
+    __slots__ = ('cells', 'indices', 'description', 'combos', 'perms', 'perm_combos',
+                 'lines', 'signature', 'lines_checked')
+
+    def __init__(self, cage, size, numbers, combo_cache):
+        self.cells = cage['cells']
+        self.indices = [row * size + col for row, col in self.cells]
+        operation, target = parse_operation(cage['operation'], len(self.cells))
+        self.description = cage_description(cage, operation, target)
+        self.combos, self.perms, self.perm_combos = combo_cache.lookup(
+            operation, target, self.cells, numbers)
+
+        # One entry per row/column the cage touches:
+        # (kind, cage positions on that line, cells of the line outside the cage)
+        self.lines = []
+        inside = set(self.indices)
+        for kind, axis in (('row', 0), ('column', 1)):
+            for line in sorted({cell[axis] for cell in self.cells}):
+                positions = [i for i, cell in enumerate(self.cells) if cell[axis] == line]
+                if kind == 'row':
+                    line_cells = [line * size + col for col in range(size)]
+                else:
+                    line_cells = [row * size + line for row in range(size)]
+                outside = [k for k in line_cells if k not in inside]
+                self.lines.append((kind, positions, outside))
+        self.signature = None
+        self.lines_checked = False
+
+
+class KenKenSolver:
+    """Constraint-propagation KenKen solver over per-cell candidate bitmasks.
+
+    Bit i of a cell's mask stands for allowed_numbers[i]. The deduction rules
+    and the lines passed to emit() follow the solver log vocabulary read by
+    kenken_parser, so the log can be animated by KenKenGenerator directly.
+    """
+
+    def __init__(self, puzzle_data, emit=None, combo_cache=None):
+        info = puzzle_data['info']
+        self.size = size = info['size']
+        self.numbers = list(info['allowed_numbers'])
+        self.emit = emit
+        full_mask = (1 << len(self.numbers)) - 1
+        self.candidates = [full_mask] * (size * size)
+        self.values = [None] * (size * size)
+        combo_cache = combo_cache or default_cache()
+        self.cages = [
+            SolverCage(cage, size, self.numbers, combo_cache) for cage in puzzle_data['cages']
+        ]
+        self.peers = [
+            [r * size + col for col in range(size) if col != c] +
+            [row * size + c for row in range(size) if row != r]
+            for r in range(size) for c in range(size)
+        ]
+
+    def cell(self, k):
+        return divmod(k, self.size)
+
+    def mask_values(self, mask):
+        return [number for i, number in enumerate(self.numbers) if mask >> i & 1]
+
+    def solve(self, search=False):
+        """Run the deduction rules; return the solution dict, or None if they
+        stall. With search, a stall is finished by search() instead."""
+        emit = self.emit
+        if emit:
+            for cage in self.cages:
+                emit(cage.description)
+                emit(f"Valid combos: {cage.combos}")
+        self.propagate()
+        solution = self.solution()
+        if solution is None and search:
+            solution = self.search()
+        return solution
+
+    def solution(self):
+        if any(value is None for value in self.values):
+            return None
+        return {self.cell(k): self.numbers[v] for k, v in enumerate(self.values)}
+
+    def propagate(self):
+        """Apply the rules, cheapest first, until none of them makes progress."""
+        while (self.naked_singles() or
+               self.cage_permutation_rules() or
+               self.cage_line_eliminations()):
+            pass
+
+    def snapshot(self):
+        """Copy of the mutable solver state, for restore() after a failed branch."""
+        return (self.candidates[:], self.values[:],
+                [(cage.perms, cage.perm_combos, cage.signature, cage.lines_checked)
+                 for cage in self.cages])
+
+    def restore(self, state):
+        candidates, values, cages = state
+        self.candidates[:] = candidates
+        self.values[:] = values
+        for cage, (perms, perm_combos, signature, lines_checked) in zip(self.cages, cages):
+            cage.perms = perms
+            cage.perm_combos = perm_combos
+            cage.signature = signature
+            cage.lines_checked = lines_checked
+
+    def exact_cover(self):
+        """The rest of the puzzle as an ExactCover; returns (cover, placements).
+
+        Each option is a cage placement still allowed by the candidates and
+        covers its cage and a (row, value) and (column, value) per cell;
+        placements[i] is the (cell indices, value indices) of option i. The
+        row and column columns are primary when every line must hold every
+        allowed number, i.e. there are as many numbers as rows.
+        """
+        size = self.size
+        n = len(self.numbers)
+        candidates = self.candidates
+        n_cages = len(self.cages)
+        rows = n_cages
+        columns = rows + size * n
+        options = []
+        placements = []
+        for i, cage in enumerate(self.cages):
+            for perm in cage.perms:
+                if not all(candidates[k] >> v & 1 for k, v in zip(cage.indices, perm)):
+                    continue
+                option = [i]
+                for k, v in zip(cage.indices, perm):
+                    row, col = divmod(k, size)
+                    option.append(rows + row * n + v)
+                    option.append(columns + col * n + v)
+                if len(set(option)) < len(option):
+                    # Repeats a value within one of the cage's rows or columns
+                    continue
+                options.append(option)
+                placements.append((cage.indices, perm))
+        n_columns = columns + size * n
+        cover = ExactCover(n_columns, options, n_columns if n == size else n_cages)
+        return cover, placements
+
+    def search_solutions(self, limit=1):
+        """Up to limit solutions of the current state by exact-cover search,
+        as lists of value indices per cell. Nothing is emitted or changed."""
+        cover, placements = self.exact_cover()
+        solutions = []
+        for chosen in cover.solve(limit):
+            values = [None] * (self.size * self.size)
+            for i in chosen:
+                indices, perm = placements[i]
+                for k, v in zip(indices, perm):
+                    values[k] = v
+            solutions.append(values)
+        return solutions
+
+    def count_solutions(self, limit=2):
+        """Count solutions, up to limit, by propagating and then searching
+        the cage placements left as an exact cover. Nothing is emitted."""
+        emit = self.emit
+        self.emit = None
+        try:
+            self.propagate()
+        except Contradiction:
+            return 0
+        finally:
+            self.emit = emit
+        if self.solution() is not None:
+            return 1
+        return self.exact_cover()[0].count(limit)
+
+    def search(self):
+        """Finish a stalled solve; return the solution, or None if there is none.
+
+        An exact-cover search over the cage placements left finds a full
+        solution. The log then branches on the unset cell with the fewest
+        candidates, taking its value from that solution ('Branch:' lines
+        listing the candidates it was picked from), and lets the deduction
+        rules run again, until every cell is set.
+        """
+        found = self.search_solutions(1)
+        if not found:
+            return None
+        target = found[0]
+        values = self.values
+        candidates = self.candidates
+        while True:
+            unset = [k for k, value in enumerate(values) if value is None]
+            if not unset:
+                return self.solution()
+            k = min(unset, key=lambda k: bin(candidates[k]).count('1'))
+            self.assign(k, target[k], 'Branch', f" of {self.mask_values(candidates[k])}")
+            self.propagate()
+
+    def assign(self, k, v, rule, note=""):
+        """Set cell k to value index v and remove v from its row and column
+        peers; note is appended to the emitted line."""
+        emit = self.emit
+        candidates = self.candidates
+        bit = 1 << v
+        if not candidates[k] & bit:
+            raise Contradiction(f"{self.numbers[v]} is not a candidate for {self.cell(k)}")
+        self.values[k] = v
+        candidates[k] = bit
+        if emit:
+            row, col = self.cell(k)
+            emit(f"{rule}: Cell ({row},{col}) = {self.numbers[v]}{note}")
+        for peer in self.peers[k]:
+            if candidates[peer] & bit:
+                candidates[peer] &= ~bit
+                if not candidates[peer]:
+                    raise Contradiction(f"no candidates left for {self.cell(peer)}")
+                if emit:
+                    row, col = self.cell(peer)
+                    emit(f"Peer elim: remove {self.numbers[v]} from ({row}, {col})")
+
+    def naked_singles(self):
+        progress = False
+        values = self.values
+        candidates = self.candidates
+        for k in range(len(values)):
+            mask = candidates[k]
+            if values[k] is None and mask & (mask - 1) == 0:
+                self.assign(k, mask.bit_length() - 1, 'Naked single')
+                progress = True
+        return progress
+
+    def cage_permutation_rules(self):
+        """Drop cage placements that no longer fit the candidates, then prune cells.
+
+        Emits 'Updated combos for' when whole combos drop out, 'Cage-single-combo'
+        when a single remaining combo fixes a cell, and 'Perm-prune' otherwise.
+        """
+        emit = self.emit
+        candidates = self.candidates
+        values = self.values
+        progress = False
+        for cage in self.cages:
+            indices = cage.indices
+            signature = tuple(candidates[k] for k in indices)
+            if signature == cage.signature:
+                continue
+            kept = [
+                (perm, combo_id) for perm, combo_id in zip(cage.perms, cage.perm_combos)
+                if all(candidates[k] >> v & 1 for k, v in zip(indices, perm))
+            ]
+            if not kept:
+                raise Contradiction(f"no placement left for {cage.description}")
+            if len(kept) < len(cage.perms):
+                combo_ids = sorted({combo_id for _, combo_id in kept})
+                if emit and len(combo_ids) < len(set(cage.perm_combos)):
+                    combos = [cage.combos[i] for i in combo_ids]
+                    emit(f"Updated combos for '{cage.description}': {combos}")
+                cage.perms = [perm for perm, _ in kept]
+                cage.perm_combos = [combo_id for _, combo_id in kept]
+                cage.lines_checked = False
+
+            single_combo = len(set(cage.perm_combos)) == 1
+            for i, k in enumerate(indices):
+                if values[k] is not None:
+                    continue
+                mask = 0
+                for perm in cage.perms:
+                    mask |= 1 << perm[i]
+                old = candidates[k]
+                if mask == old:
+                    continue
+                progress = True
+                if single_combo and mask & (mask - 1) == 0:
+                    self.assign(k, mask.bit_length() - 1, 'Cage-single-combo')
+                    continue
+                candidates[k] = mask
+                if emit:
+                    row, col = self.cell(k)
+                    emit(f"Perm-prune in '{cage.description}': ({row}, {col}) "
+                         f"{self.mask_values(old)}→{self.mask_values(mask)}")
+            cage.signature = tuple(candidates[k] for k in indices)
+        return progress
+
+    def cage_line_eliminations(self):
+        """If every placement of a cage puts a value on one of its rows or columns,
+        remove that value from the rest of the line."""
+        emit = self.emit
+        candidates = self.candidates
+        values = self.values
+        progress = False
+        for cage in self.cages:
+            if cage.lines_checked:
+                continue
+            cage.lines_checked = True
+            for kind, positions, outside in cage.lines:
+                required = -1
+                for perm in cage.perms:
+                    line_mask = 0
+                    for i in positions:
+                        line_mask |= 1 << perm[i]
+                    required &= line_mask
+                    if not required:
+                        break
+                while required > 0:
+                    bit = required & -required
+                    required ^= bit
+                    for k in outside:
+                        if values[k] is None and candidates[k] & bit:
+                            candidates[k] &= ~bit
+                            if not candidates[k]:
+                                raise Contradiction(f"no candidates left for {self.cell(k)}")
+                            progress = True
+                            if emit:
+                                row, col = self.cell(k)
+                                number = self.numbers[bit.bit_length() - 1]
+                                emit(f"Cage-line elim: remove {number} from ({row},{col}) "
+                                     f"by {kind} in '{cage.description}'")
+        return progress
+
+
+def solve_puzzle(puzzle_data, combo_cache=None, search=False):
+    """Solve a puzzle, returning (solution or None, solver log lines); with
+    search, stalls are finished by exact-cover search (KenKenSolver.search)."""
+    log = []
+    solution = KenKenSolver(puzzle_data, emit=log.append, combo_cache=combo_cache).solve(search)
+    return solution, log
+
+
+def write_descriptor(puzzle_data, log, solution, output_file):
+    """Write a descriptor in the format read by kenken_parser / KenKenGenerator."""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for line in format_puzzle(puzzle_data):
+            f.write(line + "\n")
+        f.write(BANNER + "\n")
+        for line in log:
+            f.write(line + "\n")
+        if solution:
+            f.write(format_solution_line(solution) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a KenKen puzzle and write its solver log")
+    parser.add_argument("input_file", help="Puzzle definition (size, allowed_numbers, cages)")
+    parser.add_argument("--output", "-o", help="Output descriptor (default: <input>_solved.txt)")
+    parser.add_argument("--combo-cache", help="On-disk combo cache to read and update")
+    parser.add_argument("--search", action="store_true",
+                        help="If the deductions stall, finish with exact-cover search, "
+                             "logging each guess as a Branch: line")
+    args = parser.parse_args()
+
+    output_file = args.output
+    if not output_file:
+        if args.input_file.endswith('.txt'):
+            output_file = args.input_file[:-4] + '_solved.txt'
+        else:
+            output_file = args.input_file + '_solved'
+
+    try:
+        combo_cache = ComboCache(args.combo_cache) if args.combo_cache else None
+        puzzle_data = read_puzzle(args.input_file)
+        solution, log = solve_puzzle(puzzle_data, combo_cache, args.search)
+        if combo_cache and combo_cache.new_entries:
+            combo_cache.save()
+    except (OSError, ValueError) as e:
+        print(f"Error solving puzzle: {e}")
+        sys.exit(1)
+
+    write_descriptor(puzzle_data, log, solution, output_file)
+    if solution is None and args.search:
+        print("Warning: the puzzle has no solution.")
+    elif solution is None:
+        print("Warning: deductions stalled before every cell was set "
+              "(--search finishes the log).")
+    print(f"Solver log written to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
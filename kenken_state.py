@@ -0,0 +1,60 @@
+from array import array
+
+from kenken_parser import (ASSIGNMENT, CAGE_LINE_ELIMINATION, CONSTRAINT_PROPAGATION,
+                           mask_values, values_mask)
+
+
+class GridState:
+    """Candidates and values of every cell, as the renderer tracks them.
+
+    Both live in flat arrays indexed by row * size + col: candidates as
+    bitmasks (bit v set when v may go in the cell, see values_mask) and
+    values with 0 for an empty cell. Masks fit array('H') for numbers up to
+    15, which covers every grid the renderer can draw.
+    """
+    __slots__ = ('size', 'candidates', 'values')
+
+    def __init__(self, size, allowed_numbers):
+        full = values_mask(allowed_numbers)
+        self.size = size
+        self.candidates = array('H' if full < 1 << 16 else 'Q', [full]) * (size * size)
+        self.values = array('H', [0]) * (size * size)
+
+    def copy(self):
+        state = GridState.__new__(GridState)
+        state.size = self.size
+        state.candidates = self.candidates[:]
+        state.values = self.values[:]
+        return state
+
+    def index(self, cell):
+        row, col = cell
+        if not (0 <= row < self.size and 0 <= col < self.size):
+            raise ValueError(f"cell {cell} is outside the {self.size}x{self.size} grid")
+        return row * self.size + col
+
+    def candidate_list(self, cell):
+        return mask_values(self.candidates[self.index(cell)])
+
+    def value(self, cell):
+        """Value of the cell, or None while it is empty."""
+        return self.values[self.index(cell)] or None
+
+    def apply(self, step):
+        """Update the state for one cell-changing step; other steps are ignored.
+
+        A prune sets the cell's candidates to the new list, an elimination
+        clears one candidate and an assignment fixes the value.
+        """
+        if getattr(step, 'cell', None) is None:
+            return
+        k = self.index(step.cell)
+        step_type = step.type
+        if step_type == CONSTRAINT_PROPAGATION:
+            self.candidates[k] = step.new_mask
+        elif step_type == CAGE_LINE_ELIMINATION:
+            if step.value_removed is not None:
+                self.candidates[k] &= ~(1 << step.value_removed)
+        elif step_type == ASSIGNMENT:
+            self.values[k] = step.value
+            self.candidates[k] = 1 << step.value
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Tests share helpers with the benchmarks (benchmarks/synthetic.py)
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+if BENCHMARKS not in sys.path:
+    sys.path.insert(0, BENCHMARKS)
+
+import synthetic  # noqa: E402,F401  (puts the repository on sys.path)
@@ -0,0 +1,44 @@
+"""kenken_batch_render resumes only renders made with the same options and
+refuses descriptors that would overwrite each other's videos."""
+import os
+
+import pytest
+
+from kenken_batch_render import (RENDER_SOURCES, check_output_names, is_up_to_date,
+                                 render_key, render_options, write_options)
+
+
+def make_output(tmp_path, options):
+    descriptor = tmp_path / "p.txt"
+    descriptor.write_text("SIZE: 3\n")
+    output = tmp_path / "p.mp4"
+    output.write_bytes(b"video")
+    newest = max(os.path.getmtime(path) for path in RENDER_SOURCES + (str(descriptor),))
+    os.utime(output, (newest + 1, newest + 1))
+    write_options(str(output), options)
+    return str(descriptor), str(output)
+
+
+def test_resume_needs_same_options(tmp_path):
+    options = render_options("low", coalesce=True)
+    descriptor, output = make_output(tmp_path, options)
+    assert is_up_to_date(descriptor, output, options)
+    assert not is_up_to_date(descriptor, output, render_options("high", coalesce=True))
+    assert not is_up_to_date(descriptor, output, render_options("low"))
+    assert not is_up_to_date(descriptor, output, render_options("low", True, 60))
+    assert not is_up_to_date(descriptor, output, render_options("low", True, None, True))
+
+
+def test_render_key_covers_options(tmp_path):
+    descriptor = tmp_path / "p.txt"
+    descriptor.write_text("SIZE: 3\n")
+    keys = {render_key(str(descriptor), *args)
+            for args in (("low",), ("high",), ("low", True), ("low", False, 60),
+                         ("low", False, None, True))}
+    assert len(keys) == 5
+
+
+def test_colliding_names_are_rejected():
+    check_output_names(["a/p.txt", "a/q.txt"])
+    with pytest.raises(ValueError, match="p.mp4"):
+        check_output_names(["a/p.txt", "b/p.txt"])
@@ -0,0 +1,60 @@
+"""Compiled descriptors (.kkc) give back what parsing the text gives."""
+import random
+
+import pytest
+
+from kenken_compiled import compile_descriptor, load_descriptor
+from kenken_parser import BANNER, parse_descriptor
+from kenken_puzzle_generator import generate_puzzle
+from kenken_solver import write_descriptor
+
+
+def written_descriptors(directory, count=6):
+    rng = random.Random(12)
+    paths = []
+    for i in range(count):
+        puzzle_data, log, solution, _ = generate_puzzle(rng.choice((4, 5, 6, 7)), rng)
+        path = str(directory / f"{i}.txt")
+        write_descriptor(puzzle_data, log, solution, path)
+        paths.append(path)
+    return paths
+
+
+def assert_same_steps(views, steps):
+    assert len(views) == len(steps)
+    for view, step in zip(views, steps):
+        assert view.type == step.type
+        for name in step._fields():
+            assert getattr(view, name) == getattr(step, name), (name, step)
+
+
+def test_compiled_steps_equal_parsed_steps(tmp_path):
+    for path in written_descriptors(tmp_path):
+        puzzle_data, solution, steps = parse_descriptor(path)
+        with load_descriptor(path) as descriptor:
+            assert descriptor.puzzle_data == puzzle_data
+            assert descriptor.solution == solution
+            assert_same_steps(list(descriptor), steps)
+            assert_same_steps([descriptor[i] for i in range(len(steps))], steps)
+            loaded = descriptor.load_steps()
+        # load_steps outlives the mapping
+        assert_same_steps(loaded, steps)
+
+
+def test_off_grid_cell_is_rejected(tmp_path):
+    path = written_descriptors(tmp_path, 1)[0]
+    size = parse_descriptor(path)[0]['info']['size']
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    bad = tmp_path / "bad.txt"
+    bad.write_text(text.replace(BANNER, f"{BANNER}\nNaked single: Cell (0,{size}) = 1"),
+                   encoding='utf-8')
+    with pytest.raises(ValueError, match="outside the"):
+        compile_descriptor(str(bad), str(bad) + ".kkc")
+
+
+def test_missing_header_is_rejected(tmp_path):
+    path = tmp_path / "headless.txt"
+    path.write_text(f"{BANNER}\nNaked single: Cell (0,1) = 2\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="no puzzle header"):
+        compile_descriptor(str(path), str(path) + ".kkc")
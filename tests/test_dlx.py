@@ -0,0 +1,65 @@
+"""Exact cover search and solution counts against brute force."""
+import itertools
+import random
+
+import pytest
+
+from kenken_combos import combo_fits
+from kenken_dlx import ExactCover
+from kenken_puzzle_generator import random_puzzle
+from kenken_solver import Contradiction, KenKenSolver, parse_operation
+
+
+def latin_squares(size):
+    """Every size x size Latin square over 1..size, as lists of rows."""
+    rows = list(itertools.permutations(range(1, size + 1)))
+
+    def extend(square):
+        if len(square) == size:
+            yield square
+            return
+        for row in rows:
+            if all(row[col] != other[col] for other in square for col in range(size)):
+                yield from extend(square + [row])
+
+    yield from extend([])
+
+
+def brute_force_count(puzzle_data, squares):
+    cages = [(parse_operation(cage['operation'], len(cage['cells'])), cage['cells'])
+             for cage in puzzle_data['cages']]
+    return sum(all(combo_fits(operation, target, [square[row][col] for row, col in cells])
+                   for (operation, target), cells in cages)
+               for square in squares)
+
+
+def solver_count(puzzle_data, limit):
+    try:
+        return KenKenSolver(puzzle_data).count_solutions(limit)
+    except Contradiction:
+        return 0
+
+
+def test_knuth_example():
+    # The example of "Dancing Links": options 0, 3 and 4 cover all 7 columns
+    options = [[2, 4, 5], [0, 3, 6], [1, 2, 5], [0, 3], [1, 6], [3, 4, 6]]
+    cover = ExactCover(7, options)
+    assert [sorted(solution) for solution in cover.solve(limit=10)] == [[0, 3, 4]]
+    assert ExactCover(7, options).count(limit=10) == 1
+
+
+def test_secondary_columns_are_optional():
+    # Only column 0 is primary: either of the first two options covers it,
+    # leaving a secondary column uncovered
+    cover = ExactCover(3, [[0, 1], [0, 2], [1, 2]], n_primary=1)
+    assert sorted(cover.solve(limit=10)) == [[0], [1]]
+
+
+@pytest.mark.parametrize("size, puzzles", ((3, 40), (4, 40)))
+def test_count_matches_brute_force(size, puzzles):
+    squares = list(latin_squares(size))
+    rng = random.Random(size)
+    limit = len(squares) + 1
+    for _ in range(puzzles):
+        puzzle_data, _ = random_puzzle(size, rng, max_cage=rng.choice((2, 3, 4)))
+        assert solver_count(puzzle_data, limit) == brute_force_count(puzzle_data, squares)
@@ -0,0 +1,64 @@
+"""Fingerprints ignore symmetry and cage order; logs map between orientations."""
+import random
+
+from kenken_cache import ResultCache, solve_cached
+from kenken_fingerprint import (SYMMETRIES, canonical_form, compose, fingerprint, inverse,
+                                map_log, transform_cell)
+from kenken_parser import parse_lines
+from kenken_puzzle_generator import generate_puzzle
+from kenken_replay import replay
+from synthetic import descriptor_lines, shuffled_copy
+
+
+def generated(count=6, seed=24):
+    rng = random.Random(seed)
+    return [generate_puzzle(rng.choice((4, 5, 6, 7)), rng) for _ in range(count)], rng
+
+
+def replays_clean(puzzle_data, log, solution):
+    puzzle, parsed_solution, steps = parse_lines(descriptor_lines(puzzle_data, log, solution))
+    return replay(puzzle, parsed_solution, steps)[1] == []
+
+
+def test_symmetries_compose_and_invert():
+    cell, size = (1, 3), 5
+    for first in range(len(SYMMETRIES)):
+        assert compose(first, inverse(first)) == 0
+        for second in range(len(SYMMETRIES)):
+            moved = transform_cell(transform_cell(cell, size, first), size, second)
+            assert transform_cell(cell, size, compose(first, second)) == moved
+
+
+def test_canonical_form_is_invariant():
+    puzzles, rng = generated()
+    for puzzle_data, _, _, _ in puzzles:
+        form = canonical_form(puzzle_data)[0]
+        for symmetry in range(len(SYMMETRIES)):
+            copy = shuffled_copy(puzzle_data, rng, symmetry)
+            assert canonical_form(copy)[0] == form
+            assert fingerprint(copy) == fingerprint(puzzle_data)
+
+
+def test_map_log_round_trips():
+    puzzles, _ = generated()
+    for puzzle_data, log, solution, _ in puzzles:
+        size = puzzle_data['info']['size']
+        for symmetry in range(len(SYMMETRIES)):
+            turned = map_log(log, size, symmetry)
+            assert map_log(turned, size, inverse(symmetry)) == log
+            turned_puzzle = shuffled_copy(puzzle_data, random.Random(symmetry), symmetry)
+            turned_solution = {transform_cell(cell, size, symmetry): value
+                               for cell, value in solution.items()}
+            assert replays_clean(turned_puzzle, turned, turned_solution)
+
+
+def test_cache_hits_replay_clean(tmp_path):
+    puzzles, rng = generated(4)
+    cache = ResultCache(str(tmp_path))
+    for puzzle_data, _, _, _ in puzzles:
+        for symmetry in range(len(SYMMETRIES)):
+            copy = shuffled_copy(puzzle_data, rng, symmetry)
+            solution, log, hit = solve_cached(copy, cache)
+            assert hit == (symmetry > 0)
+            assert replays_clean(copy, log, solution)
+    assert cache.hits == len(puzzles) * (len(SYMMETRIES) - 1)
@@ -0,0 +1,42 @@
+"""Parsing 1-based logs in one pass matches fixing the file and parsing the
+copy: same puzzle, solution and steps (descriptions included, byte for byte)."""
+import random
+
+import pytest
+
+from kenken_coordinate_fixer import fix_file
+from kenken_parser import DescriptorStream, parse_descriptor
+from kenken_puzzle_generator import generate_puzzle
+from kenken_solver import write_descriptor
+from synthetic import to_one_based
+
+SIZES = (3, 4, 5, 6)
+PUZZLES_PER_SIZE = 5
+
+
+def write_logs(directory, size, count):
+    """(0-based log, its 1-based copy) paths for count generated puzzles."""
+    rng = random.Random(size)
+    pairs = []
+    for i in range(count):
+        puzzle_data, log, solution, _ = generate_puzzle(size, rng)
+        original = directory / f"{size}_{i}.txt"
+        write_descriptor(puzzle_data, log, solution, str(original))
+        shifted = directory / f"{size}_{i}_1based.txt"
+        with open(original, encoding='utf-8') as source, \
+                open(shifted, 'w', encoding='utf-8') as target:
+            target.writelines(to_one_based(line) for line in source)
+        pairs.append((str(original), str(shifted)))
+    return pairs
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_one_pass_matches_fixed_copy(tmp_path, size):
+    for original, shifted in write_logs(tmp_path, size, PUZZLES_PER_SIZE):
+        expected = parse_descriptor(fix_file(shifted, shifted[:-4] + "_fixed.txt"), indexing=0)
+        assert expected[2], "the generated log has no steps"
+        assert parse_descriptor(shifted) == expected
+        assert parse_descriptor(shifted, indexing=1) == expected
+        with DescriptorStream(shifted) as stream:
+            assert list(stream) == expected[2]
+        assert parse_descriptor(original) == expected
@@ -0,0 +1,89 @@
+"""kenken_replay accepts the solver's own logs and catches tampered ones."""
+import random
+
+from kenken_parser import parse_lines
+from kenken_puzzle_generator import generate_puzzle
+from kenken_replay import replay
+from kenken_solver import solve_puzzle
+from synthetic import descriptor_lines
+
+# 4x4 puzzle with a 3-cell difference cage and a 3-cell quotient cage
+# (largest - sum(rest) and largest / prod(rest)), built over
+#   1 2 3 4
+#   2 1 4 3
+#   3 4 1 2
+#   4 3 2 1
+N_CELL_PUZZLE = {
+    'info': {'size': 4, 'allowed_numbers': [1, 2, 3, 4]},
+    'cages': [
+        {'operation': "1-", 'cells': [(1, 0), (1, 1), (2, 1)], 'anchor': (1, 0)},
+        {'operation': "2/", 'cells': [(1, 2), (2, 2), (3, 2)], 'anchor': (1, 2)},
+        {'operation': "3+", 'cells': [(0, 0), (0, 1)], 'anchor': (0, 0)},
+        {'operation': "12x", 'cells': [(0, 2), (0, 3)], 'anchor': (0, 2)},
+        {'operation': "5+", 'cells': [(1, 3), (2, 3)], 'anchor': (1, 3)},
+        {'operation': "7+", 'cells': [(2, 0), (3, 0)], 'anchor': (2, 0)},
+        {'operation': "3", 'cells': [(3, 1)], 'anchor': (3, 1)},
+        {'operation': "1", 'cells': [(3, 3)], 'anchor': (3, 3)},
+    ],
+}
+
+
+def replay_lines(lines):
+    puzzle_data, solution, steps = parse_lines(lines)
+    return replay(puzzle_data, solution, steps)[1]
+
+
+def solved_lines(seed=9, size=5):
+    rng = random.Random(seed)
+    puzzle_data, log, solution, _ = generate_puzzle(size, rng)
+    return descriptor_lines(puzzle_data, log, solution)
+
+
+def tamper(lines, prefix, edit):
+    """lines with edit applied to the first one starting with prefix."""
+    for i, line in enumerate(lines):
+        if line.startswith(prefix):
+            return lines[:i] + [edit(line)] + lines[i + 1:]
+    raise AssertionError(f"no line starts with {prefix!r}")
+
+
+def test_solver_log_replays_clean():
+    for seed in range(5):
+        assert replay_lines(solved_lines(seed)) == []
+
+
+def test_n_cell_difference_and_quotient_cages():
+    solution, log = solve_puzzle(N_CELL_PUZZLE, search=True)
+    assert solution is not None
+    assert replay_lines(descriptor_lines(N_CELL_PUZZLE, log, solution)) == []
+
+
+def test_wrong_old_values_fail():
+    lines = tamper(solved_lines(), "Perm-prune",
+                   lambda line: line.replace("[1, 2, 3, 4, 5]→", "[1, 2, 3, 4]→", 1))
+    issues = replay_lines(lines)
+    assert any("old values" in issue for issue in issues), issues
+
+
+def test_assignment_against_solution_fails():
+    lines = solved_lines()
+    solution_line = lines[-1]
+
+    def swap_value(line):
+        head, _, value = line.rpartition(" = ")
+        return f"{head} = {int(value) % 5 + 1}"
+
+    lines = tamper(lines[:-1], "Cage-single-combo", swap_value) + [solution_line]
+    assert replay_lines(lines)
+
+
+def test_broken_cage_fails():
+    lines = solved_lines()
+    puzzle_data, solution, _ = parse_lines(lines)
+    cage = next(cage for cage in puzzle_data['cages'] if cage['operation'].endswith('+'))
+    target = int(cage['operation'][:-1])
+    lines = tamper(lines, f"{cage['operation']},",
+                   lambda line: line.replace(f"{target}+", f"{target + 1}+", 1))
+    issues = replay_lines(lines)
+    values = [solution[cell] for cell in cage['cells']]
+    assert f"solution: cage {target + 1}+ at {cage['anchor']} does not hold for {values}" in issues
@@ -0,0 +1,39 @@
+"""Scene state numbering and segment keys with and without cage analyses shown."""
+import random
+
+from kenken_parser import CAGE_ANALYSIS, parse_lines
+from kenken_puzzle_generator import generate_puzzle
+from kenken_segments import SceneState, is_drawn, plan_segments
+from synthetic import descriptor_lines
+
+
+def parsed_puzzle():
+    puzzle_data, log, solution, _ = generate_puzzle(5, random.Random(19))
+    return parse_lines(descriptor_lines(puzzle_data, log, solution))
+
+
+def test_shown_cage_analyses_are_numbered_beats():
+    puzzle_data, _, steps = parsed_puzzle()
+    info = puzzle_data['info']
+    analyses = sum(1 for step in steps if step.type == CAGE_ANALYSIS)
+    assert analyses
+    counters = {}
+    for shown in (False, True):
+        state = SceneState(info['size'], info['allowed_numbers'], shown)
+        for step in steps:
+            before = state.step_counter
+            changes = state.advance(step)
+            assert state.step_counter == before + (changes is not None)
+            if step.type == CAGE_ANALYSIS:
+                assert (changes is not None) == shown
+        counters[shown] = state.step_counter
+    assert counters[True] - counters[False] == analyses
+
+
+def test_option_changes_segment_keys():
+    puzzle_data, _, steps = parsed_puzzle()
+    hidden = plan_segments(puzzle_data, steps, b'salt')
+    shown = plan_segments(puzzle_data, steps, b'salt', show_cage_analysis=True)
+    assert sum(1 for step in steps if is_drawn(step, True)) > \
+        sum(1 for step in steps if is_drawn(step))
+    assert not {segment.key for segment in hidden} & {segment.key for segment in shown}
@@ -0,0 +1,35 @@
+"""solve_puzzle finds the puzzle's solution and logs steps the replay accepts."""
+import random
+
+import pytest
+
+from kenken_parser import parse_lines
+from kenken_puzzle_generator import random_puzzle
+from kenken_replay import replay
+from kenken_solver import solve_puzzle
+from synthetic import descriptor_lines
+
+SIZES = (3, 4, 5, 6, 7)
+PUZZLES_PER_SIZE = 8
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("search", (False, True))
+def test_solver_log_replays(size, search):
+    rng = random.Random(size)
+    solved = 0
+    for _ in range(PUZZLES_PER_SIZE):
+        puzzle_data, grid = random_puzzle(size, rng)
+        solution, log = solve_puzzle(puzzle_data, search=search)
+        if solution is None:
+            # The rules stalled; only search must always finish
+            assert not search
+            continue
+        solved += 1
+        puzzle, parsed_solution, steps = parse_lines(descriptor_lines(puzzle_data, log, solution))
+        assert parsed_solution == solution
+        assert replay(puzzle, parsed_solution, steps)[1] == []
+        if not search:
+            # Sound deductions reaching a full grid leave one solution: the grid built
+            assert solution == grid
+    assert solved